@@ -0,0 +1,140 @@
+"""
+Builds the simplified boundary files bundled under ``static/geo/``.
+
+Source geometry is the US Census Bureau cartographic boundary shapefiles
+(cb_2016_us_*_500k, public domain), which ship with the ``plotly-geo`` package.
+Each ring is simplified with Douglas-Peucker and quantized once, here, so the
+app never has to simplify or re-serialize geometry at runtime.
+
+Usage:
+    pip install pyshp plotly-geo
+    python dataset/build_geo_assets.py [--source DIR]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "geo")
+
+# layer name -> (shapefile stem, simplification tolerance in degrees, decimals kept)
+LAYERS = {
+    "us-states": ("cb_2016_us_state_500k", 0.01, 3),
+    "us-counties": ("cb_2016_us_county_500k", 0.01, 3),
+}
+
+STATE_FIPS_TO_USPS = {
+    "01": "AL", "02": "AK", "04": "AZ", "05": "AR", "06": "CA", "08": "CO", "09": "CT",
+    "10": "DE", "11": "DC", "12": "FL", "13": "GA", "15": "HI", "16": "ID", "17": "IL",
+    "18": "IN", "19": "IA", "20": "KS", "21": "KY", "22": "LA", "23": "ME", "24": "MD",
+    "25": "MA", "26": "MI", "27": "MN", "28": "MS", "29": "MO", "30": "MT", "31": "NE",
+    "32": "NV", "33": "NH", "34": "NJ", "35": "NM", "36": "NY", "37": "NC", "38": "ND",
+    "39": "OH", "40": "OK", "41": "OR", "42": "PA", "44": "RI", "45": "SC", "46": "SD",
+    "47": "TN", "48": "TX", "49": "UT", "50": "VT", "51": "VA", "53": "WA", "54": "WV",
+    "55": "WI", "56": "WY", "60": "AS", "66": "GU", "69": "MP", "72": "PR", "78": "VI",
+}
+
+
+def default_source_dir() -> str:
+    """Locate the Census shapefiles bundled with ``plotly-geo``."""
+    import _plotly_geo
+
+    return os.path.join(os.path.dirname(_plotly_geo.__file__), "package_data")
+
+
+def simplify_ring(ring: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a closed ring (iterative, vectorized per segment)."""
+    if len(ring) <= 4:
+        return ring
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = ring[start], ring[end]
+        seg = b - a
+        pts = ring[start + 1:end] - a
+        seg_len = np.hypot(*seg)
+        if seg_len == 0:
+            dist = np.hypot(pts[:, 0], pts[:, 1])
+        else:
+            dist = np.abs(seg[0] * pts[:, 1] - seg[1] * pts[:, 0]) / seg_len
+        idx = int(np.argmax(dist))
+        if dist[idx] > tolerance:
+            split = start + 1 + idx
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return ring[keep]
+
+
+def _signed_area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def shape_to_polygons(shape, tolerance: float, decimals: int) -> list:
+    """Convert a shapefile polygon into simplified, quantized GeoJSON polygon rings."""
+    points = np.asarray(shape.points, dtype=float)
+    bounds = list(shape.parts) + [len(points)]
+    polygons: list = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        ring = np.round(simplify_ring(points[start:end], tolerance), decimals)
+        ring = ring[np.r_[True, np.any(np.diff(ring, axis=0) != 0, axis=1)]]
+        if len(ring) < 4 or abs(_signed_area(ring)) < tolerance ** 2:
+            continue
+        coords = ring.tolist()
+        # Shapefile outer rings are clockwise (negative area); holes follow their outer ring.
+        if _signed_area(ring) < 0 or not polygons:
+            polygons.append([coords[::-1]])
+        else:
+            polygons[-1].append(coords[::-1])
+    return polygons
+
+
+def feature_properties(record: dict) -> dict:
+    """Keep only the identifying attributes the app joins on."""
+    props = {"GEOID": record["GEOID"], "NAME": record["NAME"]}
+    props["STUSPS"] = record.get("STUSPS") or STATE_FIPS_TO_USPS.get(record["STATEFP"], "")
+    return props
+
+
+def build_layer(source_dir: str, stem: str, tolerance: float, decimals: int) -> dict:
+    """Read one shapefile and return a simplified GeoJSON FeatureCollection."""
+    import shapefile
+
+    reader = shapefile.Reader(os.path.join(source_dir, stem))
+    features = []
+    for shape_record in reader.iterShapeRecords():
+        polygons = shape_to_polygons(shape_record.shape, tolerance, decimals)
+        if not polygons:
+            continue
+        features.append({
+            "type": "Feature",
+            "properties": feature_properties(shape_record.record.as_dict()),
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons},
+        })
+    features.sort(key=lambda f: f["properties"]["GEOID"])
+    return {"type": "FeatureCollection", "features": features}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", default=None, help="Directory holding the cb_2016 shapefiles.")
+    args = parser.parse_args()
+    source_dir = args.source or default_source_dir()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for name, (stem, tolerance, decimals) in LAYERS.items():
+        collection = build_layer(source_dir, stem, tolerance, decimals)
+        path = os.path.join(OUTPUT_DIR, f"{name}.geojson")
+        with open(path, "w") as f:
+            json.dump(collection, f, separators=(",", ":"))
+        print(f"Wrote {len(collection['features'])} features to {path} ({os.path.getsize(path) / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
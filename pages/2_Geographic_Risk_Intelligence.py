@@ -1,17 +1,32 @@
 import streamlit as st
-import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import pydeck as pdk
-import json
 import math
 import sys, os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from src.data_loader import load_data, apply_global_filters
+from src.aggregations import HIGH_RISK_LEVELS, add_indicators, crosstab_counts, unique_join
+from src.data_loader import load_data, apply_global_filters, dataset_version
 from src.dashboard_chatbot import render_dashboard_chatbot
 from src.download_utils import render_plotly_with_download, render_table_with_download
+from src.deck_map import deck_map, map_layer
+from src.geo_boundaries import (
+    COORD_MISSING, COORD_OUTSIDE_STATE,
+    align_to_counties, choropleth_colors, choropleth_legend,
+)
+from src.map_assets import asset_url, plotly_offline_basemap
+from src.proximity_clusters import ProximityClusterIndex
+from src.spatial_density import cost_density, density_image
+from src.spatial_stats import (
+    HOTSPOT_COLORS, HOTSPOT_ORDER, MAX_BAND_PAIRS, NOT_SIGNIFICANT, band_pair_estimates,
+    hotspot_analysis, hotspot_summary,
+)
+from src.spatial_lod import (
+    EXACT_LEVEL, LOD_COLUMNS, build_lod_pyramid, encode_cells, level_zooms, points_in_cell,
+    select_level,
+)
 from src.theme import (
     inject_theme_css, page_header, section_divider, fmt_currency,
     COLORS, RISK_COLOR_MAP, RISK_ORDER, PLOTLY_LAYOUT, PLOTLY_CLEAN,
@@ -66,46 +81,35 @@ with main:
 
     df_filtered = df[df["State"].isin(selected_states)].copy() if selected_states else df.copy()
 
+    # Every located device is mapped and analysed (AK/HI included). Devices whose
+    # coordinates fall outside their recorded state (checked at ingest) are only
+    # flagged, and listed for correction on the Data Entry page.
+    coord_status = df_filtered["Coord_Status"]
+    coord_located = coord_status != COORD_MISSING
+
     # ── 3-D Risk Map ─────────────────────────────────────────────────────
     st.subheader("3-D Risk Map")
-    map_df = df_filtered.dropna(subset=["Latitude", "Longitude"]).copy()
-
-    # Filter out points not in continental US roughly (Lat 24 to 50, Lon -125 to -66)
-    us_bounds_mask = (
-        (map_df["Latitude"] >= 24) & (map_df["Latitude"] <= 50) &
-        (map_df["Longitude"] >= -125) & (map_df["Longitude"] <= -66)
-    )
-    map_df = map_df[us_bounds_mask]
+    map_df = df_filtered[coord_located].copy()
+    n_outside_state = int((coord_status == COORD_OUTSIDE_STATE).sum())
+    if n_outside_state:
+        st.caption(
+            f"⚠️ {n_outside_state:,} device(s) have coordinates outside their recorded state. They "
+            "are still mapped and analysed; review them under Coordinate Verification on the Data Entry page."
+        )
 
     if map_df.empty:
         st.info("No device locations available for the current filter selection.")
     else:
-        map_df["color"] = map_df["Risk_Level"].map(RISK_RGBA)
-        map_df["color"] = map_df["color"].apply(
-            lambda c: c if isinstance(c, list) else [150, 150, 150, 160]
-        )
-
-        # Aggregate by location for columns: stack co-located devices
+        # Aggregate by location for columns: stack co-located devices, or
+        # bucket into coarser grid cells when the view is zoomed out.
         map_df["risk_severity"] = map_df["Risk_Level"].map(RISK_SEVERITY).fillna(99)
-        col_agg = map_df.groupby(["Latitude", "Longitude"], as_index=False).agg(
-            Total_Replacement_Cost=("Total_Replacement_Cost", "sum"),
-            Device_Count=("Hostname", "size"),
-            Hostnames=("Hostname", lambda x: ", ".join(x.head(5)) + ("..." if len(x) > 5 else "")),
-            State=("State", "first"),
-            risk_severity=("risk_severity", "min"),  # worst (lowest index) risk
-        )
-        # Map worst severity back to risk level and color
+        lod_points = map_df[LOD_COLUMNS]
+        lod_version = dataset_version(lod_points)
+        lod_pyramid = build_lod_pyramid(lod_version, lod_points)
+        col_agg = lod_pyramid[EXACT_LEVEL].copy()
+        # Map worst severity back to risk level for the exported table
         severity_to_risk = {v: k for k, v in RISK_SEVERITY.items()}
         col_agg["Risk_Level"] = col_agg["risk_severity"].map(severity_to_risk)
-        col_agg["color"] = col_agg["Risk_Level"].map(RISK_RGBA)
-        col_agg["color"] = col_agg["color"].apply(
-            lambda c: c if isinstance(c, list) else [150, 150, 150, 160]
-        )
-        column_records = col_agg[
-            ["Longitude", "Latitude", "Total_Replacement_Cost",
-             "Risk_Level", "Device_Count", "Hostnames", "State", "color"]
-        ].to_dict(orient="records")
-        column_data_json = json.dumps(column_records)
 
         # Compute dynamic view: zoom to data bounds when state filter is active
         if selected_states:
@@ -123,162 +127,116 @@ with main:
             view_lon = -98.5795
             view_zoom = 4.0
 
-        # ── Dynamic zoom-aware scaling map ────────────────────────────────
-        # Uses a custom deck.gl embed to implement inverse zoom scaling:
-        #   - Markers grow when zooming out (overview visibility)
-        #   - Markers shrink when zooming in (location precision)
-        #   - Smooth exponential interpolation, clamped to min/max bounds
-        map_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8" />
-            <script src="https://unpkg.com/deck.gl@8.9.35/dist.min.js"></script>
-            <script src="https://unpkg.com/maplibre-gl@3.6.2/dist/maplibre-gl.js"></script>
-            <link href="https://unpkg.com/maplibre-gl@3.6.2/dist/maplibre-gl.css" rel="stylesheet" />
-            <style>
-                body {{ margin: 0; padding: 0; overflow: hidden; }}
-                #map {{ width: 100%; height: 100vh; position: relative; }}
-                #tooltip {{
-                    position: absolute; z-index: 10; pointer-events: none;
-                    background: #F8FAFC; color: #1A1F2E; font-size: 13px;
-                    padding: 10px 14px; border-radius: 10px;
-                    display: none; max-width: 280px;
-                    border: 1px solid #D8E0DB;
-                    box-shadow: 0 8px 24px rgba(15, 23, 42, 0.12);
-                    font-family: Inter, sans-serif;
-                }}
-                #legend {{
-                    position: absolute; bottom: 24px; left: 16px; z-index: 10;
-                    background: rgba(255,255,255,0.92); border-radius: 8px;
-                    padding: 10px 14px; font-size: 12px; color: #1a1f36;
-                    box-shadow: 0 2px 8px rgba(0,0,0,0.12);
-                    line-height: 1.7; font-family: Inter, sans-serif;
-                }}
-                #legend b {{ font-size: 13px; }}
-                .legend-item {{ display: flex; align-items: center; gap: 8px; }}
-                .legend-dot {{
-                    width: 12px; height: 12px; border-radius: 3px;
-                    display: inline-block; flex-shrink: 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <div id="map"></div>
-            <div id="tooltip"></div>
-            <div id="legend">
-                <b>Risk Level</b>
-                <div class="legend-item"><span class="legend-dot" style="background:#e74c3c"></span> Critical (Past EoL)</div>
-                <div class="legend-item"><span class="legend-dot" style="background:#f0a830"></span> High (Near EoL)</div>
-                <div class="legend-item"><span class="legend-dot" style="background:#3498db"></span> Medium (Approaching EoL)</div>
-                <div class="legend-item"><span class="legend-dot" style="background:#27ae60"></span> Low (Healthy)</div>
-            </div>
-            <script>
-            const COLUMN_DATA = {column_data_json};
-
-            // ── Zoom-aware scaling parameters ────────────────────────────
-            const SCALE_CONFIG = {{
-                referenceZoom: 6.0,   // midpoint zoom where scale = 1.0
-                sensitivity: 0.55,    // how aggressively size responds to zoom
-                minScale: 0.12,       // floor: prevents invisibly small markers
-                maxScale: 4.0,        // ceiling: prevents oversized markers
-                smoothingFactor: 0.3  // lerp factor for smooth transitions
-            }};
-
-            // Column base radius (in meters)
-            const COLUMN_BASE_RADIUS = 8000;
-
-            // Initialize scale to match the computed value at initial zoom
-            let currentColumnScale = computeZoomScale({view_zoom});
-
-            /**
-             * Compute inverse zoom scale factor.
-             * As zoom increases (zooming in), scale DECREASES → smaller markers.
-             * As zoom decreases (zooming out), scale INCREASES → larger markers.
-             * Uses exponential curve for smooth non-linear response.
-             */
-            function computeZoomScale(zoom) {{
-                const raw = Math.pow(2, (SCALE_CONFIG.referenceZoom - zoom) * SCALE_CONFIG.sensitivity);
-                return Math.max(SCALE_CONFIG.minScale, Math.min(SCALE_CONFIG.maxScale, raw));
-            }}
-
-            /** Smooth linear interpolation to prevent jitter during rapid zoom. */
-            function lerp(current, target, factor) {{
-                return current + (target - current) * factor;
-            }}
-
-            // Column layer: aggregated by location, colored by worst risk
-            const columnLayer = new deck.ColumnLayer({{
-                id: "columns",
-                data: COLUMN_DATA,
-                getPosition: d => [d.Longitude, d.Latitude],
-                getElevation: d => d.Total_Replacement_Cost,
-                elevationScale: 0.5,
-                radius: COLUMN_BASE_RADIUS,
-                getFillColor: d => d.color,
-                pickable: true,
-                autoHighlight: true,
-                highlightColor: [255, 200, 200, 100]
-            }});
-
-            const tooltipEl = document.getElementById("tooltip");
-
-            // ── Create deck.gl instance ──────────────────────────────────
-            const deckgl = new deck.DeckGL({{
-                container: "map",
-                mapStyle: "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json",
-                initialViewState: {{
-                    latitude: {view_lat},
-                    longitude: {view_lon},
-                    zoom: {view_zoom},
-                    pitch: 45,
-                    bearing: 10
-                }},
-                controller: true,
-                layers: [columnLayer],
-
-                /**
-                 * Core zoom-aware scaling logic.
-                 * Fires on every view state change (zoom, pan, tilt).
-                 * Computes target scale from zoom, then lerps for smoothness.
-                 */
-                onViewStateChange: ({{viewState}}) => {{
-                    const targetScale = computeZoomScale(viewState.zoom);
-
-                    // Smooth interpolation prevents flickering during rapid scroll
-                    currentColumnScale = lerp(currentColumnScale, targetScale, SCALE_CONFIG.smoothingFactor);
-
-                    // Re-render layers with updated scale
-                    deckgl.setProps({{
-                        layers: [
-                            columnLayer.clone({{ radius: COLUMN_BASE_RADIUS * currentColumnScale }})
-                        ]
-                    }});
-                }},
-
-                // ── Tooltip on hover ─────────────────────────────────────
-                onHover: ({{object, x, y}}) => {{
-                    if (object) {{
-                        tooltipEl.style.display = "block";
-                        tooltipEl.style.left = x + 12 + "px";
-                        tooltipEl.style.top = y + 12 + "px";
-                        const count = object.Device_Count || 1;
-                        tooltipEl.innerHTML =
-                            "<b>" + count + " device" + (count > 1 ? "s" : "") + "</b><br/>" +
-                            "Worst Risk: " + (object.Risk_Level || "") + "<br/>" +
-                            "Total Cost: $" + Number(object.Total_Replacement_Cost || 0).toLocaleString() + "<br/>" +
-                            "Devices: " + (object.Hostnames || "") + "<br/>" +
-                            "State: " + (object.State || "");
-                    }} else {{
-                        tooltipEl.style.display = "none";
-                    }}
-                }}
-            }});
-            </script>
-        </body>
-        </html>
-        """
-        components.html(map_html, height=550)
+        view_token = ",".join(selected_states)
+        view_state = {
+            "latitude": view_lat, "longitude": view_lon, "zoom": view_zoom,
+            "pitch": 45, "bearing": 10,
+        }
+
+        # Pick the grid resolution from the camera the map last reported, if the
+        # view has not been reset by a new filter since.
+        map_state = st.session_state.get("geo_risk_map") or {}
+        if map_state.get("view") and map_state.get("view_token") == view_token:
+            current_zoom = float(map_state["view"]["zoom"])
+        else:
+            current_zoom = view_zoom
+        lod_level = select_level(lod_pyramid, current_zoom)
+        cells = encode_cells(lod_pyramid[lod_level])
+
+        severity_palette = np.tile(np.array([150, 150, 150, 160], dtype=np.uint8), (256, 1))
+        severity_labels = [""] * 256
+        for risk, sev in RISK_SEVERITY.items():
+            severity_palette[sev] = RISK_RGBA[risk]
+            severity_labels[sev] = risk
+
+        # ── Persistent deck.gl map ────────────────────────────────────────
+        # The map component keeps one deck.gl instance across reruns and
+        # receives the column buffers only when the data or grid level change.
+        # Zoom-aware inverse scaling keeps columns visible when zoomed out.
+        column_layer = map_layer(
+            "risk-columns", "ColumnLayer", f"{lod_version}:{lod_level}",
+            attributes={
+                "getPosition": cells["position"],
+                "getElevation": cells["cost"],
+                "getFillColor": severity_palette[cells["sev"]],
+            },
+            fields={"count": cells["count"], "cost": cells["cost"], "sev": cells["sev"], "state": cells["state"]},
+            labels={"hosts": cells["hosts"]},
+            lookups={"sev": severity_labels, "state": cells["states"]},
+            tooltip=(
+                "<b>{count} device(s)</b><br/>Worst Risk: {sev}<br/>"
+                "Total Cost: {cost:$}<br/>Devices: {hosts}<br/>State: {state}"
+            ),
+            props={
+                "elevationScale": 0.5, "radius": 8000, "pickable": True,
+                "autoHighlight": True, "highlightColor": [255, 200, 200, 100],
+            },
+            scale_radius=True,
+        )
+        map_layers = [column_layer]
+
+        # ── Cost density overlay ──────────────────────────────────────────
+        # Kernel density of replacement cost, smoothed by FFT on a fixed grid
+        # and cached per (filter, bandwidth); drawn beneath the columns.
+        density_left, density_right = st.columns([1, 2])
+        with density_left:
+            show_density = st.toggle(
+                "Cost density overlay",
+                value=False,
+                help="Heatmap of replacement cost per square mile, smoothed over the chosen bandwidth.",
+                key="geo_density_overlay",
+            )
+        if show_density:
+            with density_right:
+                bandwidth_miles = st.select_slider(
+                    "Density bandwidth",
+                    options=[10, 25, 50, 100],
+                    value=25,
+                    format_func=lambda x: f"{x} mi",
+                    key="geo_density_bandwidth",
+                )
+            surface = cost_density(lod_version, float(bandwidth_miles), lod_points)
+            map_layers.insert(0, map_layer(
+                "cost-density", "BitmapLayer", f"{lod_version}:{bandwidth_miles}",
+                attributes={},
+                image=density_image(surface["density"]),
+                props={"bounds": surface["bounds"], "opacity": 0.85, "pickable": False},
+            ))
+
+        map_state = deck_map(
+            map_layers, view_state, key="geo_risk_map", view_token=view_token,
+            report_zooms=level_zooms(),
+            legend={
+                "title": "Risk Level",
+                "items": [{"label": risk, "color": RISK_COLOR_MAP[risk]} for risk in RISK_SEVERITY],
+            },
+            height=550,
+        ) or {}
+
+        click = map_state.get("click")
+        if click and click.get("layer") == "risk-columns":
+            click_version, click_level = click["version"].rsplit(":", 1)
+            click_level = click_level if click_level == EXACT_LEVEL else int(click_level)
+            clicked_cells = lod_pyramid.get(click_level)
+            if click_version == lod_version and clicked_cells is not None and click["index"] < len(clicked_cells):
+                cell = clicked_cells.iloc[click["index"]]
+                site_devices = points_in_cell(map_df, click_level, cell)
+                st.markdown(
+                    f"**Selected location:** {len(site_devices):,} device(s) in "
+                    f"{', '.join(sorted(site_devices['State'].dropna().unique()))} — "
+                    f"{fmt_currency(site_devices['Total_Replacement_Cost'].sum())} replacement cost"
+                )
+                render_table_with_download(
+                    site_devices[["Hostname", "Site_Code", "State", "Risk_Level", "Total_Replacement_Cost"]],
+                    "geographic_risk_map_selected_location",
+                    "geo_risk_map_selected_location",
+                    use_container_width=True, hide_index=True, height=240,
+                    column_config={
+                        "Total_Replacement_Cost": st.column_config.NumberColumn(
+                            "Replacement Cost", format="$ %.0f"
+                        ),
+                    },
+                )
         st.download_button(
             label="Download map data (CSV)",
             data=col_agg.to_csv(index=False).encode("utf-8"),
@@ -295,7 +253,7 @@ with main:
         "Send technicians to the top rows first."
     )
 
-    cluster_mask = df_filtered["Risk_Level"].isin(["Critical (Past EoL)", "High (Near EoL)"])
+    cluster_mask = df_filtered["Risk_Level"].isin(HIGH_RISK_LEVELS)
     cluster_df = df_filtered[cluster_mask]
 
     if cluster_df.empty:
@@ -360,35 +318,31 @@ with main:
             )
 
         work_df = df_filtered[df_filtered["Risk_Level"].isin(risk_filter)].copy() if risk_filter else df_filtered.copy()
-        work_df = work_df.dropna(subset=["Latitude", "Longitude"])
-        us_mask = (
-            (work_df["Latitude"] >= 24) & (work_df["Latitude"] <= 50) &
-            (work_df["Longitude"] >= -125) & (work_df["Longitude"] <= -66)
-        )
-        work_df = work_df[us_mask]
+        work_df = work_df[coord_located.reindex(work_df.index)]
 
         if work_df.empty:
             st.info("No devices match the selected filters for proximity analysis.")
         else:
-            site_df = work_df.groupby("Site_Code", as_index=False).agg(
+            site_df = work_df.groupby("Site_Code").agg(
                 Latitude=("Latitude", "first"),
                 Longitude=("Longitude", "first"),
                 State=("State", "first"),
                 Device_Count=("Hostname", "size"),
                 Total_Cost=("Total_Replacement_Cost", "sum"),
                 Risk_Score_Sum=("Risk_Score", "sum"),
-                Critical=("Risk_Level", lambda x: (x == "Critical (Past EoL)").sum()),
-                High=("Risk_Level", lambda x: (x == "High (Near EoL)").sum()),
             )
-
-            from sklearn.cluster import DBSCAN
-
-            coords = site_df[["Latitude", "Longitude"]].values
-            eps_rad = radius_miles / 3958.8
-            labels = DBSCAN(eps=eps_rad, min_samples=2, metric="haversine").fit_predict(
-                np.radians(coords)
-            )
-            site_df["Cluster"] = labels
+            site_risk = crosstab_counts(work_df, "Site_Code", "Risk_Level", HIGH_RISK_LEVELS)
+            site_risk.columns = ["Critical", "High"]
+            site_df = site_df.join(site_risk).reset_index()
+
+            # One incrementally maintained index per radius: filter changes and new
+            # uploads only add/remove the sites that changed, and cluster IDs persist.
+            cluster_indexes = st.session_state.setdefault("_geo_proximity_clusters", {})
+            if radius_miles not in cluster_indexes:
+                cluster_indexes[radius_miles] = ProximityClusterIndex(radius_miles)
+            cluster_index = cluster_indexes[radius_miles]
+            cluster_index.sync(site_df)
+            site_df["Cluster"] = cluster_index.labels(site_df["Site_Code"])
 
             clustered = site_df[site_df["Cluster"] >= 0].copy()
             n_clusters = int(clustered["Cluster"].nunique()) if not clustered.empty else 0
@@ -410,17 +364,17 @@ with main:
                 )
             else:
                 map_data = site_df.copy()
-                map_data["Cluster_Label"] = map_data["Cluster"].apply(
-                    lambda x: f"Cluster {x + 1}" if x >= 0 else "Unclustered"
+                map_data["Cluster_Label"] = np.where(
+                    map_data["Cluster"] >= 0,
+                    "Cluster " + (map_data["Cluster"] + 1).astype(str),
+                    "Unclustered",
                 )
                 map_data["Marker_Size"] = map_data["Device_Count"].clip(upper=50)
 
-                unique_labels = sorted(
-                    [l for l in map_data["Cluster_Label"].unique() if l != "Unclustered"]
-                )
+                # Colour by cluster ID so a cluster keeps its colour across updates.
                 color_map = {"Unclustered": "#C0C0C0"}
-                for i, label in enumerate(unique_labels):
-                    color_map[label] = CLUSTER_PALETTE[i % len(CLUSTER_PALETTE)]
+                for cluster_id in sorted(clustered["Cluster"].unique()):
+                    color_map[f"Cluster {cluster_id + 1}"] = CLUSTER_PALETTE[cluster_id % len(CLUSTER_PALETTE)]
 
                 center_lat = map_data["Latitude"].mean()
                 center_lon = map_data["Longitude"].mean()
@@ -448,9 +402,9 @@ with main:
                     },
                     zoom=zoom,
                     center={"lat": center_lat, "lon": center_lon},
-                    mapbox_style="carto-positron",
                     opacity=0.85,
                 )
+                fig_map.update_layout(**plotly_offline_basemap())
                 fig_map.update_layout(
                     height=520,
                     margin=dict(l=0, r=0, t=0, b=0),
@@ -474,23 +428,27 @@ with main:
                     config=PLOTLY_CLEAN,
                 )
 
+                cluster_groups = clustered.groupby("Cluster")
                 cluster_summary = (
-                    clustered.groupby("Cluster", as_index=False)
-                    .agg(
-                        Sites=("Site_Code", "count"),
-                        States=("State", lambda x: ", ".join(sorted(x.unique()))),
-                        Site_Codes=("Site_Code", lambda x: ", ".join(sorted(x))),
+                    pd.concat(
+                        [
+                            cluster_groups["Site_Code"].count().rename("Sites"),
+                            unique_join(clustered, "Cluster", "State").rename("States"),
+                            unique_join(clustered, "Cluster", "Site_Code").rename("Site_Codes"),
+                        ],
+                        axis=1,
+                    )
+                    .join(cluster_groups.agg(
                         Total_Devices=("Device_Count", "sum"),
                         Critical_Devices=("Critical", "sum"),
                         High_Risk_Devices=("High", "sum"),
                         Total_Replacement_Cost=("Total_Cost", "sum"),
                         Avg_Risk_Score=("Risk_Score_Sum", "mean"),
-                    )
+                    ))
+                    .reset_index()
                     .sort_values("Total_Replacement_Cost", ascending=False)
                 )
-                cluster_summary["Cluster"] = cluster_summary["Cluster"].apply(
-                    lambda x: f"Cluster {x + 1}"
-                )
+                cluster_summary["Cluster"] = "Cluster " + (cluster_summary["Cluster"] + 1).astype(str)
                 cluster_summary["Avg_Risk_Score"] = cluster_summary["Avg_Risk_Score"].round(1)
 
                 render_table_with_download(
@@ -541,22 +499,72 @@ with main:
                 st.info("No county data available for the current selection.")
             else:
                 county_agg = (
-                    county_data.groupby(
-                        ["PhysicalAddressCounty", "State"], as_index=False
-                    )
+                    add_indicators(county_data, "Risk_Level", {"High_Risk": HIGH_RISK_LEVELS})
+                    .groupby(["PhysicalAddressCounty", "State"], as_index=False)
                     .agg(
                         Total_Devices=("Hostname", "size"),
-                        High_Risk_Devices=(
-                            "Risk_Level",
-                            lambda x: x.isin(
-                                ["Critical (Past EoL)", "High (Near EoL)"]
-                            ).sum(),
-                        ),
+                        High_Risk_Devices=("High_Risk", "sum"),
                         Total_Replacement_Cost=("Total_Replacement_Cost", "sum"),
                     )
                     .sort_values("Total_Replacement_Cost", ascending=False)
                 )
 
+                # ── County choropleth ─────────────────────────────────────
+                # Boundaries come from the bundled, pre-simplified county file the
+                # browser caches; each rerun ships only one value per county.
+                choropleth_metrics = {
+                    "Replacement Cost": ("Total_Replacement_Cost", fmt_currency),
+                    "High-Risk Devices": ("High_Risk_Devices", lambda v: f"{v:,.0f}"),
+                    "Total Devices": ("Total_Devices", lambda v: f"{v:,.0f}"),
+                }
+                metric_label = st.radio(
+                    "Shade counties by",
+                    list(choropleth_metrics),
+                    horizontal=True,
+                    key="geo_county_choropleth_metric",
+                )
+                metric_col, metric_fmt = choropleth_metrics[metric_label]
+                county_values, unmatched_counties = align_to_counties(
+                    county_agg, "PhysicalAddressCounty", "State",
+                    ["Total_Devices", "High_Risk_Devices", "Total_Replacement_Cost"],
+                )
+                county_layer = map_layer(
+                    "county-choropleth", "GeoJsonLayer",
+                    f"{dataset_version(county_agg)}:{metric_col}",
+                    attributes={
+                        "getFillColor": choropleth_colors(county_values[metric_col].to_numpy()),
+                    },
+                    fields={
+                        "devices": county_values["Total_Devices"].to_numpy(dtype=np.uint32),
+                        "high": county_values["High_Risk_Devices"].to_numpy(dtype=np.uint32),
+                        "cost": county_values["Total_Replacement_Cost"].to_numpy(dtype=np.float32),
+                    },
+                    tooltip=(
+                        "<b>{NAME}, {STUSPS}</b><br/>Devices: {devices}<br/>"
+                        "High-Risk: {high}<br/>Replacement Cost: {cost:$}"
+                    ),
+                    props={
+                        "stroked": True, "filled": True, "pickable": True,
+                        "getLineColor": [255, 255, 255, 120], "lineWidthMinPixels": 0.3,
+                        "autoHighlight": True, "highlightColor": [26, 31, 46, 60],
+                    },
+                    data_url=asset_url("us_counties"),
+                )
+                deck_map(
+                    [county_layer],
+                    {"latitude": 38.5, "longitude": -96.0, "zoom": 3.4, "pitch": 0, "bearing": 0},
+                    key="geo_county_map",
+                    legend=choropleth_legend(
+                        metric_label, county_values[metric_col].to_numpy(), metric_fmt
+                    ),
+                    height=480,
+                )
+                if unmatched_counties:
+                    st.caption(
+                        f"{unmatched_counties:,} county name(s) in the data could not be matched "
+                        "to a US county boundary and are not shaded."
+                    )
+
                 left_c, right_c = st.columns(2)
 
                 with left_c:
@@ -633,3 +641,159 @@ with main:
                     )
         else:
             st.info("County data column not found in dataset.")
+
+        # ── Hotspot Analysis (Getis-Ord Gi*) ─────────────────────────────
+        section_divider()
+        st.subheader("Statistical Hotspot Analysis (Getis-Ord Gi*)")
+        st.caption(
+            "Sites or counties whose neighbourhood concentrates significantly more (hot) or "
+            "less (cold) at-risk value than the fleet as a whole, within the chosen distance band."
+        )
+
+        hotspot_metrics = {
+            "High-Risk Replacement Cost": "High_Risk_Cost",
+            "High-Risk Devices": "High_Risk_Devices",
+            "Total Replacement Cost": "Total_Replacement_Cost",
+        }
+        hs_unit_col, hs_metric_col, hs_band_col = st.columns(3)
+        with hs_unit_col:
+            hotspot_unit = st.radio(
+                "Analyse by", ["Site", "County"], horizontal=True, key="geo_hotspot_unit",
+            )
+        with hs_metric_col:
+            hotspot_metric = st.selectbox(
+                "Value", list(hotspot_metrics), key="geo_hotspot_metric",
+            )
+        hotspot_bands = [10, 25, 50, 100, 200]
+        with hs_band_col:
+            hotspot_band = st.select_slider(
+                "Neighbour distance band",
+                options=hotspot_bands,
+                value=50,
+                format_func=lambda x: f"{x} mi",
+                key="geo_hotspot_band",
+            )
+
+        hotspot_keys = ["Site_Code"] if hotspot_unit == "Site" else ["PhysicalAddressCounty", "State"]
+        hotspot_points = df_filtered[coord_located].dropna(subset=hotspot_keys)
+        if hotspot_points.empty:
+            st.info("No located sites or counties for the current selection.")
+        else:
+            hotspot_points = add_indicators(hotspot_points, "Risk_Level", {"High_Risk_Devices": HIGH_RISK_LEVELS})
+            hotspot_points = hotspot_points.assign(
+                High_Risk_Cost=hotspot_points["Total_Replacement_Cost"] * hotspot_points["High_Risk_Devices"]
+            )
+            hotspot_units = hotspot_points.groupby(hotspot_keys, as_index=False).agg(
+                **({"State": ("State", "first")} if hotspot_unit == "Site" else {}),
+                Latitude=("Latitude", "mean"),
+                Longitude=("Longitude", "mean"),
+                Total_Devices=("Hostname", "size"),
+                High_Risk_Devices=("High_Risk_Devices", "sum"),
+                High_Risk_Cost=("High_Risk_Cost", "sum"),
+                Total_Replacement_Cost=("Total_Replacement_Cost", "sum"),
+            )
+            hotspot_col = hotspot_metrics[hotspot_metric]
+            hotspot_version = dataset_version(hotspot_units)
+            # Wide bands over many units hold too many pairs to build; fall back to the widest that fits.
+            band_pairs = band_pair_estimates(hotspot_version, tuple(hotspot_bands), hotspot_units)
+            fitting = [b for b in hotspot_bands if band_pairs[b] <= MAX_BAND_PAIRS] or hotspot_bands[:1]
+            if hotspot_band > fitting[-1]:
+                st.warning(
+                    f"A {hotspot_band} mi band over {len(hotspot_units):,} "
+                    f"{'sites' if hotspot_unit == 'Site' else 'counties'} would "
+                    f"hold about {band_pairs[hotspot_band] / 1e6:,.0f}M neighbour pairs; showing the "
+                    f"{fitting[-1]} mi band instead. Narrow the filters to use wider bands."
+                )
+                hotspot_band = fitting[-1]
+            hotspots = hotspot_analysis(
+                hotspot_version, float(hotspot_band), hotspot_col, hotspot_units
+            )
+            counts = hotspot_summary(hotspots)
+            n_hot = sum(v for k, v in counts.items() if k.startswith("Hot"))
+            n_cold = sum(v for k, v in counts.items() if k.startswith("Cold"))
+
+            h1, h2, h3, h4 = st.columns(4)
+            h1.metric(
+                "Sites Analysed" if hotspot_unit == "Site" else "Counties Analysed",
+                f"{len(hotspots):,}",
+            )
+            h2.metric("Hot Spots (90%+)", f"{n_hot:,}")
+            h3.metric("Hot Spots (99%)", f"{counts['Hot Spot (99%)']:,}")
+            h4.metric("Cold Spots (90%+)", f"{n_cold:,}")
+
+            hotspot_label = "Site_Code" if hotspot_unit == "Site" else "PhysicalAddressCounty"
+            fig_hot = px.scatter_mapbox(
+                hotspots.sort_values("Gi_Z_Score"),
+                lat="Latitude",
+                lon="Longitude",
+                color="Hotspot",
+                color_discrete_map=HOTSPOT_COLORS,
+                category_orders={"Hotspot": HOTSPOT_ORDER},
+                hover_name=hotspot_label,
+                hover_data={
+                    "State": True,
+                    hotspot_col: ":,.0f",
+                    "Gi_Z_Score": ":.2f",
+                    "Neighbors": True,
+                    "Latitude": False,
+                    "Longitude": False,
+                },
+                zoom=3.2,
+                center={"lat": 38.5, "lon": -96.0},
+                opacity=0.85,
+            )
+            fig_hot.update_traces(marker=dict(size=8))
+            fig_hot.update_layout(**plotly_offline_basemap())
+            fig_hot.update_layout(
+                height=480,
+                margin=dict(l=0, r=0, t=0, b=0),
+                paper_bgcolor="rgba(0,0,0,0)",
+                font=dict(family="Inter, sans-serif"),
+                legend=dict(
+                    title="Gi* Result",
+                    yanchor="top", y=0.98,
+                    xanchor="left", x=0.01,
+                    bgcolor="rgba(255,255,255,0.92)",
+                    bordercolor="#E0E6E3",
+                    borderwidth=1,
+                ),
+            )
+            render_plotly_with_download(
+                fig_hot,
+                "getis_ord_hotspot_map",
+                "geo_risk_hotspot_map",
+                use_container_width=True,
+                config=PLOTLY_CLEAN,
+            )
+
+            significant = hotspots[hotspots["Hotspot"] != NOT_SIGNIFICANT].sort_values(
+                "Gi_Z_Score", ascending=False
+            )
+            hotspot_table_cols = hotspot_keys + (["State"] if hotspot_unit == "Site" else []) + [
+                "Total_Devices", "High_Risk_Devices", "High_Risk_Cost",
+                "Neighbors", "Gi_Z_Score", "Gi_P_Value", "Hotspot",
+            ]
+            render_table_with_download(
+                significant[hotspot_table_cols],
+                "getis_ord_hotspot_results",
+                "geo_risk_hotspot_results",
+                export_df=hotspots[hotspot_table_cols + ["Latitude", "Longitude"]],
+                use_container_width=True,
+                hide_index=True,
+                height=360,
+                column_config={
+                    "Site_Code": st.column_config.TextColumn("Site Code"),
+                    "PhysicalAddressCounty": st.column_config.TextColumn("County"),
+                    "Total_Devices": st.column_config.NumberColumn("Devices"),
+                    "High_Risk_Devices": st.column_config.NumberColumn("High-Risk"),
+                    "High_Risk_Cost": st.column_config.NumberColumn(
+                        "High-Risk Cost", format="$ %.0f"
+                    ),
+                    "Neighbors": st.column_config.NumberColumn("Neighbours"),
+                    "Gi_Z_Score": st.column_config.NumberColumn("Gi* z", format="%.2f"),
+                    "Gi_P_Value": st.column_config.NumberColumn("p-value", format="%.4f"),
+                },
+            )
+            st.caption(
+                "The table lists significant units only; the download includes every unit analysed."
+            )
@@ -1,3 +1,4 @@
+import datetime
 import os
 import sys
 
@@ -6,9 +7,11 @@ import plotly.express as px
 import streamlit as st
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from src.data_loader import load_data, apply_global_filters
+from src.data_loader import load_data, apply_global_filters, dataset_version
 from src.dashboard_chatbot import render_dashboard_chatbot
 from src.download_utils import render_plotly_with_download, render_table_with_download
+from src.lifecycle import as_of_date, snapshot_date
+from src.milestone_index import INDEX_COLUMNS, MILESTONE_LABELS, milestone_index
 from src.theme import (
     inject_theme_css, page_header, section_divider, fmt_currency,
     COLORS, RISK_COLOR_MAP, RISK_ORDER, PLOTLY_LAYOUT, PLOTLY_CLEAN,
@@ -146,3 +149,117 @@ with main:
         export_df=critical_table,
         use_container_width=True, hide_index=True,
     )
+
+    # ── Lifecycle milestone calendar ─────────────────────────────────────
+    section_divider()
+    st.subheader("Lifecycle Milestone Calendar")
+    st.caption(
+        "Models and devices reaching their ModelData End of Support, End of Life or (where the "
+        "sheet has the column) Last Day of Support dates in a date range, by quarter, for "
+        "SmartNet renewal planning."
+    )
+
+    index_df = df[INDEX_COLUMNS].reset_index(drop=True)
+    index = milestone_index(dataset_version(index_df), index_df)
+    if index.estimated_devices:
+        st.info(
+            f"ModelData lists no vendor EoL date for {index.estimated_models:,} model(s) "
+            f"({index.estimated_devices:,} of {len(index_df):,} devices). Their EoL dates are "
+            "estimated per device from EoL_Year and Days_Past_EoL, so the calendar shows those "
+            "devices on estimated dates rather than one milestone per model, and End of Support "
+            "appears only where ModelData gives a date."
+        )
+    window_start = as_of_date() or snapshot_date(df).astype(datetime.date)
+    window_end = (pd.Timestamp(window_start) + pd.DateOffset(years=2, days=-1)).date()
+
+    col_range, col_kinds = st.columns([1, 1])
+    with col_range:
+        window = st.date_input(
+            "Milestone Window",
+            value=(window_start, window_end),
+            min_value=datetime.date(2000, 1, 1),
+            max_value=datetime.date(2045, 12, 31),
+            key="lifecycle_milestone_window",
+        )
+    with col_kinds:
+        milestones = st.multiselect(
+            "Milestones",
+            options=index.milestones,
+            default=index.milestones,
+            format_func=lambda m: MILESTONE_LABELS[m],
+            key="lifecycle_milestone_kinds",
+        )
+
+    if len(window) != 2:
+        st.info("Pick both a start and an end date.")
+    elif not milestones:
+        st.info("Select at least one milestone.")
+    else:
+        start, end = window
+        events = index.query(start, end, milestones)
+        rows = index.device_rows(start, end, milestones)
+        calendar = index.calendar(start, end, milestones)
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Models Hitting a Milestone", f"{events['Model'].nunique():,}")
+        m2.metric("Devices Affected", f"{len(rows):,}")
+        m3.metric("Exposure", fmt_currency(lifecycle_df["Total_Replacement_Cost"].iloc[rows].sum()))
+
+        calendar["Milestone"] = calendar["Milestone"].map(MILESTONE_LABELS)
+        fig_calendar = px.bar(
+            calendar, x="Quarter", y="Devices", color="Milestone",
+            barmode="group", custom_data=["Exposure", "Models"],
+            color_discrete_map={
+                MILESTONE_LABELS["EoS"]: COLORS["gold"],
+                MILESTONE_LABELS["EoL"]: COLORS["crimson"],
+                MILESTONE_LABELS["LDoS"]: COLORS["purple"],
+            },
+        )
+        fig_calendar.update_traces(
+            marker_line_width=0,
+            hovertemplate="%{x}<br>%{y:,} devices · %{customdata[1]} models<br>"
+                          "Exposure $%{customdata[0]:,.0f}<extra></extra>",
+        )
+        fig_calendar.update_layout(
+            **PLOTLY_LAYOUT,
+            xaxis_title=None, yaxis_title="Devices Reaching Milestone",
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        )
+        render_plotly_with_download(
+            fig_calendar,
+            "lifecycle_milestone_calendar",
+            "lifecycle_asset_health_milestone_calendar",
+            use_container_width=True,
+            config=PLOTLY_CLEAN,
+        )
+
+        tab_calendar, tab_models, tab_devices = st.tabs(["Quarterly Calendar", "Model Milestones", "Devices"])
+        with tab_calendar:
+            calendar_table = calendar[calendar["Devices"] > 0]
+            render_table_with_download(
+                calendar_table.style.format({"Exposure": "${:,.0f}"}),
+                "lifecycle_milestone_calendar",
+                "lifecycle_asset_health_milestone_calendar_table",
+                export_df=calendar_table,
+                use_container_width=True, hide_index=True,
+            )
+        with tab_models:
+            events["Milestone"] = events["Milestone"].map(MILESTONE_LABELS)
+            render_table_with_download(
+                events.style.format({"Date": "{:%Y-%m-%d}", "Exposure": "${:,.0f}"}),
+                "lifecycle_model_milestones",
+                "lifecycle_asset_health_model_milestones",
+                export_df=events,
+                use_container_width=True, hide_index=True,
+            )
+        with tab_devices:
+            device_table = lifecycle_df.iloc[rows][
+                ["Hostname", "Model", "State", "Device Type", "Risk_Level", "EoL_Year", "Total_Replacement_Cost"]
+            ]
+            render_table_with_download(
+                device_table.style.format({"Total_Replacement_Cost": "${:,.0f}"}),
+                "lifecycle_milestone_devices",
+                "lifecycle_asset_health_milestone_devices",
+                export_df=device_table,
+                use_container_width=True, hide_index=True,
+            )
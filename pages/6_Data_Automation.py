@@ -7,6 +7,11 @@ import time
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from src.theme import inject_theme_css, page_header, section_divider, COLORS
 from src.dashboard_chatbot import render_dashboard_chatbot
+from src.data_loader import load_data
+from src.download_utils import render_table_with_download
+from src.geo_boundaries import (
+    COORD_MISSING, COORD_OUTSIDE_STATE, COORD_STATUS_COLUMNS, COORD_UNKNOWN_STATE, COORD_VERIFIED,
+)
 
 st.set_page_config(page_title="Data Entry & ETL", page_icon="⚙️", layout="wide")
 inject_theme_css()
@@ -181,3 +186,49 @@ with main:
         if os.path.exists(master_fallback_path):
             sample_df = pd.read_csv(master_fallback_path, nrows=10)
             st.dataframe(sample_df, use_container_width=True)
+
+    # ─── COORDINATE VERIFICATION ──────────────────────────────────────
+    section_divider()
+    st.subheader("Coordinate Verification")
+    st.markdown(
+        "Each device's latitude/longitude is checked against the boundary of its recorded "
+        "State when the dataset is loaded. Points within the boundary files' simplification "
+        "tolerance of the state line pass. Devices that fall outside their state stay on the "
+        "geographic maps and in the analytics, and are listed here for correction."
+    )
+    active_df = load_data(os.path.join(os.path.dirname(__file__), "..", "dataset", "dashboard_master_data.csv"))
+    if all(col in active_df.columns for col in COORD_STATUS_COLUMNS):
+        coord_check = active_df[COORD_STATUS_COLUMNS]
+        status_counts = coord_check["Coord_Status"].value_counts()
+
+        v1, v2, v3, v4 = st.columns(4)
+        v1.metric("Verified", f"{status_counts.get(COORD_VERIFIED, 0):,}")
+        v2.metric("Outside Recorded State", f"{status_counts.get(COORD_OUTSIDE_STATE, 0):,}")
+        v3.metric("Missing Coordinates", f"{status_counts.get(COORD_MISSING, 0):,}")
+        v4.metric("Unrecognized State", f"{status_counts.get(COORD_UNKNOWN_STATE, 0):,}")
+
+        flagged = coord_check["Coord_Status"].isin([COORD_OUTSIDE_STATE, COORD_UNKNOWN_STATE])
+        if flagged.any():
+            detail_cols = [
+                col for col in ["Hostname", "Site_Code", "City", "State", "Latitude", "Longitude"]
+                if col in active_df.columns
+            ]
+            flagged_df = active_df.loc[flagged, detail_cols].join(coord_check.loc[flagged])
+            render_table_with_download(
+                flagged_df,
+                "coordinate_verification_flagged_devices",
+                "data_entry_coordinate_flags",
+                export_df=flagged_df,
+                use_container_width=True,
+                hide_index=True,
+                height=320,
+                column_config={
+                    "Site_Code": st.column_config.TextColumn("Site Code"),
+                    "Coord_Status": st.column_config.TextColumn("Check Result"),
+                    "Located_State": st.column_config.TextColumn("Coordinates Fall In"),
+                },
+            )
+        else:
+            st.success("✅ All located devices fall inside their recorded state.")
+    else:
+        st.info("The active dataset has no State/Latitude/Longitude columns to verify.")
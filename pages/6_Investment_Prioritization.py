@@ -1,24 +1,49 @@
-import json
 import os
 import sys
 
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from src.data_loader import load_data, apply_global_filters
+from src.aggregations import HIGH_RISK_LEVELS
+from src.capex_optimizer import METHODS, optimize_budget
+from src.data_loader import load_data, apply_global_filters, dataset_version, subset_version
 from src.download_utils import render_plotly_with_download, render_table_with_download
+from src.exception_rules import (
+    CATEGORICAL_OPS, NUMERIC_OPS, NUMERIC_RULE_COLUMNS, RULE_COLUMNS, TEXT_OPS,
+    compile_rules, describe_rule, is_active, rules_mask,
+)
+from src.exception_store import (
+    add_exceptions, add_rule, audit_log, excepted_hostnames, list_exceptions, list_rules,
+    remove_exceptions, remove_rules,
+)
+from src.hostname_search import MATCH_LIMIT, hostname_index
+from src.labor import SOURCE_DEFAULT, SOURCE_MODEL, SOURCE_PRICING, device_labor, source_shares
+from src.priority_ledger import PriorityLedger
+from src.proximity_clusters import ProximityClusterIndex
+from src.risk_scoring import (
+    DEFAULT_WEIGHTS, FEATURE_LABELS, FEATURES, SCORING_COLUMNS, risk_features, score_features, weighted_version,
+)
+from src.site_bundles import (
+    DEFAULT_MARGINAL_LABOR_SHARE, DEFAULT_VISIT_COST, bundle_totals, bundles_within, price_bundles,
+)
+from src.spend_frontier import (
+    METRIC_ALL, METRIC_CRITICAL, budget_for, sample_curve, spend_frontier, value_at,
+)
 from src.theme import (
     inject_theme_css, page_header, section_divider, fmt_currency,
     COLORS, PLOTLY_LAYOUT, PLOTLY_CLEAN,
 )
+from src.wave_scheduler import (
+    DEFAULT_CREW_HOURS_PER_QUARTER, DEFAULT_CREWS_PER_STATE, WaveSchedule, site_packages, wave_label,
+)
 
 st.set_page_config(page_title="Investment Prioritization", page_icon="🎯", layout="wide")
 inject_theme_css()
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "dashboard_master_data.csv")
-EXCEPTIONS_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "exceptions.json")
 
 REQUIRED_COLS = [
     "Hostname", "State", "Site_Code", "Risk_Level",
@@ -35,32 +60,6 @@ EXCEPTION_REASONS = [
 ]
 
 
-def load_exceptions():
-    if os.path.exists(EXCEPTIONS_PATH):
-        try:
-            with open(EXCEPTIONS_PATH) as f:
-                return json.load(f)
-        except (json.JSONDecodeError, ValueError):
-            return {}
-    return {}
-
-
-def save_exceptions(exc):
-    with open(EXCEPTIONS_PATH, "w") as f:
-        json.dump(exc, f, indent=2)
-
-
-all_df = apply_global_filters(load_data(DATA_PATH))[REQUIRED_COLS].copy()
-all_df["Total_Replacement_Cost"] = pd.to_numeric(all_df["Total_Replacement_Cost"], errors="coerce").fillna(0)
-all_df["Risk_Score"] = pd.to_numeric(all_df["Risk_Score"], errors="coerce").fillna(0)
-all_df["Is_Decom"] = all_df["Is_Decom"].astype(bool)
-all_df = all_df[(~all_df["Is_Decom"]) & (all_df["Risk_Score"] > 0)].copy()
-
-exceptions = load_exceptions()
-excepted_hosts = set(exceptions.keys())
-n_excepted = int(all_df["Hostname"].isin(excepted_hosts).sum())
-df = all_df[~all_df["Hostname"].isin(excepted_hosts)].copy()
-
 page_header(
     "Investment Prioritization & Risk Reduction",
     subtitle="Data-driven replacement roadmap based on risk severity, support status, and cost.",
@@ -68,13 +67,66 @@ page_header(
 )
 st.markdown("---")
 
+# ── Risk Scoring Weights ─────────────────────────────────────────────────────
+with st.expander("Risk Scoring Weights"):
+    st.caption(
+        "By default devices are ranked by the Risk Score supplied with the dataset. "
+        "Rescore them here from days past EoL, support status, device type criticality, "
+        "replacement cost and the decommission flag; every ranking on this page follows."
+    )
+    custom_scoring = st.toggle("Rescore devices with custom weights", key="risk_custom_weights")
+    weight_cols = st.columns(len(FEATURES))
+    risk_weights = {
+        feature: col.slider(
+            FEATURE_LABELS[feature], min_value=-100.0, max_value=100.0,
+            value=DEFAULT_WEIGHTS[feature], step=5.0, key=f"risk_weight_{feature}",
+            disabled=not custom_scoring,
+        )
+        for feature, col in zip(FEATURES, weight_cols)
+    }
+    st.caption(
+        "Each feature is scaled to 0-1 before weighting and scores are clipped to 0-100. "
+        "Devices already flagged for decommission are out of scope on this page."
+    )
+
+source_df = apply_global_filters(load_data(DATA_PATH))
+rule_source_cols = [c for c in RULE_COLUMNS if c in source_df.columns and c not in REQUIRED_COLS]
+coord_cols = [c for c in ["Latitude", "Longitude"] if c in source_df.columns]
+scoring_cols = [
+    c for c in SCORING_COLUMNS if c in source_df.columns and c not in REQUIRED_COLS + rule_source_cols
+]
+all_df = source_df[REQUIRED_COLS + rule_source_cols + coord_cols + scoring_cols].copy()
+all_df["Total_Replacement_Cost"] = pd.to_numeric(all_df["Total_Replacement_Cost"], errors="coerce").fillna(0)
+all_df["Risk_Score"] = pd.to_numeric(all_df["Risk_Score"], errors="coerce").fillna(0)
+all_df["Is_Decom"] = all_df["Is_Decom"].astype(bool)
+# Sites with any decommissioned device, flagged before decom rows are dropped.
+all_df["Decom_Site"] = all_df.groupby("Site_Code")["Is_Decom"].transform("any").astype(bool)
+all_df = all_df[(~all_df["Is_Decom"]) & (all_df["Risk_Score"] > 0)].reset_index(drop=True)
+rule_columns = [c for c in RULE_COLUMNS if c in all_df.columns and c != "Is_Decom"]
+
+base_version = dataset_version(all_df)
+fleet_version = base_version
+if custom_scoring:
+    # Scope stays the devices the dataset flags as at risk; the weights only re-score them.
+    all_df["Risk_Score"] = score_features(risk_features(base_version, all_df), risk_weights)
+    fleet_version = weighted_version(base_version, risk_weights)
+exception_rules = list_rules()
+excepted_hosts = excepted_hostnames()
+host_excluded = all_df["Hostname"].isin(excepted_hosts).to_numpy()
+rule_excluded, rule_matches = rules_mask(fleet_version, all_df, exception_rules)
+excluded = host_excluded | rule_excluded
+n_excepted = int(excluded.sum())
+df = all_df[~excluded].copy()
+scope_version = subset_version(fleet_version, excluded)
+
 if n_excepted > 0:
     st.markdown(
         f"<div style='background: #FFF3CD; border: 1px solid #FFEEBA; border-radius: 8px; "
         f"padding: 10px 16px; font-family: Inter, sans-serif; font-size: 14px; "
         f"color: #856404; margin-bottom: 16px;'>"
-        f"&#9432; <b>{n_excepted}</b> device(s) excluded from scope via "
-        f"Exception Management below.</div>",
+        f"&#9432; <b>{n_excepted:,}</b> device(s) excluded from scope via "
+        f"Exception Management below ({int(host_excluded.sum()):,} by hostname, "
+        f"{int(rule_excluded.sum()):,} by rule).</div>",
         unsafe_allow_html=True,
     )
 
@@ -87,26 +139,86 @@ budget = st.slider(
     format="$%d",
 )
 
-priority_df = df.sort_values("Risk_Score", ascending=False).reset_index(drop=True)
-priority_df["Cumulative_Cost"] = priority_df["Total_Replacement_Cost"].cumsum()
+SELECTION_RANKING = "Risk ranking"
+SELECTION_OPTIMIZED = "Optimized (max risk reduction)"
+selection_mode = st.radio(
+    "Selection mode",
+    [SELECTION_RANKING, SELECTION_OPTIMIZED],
+    horizontal=True,
+    key="investment_selection_mode",
+    help=(
+        "Risk ranking replaces devices in descending Risk Score until the budget runs out. "
+        "Optimized picks the set of devices with the largest total Risk Score that fits the budget."
+    ),
+)
+if selection_mode == SELECTION_OPTIMIZED:
+    o1, o2 = st.columns(2)
+    optimizer_method = o1.selectbox(
+        "Solver", METHODS, key="investment_optimizer_method",
+        help=(
+            "Bucketed DP rounds costs to a grid, so it is approximate; it also runs the ratio "
+            "greedy and keeps whichever selection retires more risk."
+        ),
+    )
+    bundle_sites = o2.checkbox(
+        "Replace whole sites together", key="investment_bundle_sites",
+        help="Only select sites as a unit: every in-scope device at a chosen site is replaced.",
+    )
 
-devices_in_budget = int((priority_df["Cumulative_Cost"] <= budget).sum())
-total_devices = len(priority_df)
+# Ranked once per fleet version; exception edits only touch the devices that changed.
+ledger = st.session_state.get("_investment_priority_ledger")
+if ledger is None or ledger.version != fleet_version:
+    ledger = PriorityLedger(fleet_version, all_df)
+    st.session_state["_investment_priority_ledger"] = ledger
+ledger.sync(excluded)
+
+optimized = selection_mode == SELECTION_OPTIMIZED
+if optimized:
+    plan = optimize_budget(
+        scope_version, float(budget), optimizer_method, bundle_sites, _fleet=df
+    )
+    selected_rows = df.index.to_numpy()[plan["rows"]]
+    devices_in_budget, actual_spend = len(selected_rows), plan["cost"]
+else:
+    devices_in_budget, actual_spend = ledger.fit(budget)
+    selected_rows = ledger.top_rows(devices_in_budget)
+total_devices = ledger.in_scope
 pct_cleared = (devices_in_budget / total_devices * 100) if total_devices > 0 else 0
 
-k1, k2, k3 = st.columns(3)
+if optimized:
+    k1, k2, k3, k4 = st.columns(4)
+    gain = plan["risk"] - plan["baseline_risk"]
+    k4.metric(
+        "Risk Score Retired",
+        f"{plan['risk']:,.0f}",
+        delta=(
+            f"{gain / plan['baseline_risk'] * 100:+.1f}% vs ranking" if plan["baseline_risk"] > 0
+            else f"{gain:+,.0f} vs ranking"
+        ),
+    )
+else:
+    k1, k2, k3 = st.columns(3)
 k1.metric("Selected Budget", fmt_currency(budget))
 k2.metric("Devices Fully Replaced", f"{devices_in_budget:,} / {total_devices:,}")
 k3.metric("Critical Debt Cleared", f"{pct_cleared:.1f}%")
 
 if devices_in_budget > 0:
-    actual_spend = priority_df.loc[: devices_in_budget - 1, "Total_Replacement_Cost"].sum()
-    summary_text = (
-        f"With a budget of <b>{fmt_currency(budget)}</b>, you can fully replace the top "
-        f"<b>{devices_in_budget:,}</b> highest-risk devices (actual cost "
-        f"<b>{fmt_currency(actual_spend)}</b>), completely clearing "
-        f"<b>{pct_cleared:.1f}%</b> of critical technical debt."
-    )
+    if optimized:
+        summary_text = (
+            f"With a budget of <b>{fmt_currency(budget)}</b>, the optimizer ({plan['method']}) "
+            f"replaces <b>{devices_in_budget:,}</b> devices (actual cost "
+            f"<b>{fmt_currency(actual_spend)}</b>), retiring <b>{plan['risk']:,.0f}</b> risk points "
+            f"against <b>{plan['baseline_risk']:,.0f}</b> for the top "
+            f"<b>{len(plan['baseline_rows']):,}</b> devices in the risk ranking, and clearing "
+            f"<b>{pct_cleared:.1f}%</b> of critical technical debt."
+        )
+    else:
+        summary_text = (
+            f"With a budget of <b>{fmt_currency(budget)}</b>, you can fully replace the top "
+            f"<b>{devices_in_budget:,}</b> highest-risk devices (actual cost "
+            f"<b>{fmt_currency(actual_spend)}</b>), completely clearing "
+            f"<b>{pct_cleared:.1f}%</b> of critical technical debt."
+        )
     st.markdown(
         f"<div style='background:#d4edda; border:1px solid #b7dfb9; border-radius:8px; "
         f"padding:14px 18px; font-family:Inter,sans-serif; font-size:15px; "
@@ -121,6 +233,72 @@ else:
 
 section_divider()
 
+# ── Spend vs Risk Frontier ───────────────────────────────────────────────────
+st.subheader("Spend vs Risk Frontier")
+st.caption(
+    "Share of risk retired as spend grows, for the risk ranking and for the efficient "
+    "order: risk retired by funding devices in efficiency order (highest risk per dollar "
+    "first). Computed once per dataset and exception set."
+)
+
+frontier = spend_frontier(scope_version, df)
+fr_left, fr_right = st.columns(2)
+frontier_measure = fr_left.radio(
+    "Risk measure", ["All devices", "Critical devices only"],
+    horizontal=True, key="investment_frontier_measure",
+)
+target_pct = fr_right.slider(
+    "Target share of risk cleared", min_value=5, max_value=100, value=80, step=5,
+    format="%d%%", key="investment_frontier_target",
+)
+metric = METRIC_ALL if frontier_measure == "All devices" else METRIC_CRITICAL
+ranking_curve = frontier["ranking"]
+efficient_curve = frontier[f"efficient_{metric}"]
+total_risk = float(ranking_curve[metric][-1])
+
+if total_risk <= 0:
+    st.info("No in-scope risk to retire for the selected measure.")
+else:
+    target = total_risk * target_pct / 100
+    ranking_budget = budget_for(ranking_curve, metric, target)
+    efficient_budget = budget_for(efficient_curve, metric, target)
+    f1, f2, f3, f4 = st.columns(4)
+    f1.metric("Cleared at Budget (Ranking)", f"{value_at(ranking_curve, metric, budget) / total_risk * 100:.1f}%")
+    f2.metric("Cleared at Budget (Efficient)", f"{value_at(efficient_curve, metric, budget) / total_risk * 100:.1f}%")
+    f3.metric(f"Budget for {target_pct}% (Ranking)", fmt_currency(ranking_budget) if ranking_budget is not None else "—")
+    f4.metric(f"Budget for {target_pct}% (Efficient)", fmt_currency(efficient_budget) if efficient_budget is not None else "—")
+
+    fig_frontier = go.Figure()
+    for name, curve, color in (
+        ("Efficient order", efficient_curve, COLORS["emerald"]),
+        ("Risk ranking", ranking_curve, COLORS["crimson"]),
+    ):
+        sampled = sample_curve(curve, metric)
+        fig_frontier.add_trace(go.Scatter(
+            x=sampled["Spend"], y=sampled["Value"] / total_risk * 100,
+            mode="lines", name=name, line=dict(color=color, width=3),
+            hovertemplate="$%{x:,.0f}<br>%{y:.1f}% of risk<extra>" + name + "</extra>",
+        ))
+    fig_frontier.add_vline(x=budget, line_dash="dot", line_color=COLORS["muted"],
+                           annotation_text=f"Budget {fmt_currency(budget)}", annotation_position="top")
+    fig_frontier.add_hline(y=target_pct, line_dash="dot", line_color=COLORS["gold"])
+    fig_frontier.update_layout(
+        **PLOTLY_LAYOUT,
+        xaxis_title="Cumulative Spend ($)",
+        yaxis_title="Risk Cleared (%)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    fig_frontier.update_layout(height=420, yaxis_range=[0, 102])
+    render_plotly_with_download(
+        fig_frontier,
+        "spend_vs_risk_frontier",
+        "investment_spend_frontier",
+        use_container_width=True,
+        config=PLOTLY_CLEAN,
+    )
+
+section_divider()
+
 # ── Priority Ranking Table ───────────────────────────────────────────────────
 st.subheader("Priority Ranking — Top Devices Within Budget")
 
@@ -129,7 +307,7 @@ DISPLAY_COLS = [
     "Risk_Score", "Total_Replacement_Cost",
 ]
 
-table_df = priority_df.loc[priority_df["Cumulative_Cost"] <= budget, DISPLAY_COLS].head(100)
+table_df = all_df.iloc[selected_rows[:100]][DISPLAY_COLS]
 
 if table_df.empty:
     st.info("No devices fall within the selected budget.")
@@ -196,6 +374,216 @@ else:
 
 section_divider()
 
+# ── Site-Bundled Costing ─────────────────────────────────────────────────────
+st.subheader("Site-Bundled Replacement Costing")
+st.caption(
+    "Prices replacements per truck roll instead of per device: each bundle (a site, or a "
+    "proximity cluster of sites) pays one visit cost plus its hardware and a marginal share "
+    "of each device's labor. Bundles are ranked by risk retired per dollar."
+)
+
+scope_labor = device_labor(df)
+cost_sources = source_shares(scope_labor, "Labor_Cost_Source")
+labor_cost_note = (
+    f"Labor cost per device: workbook ModelData costs {cost_sources[SOURCE_MODEL]:.0%}, Pricing "
+    f"(via the replacement device) {cost_sources[SOURCE_PRICING]:.0%}, default hours x default rates "
+    f"{cost_sources[SOURCE_DEFAULT]:.0%} of in-scope devices."
+)
+if cost_sources[SOURCE_DEFAULT] > 0.5:
+    st.warning(f"⚠️ {labor_cost_note} Most models are not in the workbook, so bundle labor is an estimate.")
+else:
+    st.caption(labor_cost_note)
+bundle_left, bundle_right = st.columns([1, 2])
+with bundle_left:
+    bundle_by = st.radio(
+        "Bundle devices by", ["Site", "Proximity cluster"], horizontal=True, key="bundle_group_by",
+        disabled=len(coord_cols) < 2,
+    )
+    cluster_radius = None
+    if bundle_by == "Proximity cluster":
+        cluster_radius = st.slider("Cluster radius (miles)", 1, 50, 10, key="bundle_cluster_radius")
+    visit_cost = st.number_input(
+        "Fixed cost per site visit ($)", min_value=0.0, max_value=50_000.0,
+        value=DEFAULT_VISIT_COST, step=50.0, key="bundle_visit_cost",
+    )
+    labor_share = st.slider(
+        "Marginal labor share when bundled", min_value=0.0, max_value=1.0,
+        value=DEFAULT_MARGINAL_LABOR_SHARE, step=0.05, key="bundle_labor_share",
+        help="Share of each device's standalone labor still incurred when it is replaced with others at the same visit.",
+    )
+
+bundle_keys = df["Site_Code"].astype(str)
+if cluster_radius is not None:
+    site_coords = (
+        df.dropna(subset=coord_cols).groupby("Site_Code", as_index=False)[coord_cols].median()
+    )
+    bundle_indexes = st.session_state.setdefault("_investment_proximity_clusters", {})
+    if cluster_radius not in bundle_indexes:
+        bundle_indexes[cluster_radius] = ProximityClusterIndex(cluster_radius)
+    bundle_index = bundle_indexes[cluster_radius]
+    bundle_index.sync(site_coords)
+    site_cluster = pd.Series(bundle_index.labels(site_coords["Site_Code"]), index=site_coords["Site_Code"].astype(str))
+    device_cluster = bundle_keys.map(site_cluster).fillna(-1).astype(int)
+    bundle_keys = bundle_keys.where(device_cluster < 0, "Cluster " + device_cluster.astype(str))
+
+bundles = price_bundles(
+    bundle_totals(df.assign(Labor_Cost=scope_labor["Labor_Cost"]), bundle_keys), visit_cost, labor_share
+)
+
+if bundles.empty:
+    st.info("No in-scope devices to bundle.")
+else:
+    n_in_budget = bundles_within(bundles, budget)
+    bundled_in_budget = bundles.head(n_in_budget)
+    with bundle_right:
+        b1, b2, b3 = st.columns(3)
+        total_device_cost = bundles["Device_Cost"].sum()
+        b1.metric(
+            "Bundled Fleet Cost", fmt_currency(bundles["Bundle_Cost"].sum()),
+            delta=f"{-bundles['Savings'].sum() / max(total_device_cost, 1) * 100:+.1f}% vs per-device",
+            delta_color="inverse",
+        )
+        b2.metric(f"{bundle_by}s Within Budget", f"{n_in_budget:,} / {len(bundles):,}")
+        b3.metric(
+            "Devices Within Budget", f"{int(bundled_in_budget['Devices'].sum()):,}",
+            delta=f"{int(bundled_in_budget['Devices'].sum()) - devices_in_budget:+,} vs current selection",
+        )
+        top_bundles = bundles.head(15).iloc[::-1]
+        fig_bundles = px.bar(
+            top_bundles, x="Risk_per_1k", y="Bundle", orientation="h",
+            hover_data={"Devices": True, "Sites": True, "Bundle_Cost": ":$,.0f", "Savings": ":$,.0f"},
+            color_discrete_sequence=[COLORS["emerald"]],
+            labels={"Risk_per_1k": "Risk Score per $1,000", "Bundle": ""},
+        )
+        fig_bundles.update_layout(PLOTLY_LAYOUT)
+        fig_bundles.update_layout(height=380, showlegend=False, yaxis_type="category")
+        render_plotly_with_download(
+            fig_bundles,
+            "top_bundles_risk_per_dollar",
+            "investment_bundle_ranking_chart",
+            use_container_width=True,
+            config=PLOTLY_CLEAN,
+        )
+
+    bundle_table = bundles.assign(Rank=range(1, len(bundles) + 1))[[
+        "Rank", "Bundle", "Sites", "Devices", "Risk_Score", "Device_Cost", "Bundle_Cost",
+        "Savings", "Risk_per_1k", "Cumulative_Cost",
+    ]].round(1)
+    render_table_with_download(
+        bundle_table.head(200),
+        "site_bundled_ranking",
+        "investment_bundle_ranking_table",
+        export_df=bundle_table,
+        use_container_width=True,
+        hide_index=True,
+        height=320,
+        column_config={
+            c: st.column_config.NumberColumn(format="$%.0f")
+            for c in ["Device_Cost", "Bundle_Cost", "Savings", "Cumulative_Cost"]
+        },
+    )
+
+section_divider()
+
+# ── Refresh Wave Scheduler ───────────────────────────────────────────────────
+st.subheader("Refresh Wave Scheduler")
+st.caption(
+    "Schedules in-scope high-risk devices into quarterly waves, one crew visit per site, "
+    "under each state's field-crew capacity. Sites are worked in descending total risk; "
+    "labor hours come from the workbook's ModelData hours where the model is listed, "
+    "otherwise typical hours for the device type."
+)
+
+wave_devices = df[df["Risk_Level"].isin(HIGH_RISK_LEVELS)]
+wave_devices = wave_devices.assign(Labor_Hours=scope_labor.loc[wave_devices.index, "Labor_Hours"])
+if wave_devices.empty:
+    st.info("No in-scope high-risk devices to schedule.")
+else:
+    hour_sources = source_shares(scope_labor.loc[wave_devices.index], "Labor_Hours_Source")
+    labor_hours_note = (
+        f"Labor hours: workbook ModelData {hour_sources[SOURCE_MODEL]:.0%}, typical hours for the "
+        f"device type {hour_sources[SOURCE_DEFAULT]:.0%} of the devices scheduled."
+    )
+    if hour_sources[SOURCE_DEFAULT] > 0.5:
+        st.warning(f"⚠️ {labor_hours_note} Most models are not in the workbook, so wave sizes are estimates.")
+    else:
+        st.caption(labor_hours_note)
+    schedule = st.session_state.get("_investment_wave_schedule")
+    if schedule is None or schedule.version != scope_version:
+        schedule = WaveSchedule(scope_version, site_packages(wave_devices))
+        st.session_state["_investment_wave_schedule"] = schedule
+
+    wave_left, wave_right = st.columns([1, 2])
+    with wave_left:
+        crew_hours = st.number_input(
+            "Crew hours per quarter", min_value=40.0, max_value=2_000.0,
+            value=DEFAULT_CREW_HOURS_PER_QUARTER, step=40.0, key="wave_crew_hours",
+        )
+        horizon = st.slider("Horizon (quarters)", min_value=4, max_value=16, value=8, key="wave_horizon")
+        crews_df = st.data_editor(
+            pd.DataFrame({"State": schedule.states, "Crews": DEFAULT_CREWS_PER_STATE}),
+            key="wave_crews",
+            hide_index=True,
+            disabled=["State"],
+            column_config={"Crews": st.column_config.NumberColumn("Crews", min_value=0, step=1)},
+            height=min(38 + 35 * len(schedule.states), 320),
+        )
+
+    capacity = dict(zip(crews_df["State"], crews_df["Crews"].fillna(0).clip(lower=0) * crew_hours))
+    rebalanced = schedule.sync(capacity)
+    sites_schedule = schedule.schedule()
+    waves_needed, unscheduled = schedule.backlog_waves()
+    in_horizon = (sites_schedule["Wave_Start"] >= 0) & (sites_schedule["Wave_Start"] < horizon)
+
+    with wave_right:
+        w1, w2, w3 = st.columns(3)
+        w1.metric("Sites in Horizon", f"{int(in_horizon.sum()):,} / {len(sites_schedule):,}")
+        w2.metric(
+            "Risk Addressed in Horizon",
+            f"{sites_schedule.loc[in_horizon, 'Risk_Score'].sum() / max(sites_schedule['Risk_Score'].sum(), 1) * 100:.1f}%",
+        )
+        w3.metric("Quarters to Clear", f"{waves_needed:,}" if not unscheduled else f"{waves_needed:,}+")
+        load = schedule.wave_load(horizon)
+        fig_waves = px.bar(
+            load, x="Quarter", y="Hours_Used", color="State",
+            labels={"Hours_Used": "Crew Hours Scheduled", "Quarter": "Wave"},
+            category_orders={"Quarter": [wave_label(w) for w in range(horizon)]},
+        )
+        fig_waves.update_layout(PLOTLY_LAYOUT)
+        fig_waves.update_layout(height=360, legend_title_text="State", xaxis_title=None)
+        render_plotly_with_download(
+            fig_waves,
+            "refresh_wave_crew_hours",
+            "investment_wave_crew_hours",
+            use_container_width=True,
+            config=PLOTLY_CLEAN,
+        )
+
+    notes = []
+    if rebalanced and len(rebalanced) < len(schedule.states):
+        notes.append(f"Rebalanced {len(rebalanced)} state(s) after the capacity change: {', '.join(rebalanced)}.")
+    if unscheduled:
+        notes.append(f"{unscheduled:,} site(s) are unscheduled because their state has no crews.")
+    for note in notes:
+        st.caption(note)
+
+    wave_order = sites_schedule["Wave_Start"].mask(sites_schedule["Wave_Start"] < 0, len(sites_schedule))
+    wave_table = sites_schedule.assign(_order=wave_order).sort_values(
+        ["_order", "Risk_Score"], ascending=[True, False]
+    ).drop(columns="_order")
+    wave_table = wave_table.assign(Labor_Hours=wave_table["Labor_Hours"].round(1), Risk_Score=wave_table["Risk_Score"].round(1))
+    render_table_with_download(
+        wave_table[["Wave", "Site_Code", "State", "Devices", "Labor_Hours", "Risk_Score"]],
+        "refresh_wave_schedule",
+        "investment_wave_schedule",
+        export_df=wave_table,
+        use_container_width=True,
+        hide_index=True,
+        height=320,
+    )
+
+section_divider()
+
 # ── Scope Exception Management ───────────────────────────────────────────────
 st.subheader("Scope Exception Management")
 st.caption(
@@ -203,45 +591,64 @@ st.caption(
     "Excluded devices are omitted from the budget simulation and priority rankings above."
 )
 
+planner = st.text_input(
+    "Your name (recorded in the exception audit log)",
+    value=os.getenv("USER", ""),
+    key="investment_exception_planner",
+)
+planner = planner.strip() or "unknown"
+
 exc_left, exc_right = st.columns(2)
 
 with exc_left:
     st.markdown("**Add Exception**")
-    with st.form("add_exception_form", clear_on_submit=True):
-        available = sorted(
-            all_df[~all_df["Hostname"].isin(excepted_hosts)]["Hostname"].tolist()
-        )
-        selected_to_exclude = st.multiselect(
-            "Select devices to exclude",
-            options=available,
-            help="Search by hostname. Only non-excluded active devices are shown.",
+    # Indexed per dataset version; scores are read live so reweighting skips the rebuild.
+    host_index = hostname_index(base_version, all_df)
+    host_query = st.text_input(
+        "Search hostnames",
+        key="exception_host_search",
+        placeholder="Hostname prefix, or any 3+ characters",
+    )
+    host_matches = host_index.search(host_query, exclude=host_excluded, limit=MATCH_LIMIT)
+    # Picks survive new searches; options are only the picks plus the current top matches.
+    staged = st.session_state.get("_exception_staged_hosts", [])
+    host_context = pd.concat([host_index.lookup(staged), host_matches], ignore_index=True)
+    host_context["Risk_Score"] = all_df["Risk_Score"].to_numpy()[host_context["Row"].to_numpy(dtype=int)]
+    host_context = host_context.drop_duplicates("Hostname").set_index("Hostname")
+    staged = [h for h in staged if h in host_context.index]
+
+    def _host_label(host: str) -> str:
+        row = host_context.loc[host]
+        return f"{host} · {row['Site_Code']} · {row['Risk_Level']} (risk {row['Risk_Score']:.1f})"
+
+    selected_to_exclude = st.multiselect(
+        "Select devices to exclude",
+        options=list(host_context.index),
+        default=staged,
+        format_func=_host_label,
+        help=f"Shows the top {MATCH_LIMIT} non-excluded active devices matching the search.",
+    )
+    st.session_state["_exception_staged_hosts"] = selected_to_exclude
+    if host_query.strip():
+        st.caption(
+            f"First {MATCH_LIMIT} matches shown; refine the search to narrow them."
+            if len(host_matches) >= MATCH_LIMIT
+            else f"{len(host_matches)} matching device{'s' if len(host_matches) != 1 else ''}."
         )
+    with st.form("add_exception_form", clear_on_submit=True):
         reason = st.selectbox("Reason for exclusion", options=EXCEPTION_REASONS)
         add_submitted = st.form_submit_button(
-            "Mark as Exception", type="primary"
+            "Mark as Exception", type="primary", disabled=not selected_to_exclude
         )
         if add_submitted and selected_to_exclude:
-            for h in selected_to_exclude:
-                exceptions[h] = {
-                    "reason": reason,
-                    "added": str(pd.Timestamp.now().date()),
-                }
-            save_exceptions(exceptions)
+            add_exceptions(selected_to_exclude, reason, planner)
+            st.session_state["_exception_staged_hosts"] = []
             st.rerun()
 
 with exc_right:
     st.markdown("**Current Exceptions**")
-    if exceptions:
-        exc_display = pd.DataFrame(
-            [
-                {
-                    "Hostname": k,
-                    "Reason": v.get("reason", ""),
-                    "Date Added": v.get("added", ""),
-                }
-                for k, v in exceptions.items()
-            ]
-        )
+    exc_display = list_exceptions()
+    if not exc_display.empty:
         render_table_with_download(
             exc_display,
             "scope_exception_management_current_exceptions",
@@ -254,13 +661,151 @@ with exc_right:
         with st.form("remove_exception_form", clear_on_submit=True):
             to_remove = st.multiselect(
                 "Select exceptions to remove",
-                options=list(exceptions.keys()),
+                options=exc_display["Hostname"].tolist(),
             )
             remove_submitted = st.form_submit_button("Remove Selected")
             if remove_submitted and to_remove:
-                for h in to_remove:
-                    exceptions.pop(h, None)
-                save_exceptions(exceptions)
+                remove_exceptions(to_remove, planner, reason="Restored to scope")
                 st.rerun()
     else:
         st.info("No devices are currently excluded from scope.")
+
+st.markdown("**Bulk Exclusions**")
+rule_tab, import_tab = st.tabs(["Exclusion Rules", "CSV Hostname Import"])
+
+with rule_tab:
+    st.caption(
+        "A rule excludes every active device matching all of its conditions, "
+        "e.g. all Voice Gateways at sites with decommissioned equipment. "
+        "Rules stop applying after their expiry date."
+    )
+    rule_left, rule_right = st.columns([1, 2])
+    with rule_left:
+        rule_name = st.text_input("Rule name", key="exception_rule_name")
+        rule_reason = st.selectbox("Reason for exclusion", options=EXCEPTION_REASONS, key="exception_rule_reason")
+        rule_expires = st.date_input("Expires (optional)", value=None, key="exception_rule_expires")
+        n_conditions = st.number_input(
+            "Conditions", min_value=1, max_value=4, value=1, step=1, key="exception_rule_conditions"
+        )
+    with rule_right:
+        predicates = []
+        for i in range(int(n_conditions)):
+            c_col, c_op, c_val = st.columns([2, 1.4, 3])
+            column = c_col.selectbox("Column", options=rule_columns, key=f"exception_rule_column_{i}")
+            numeric = column in NUMERIC_RULE_COLUMNS
+            op = c_op.selectbox(
+                "Operator",
+                options=NUMERIC_OPS if numeric else CATEGORICAL_OPS + TEXT_OPS,
+                key=f"exception_rule_op_{i}_{numeric}",
+            )
+            if numeric:
+                value = c_val.number_input("Value", value=0.0, key=f"exception_rule_number_{i}_{column}")
+            elif op in TEXT_OPS:
+                value = c_val.text_input("Text", key=f"exception_rule_text_{i}_{column}").strip()
+            else:
+                value = c_val.multiselect(
+                    "Values",
+                    options=sorted(all_df[column].dropna().astype(str).unique()),
+                    key=f"exception_rule_values_{i}_{column}",
+                )
+            if numeric or value:
+                predicates.append({"column": column, "op": op, "value": value})
+
+    complete = len(predicates) == int(n_conditions)
+    if complete:
+        preview = compile_rules(fleet_version, all_df)({"predicates": predicates})
+        st.caption(
+            f"This rule matches **{len(preview):,}** active devices "
+            f"({fmt_currency(all_df['Total_Replacement_Cost'].to_numpy()[preview].sum())} replacement cost)."
+        )
+    if st.button("Save Rule", type="primary", disabled=not complete, key="exception_rule_save"):
+        add_rule(
+            rule_name.strip() or describe_rule({"predicates": predicates}),
+            predicates,
+            rule_reason,
+            planner,
+            expires=rule_expires.isoformat() if rule_expires else None,
+        )
+        st.rerun()
+
+    if exception_rules:
+        rules_display = pd.DataFrame([
+            {
+                "ID": rule["id"],
+                "Name": rule["name"],
+                "Conditions": describe_rule(rule),
+                "Reason": rule["reason"],
+                "Expires": rule["expires"] or "—",
+                "Status": "Active" if is_active(rule) else "Expired",
+                "Devices Matched": rule_matches.get(rule["id"], 0),
+                "Created By": rule["created_by"],
+                "Created": rule["created_at"],
+            }
+            for rule in exception_rules
+        ])
+        render_table_with_download(
+            rules_display,
+            "scope_exception_rules",
+            "investment_scope_exception_rules",
+            export_df=rules_display,
+            use_container_width=True,
+            hide_index=True,
+        )
+        rule_labels = {f"#{rule['id']} {rule['name']}": rule["id"] for rule in exception_rules}
+        with st.form("remove_rule_form", clear_on_submit=True):
+            rules_to_remove = st.multiselect("Select rules to remove", options=list(rule_labels))
+            if st.form_submit_button("Remove Selected Rules") and rules_to_remove:
+                remove_rules([rule_labels[label] for label in rules_to_remove], planner)
+                st.rerun()
+    else:
+        st.info("No exclusion rules have been defined.")
+
+with import_tab:
+    st.caption(
+        "Upload a CSV of hostnames to exclude in one batch. The Hostname column is used "
+        "when present, otherwise the first column."
+    )
+    upload = st.file_uploader("Hostname CSV", type=["csv"], key="exception_csv_upload")
+    if upload is not None:
+        try:
+            uploaded = pd.read_csv(upload, dtype=str)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+            st.error(f"Could not read the CSV: {exc}")
+            uploaded = pd.DataFrame()
+        if not uploaded.empty:
+            host_col = "Hostname" if "Hostname" in uploaded.columns else uploaded.columns[0]
+            hosts = uploaded[host_col].dropna().str.strip()
+            hosts = hosts[hosts != ""].drop_duplicates()
+            in_view = hosts.isin(all_df["Hostname"])
+            already = hosts.isin(excepted_hosts)
+            i1, i2, i3 = st.columns(3)
+            i1.metric("Hostnames in File", f"{len(hosts):,}")
+            i2.metric("Matched Active Devices", f"{int(in_view.sum()):,}")
+            i3.metric("Already Excluded", f"{int(already.sum()):,}")
+            if (~in_view).any():
+                st.caption(
+                    f"{int((~in_view).sum()):,} hostname(s) are not active devices in the current "
+                    "view; they are still recorded and apply if those devices come into scope."
+                )
+            import_reason = st.selectbox(
+                "Reason for exclusion", options=EXCEPTION_REASONS, key="exception_csv_reason"
+            )
+            if st.button(f"Exclude {len(hosts):,} Hostnames", type="primary", key="exception_csv_import",
+                         disabled=hosts.empty):
+                add_exceptions(hosts.tolist(), import_reason, planner)
+                st.rerun()
+
+with st.expander("Exception Audit Log", expanded=False):
+    audit_df = audit_log()
+    if audit_df.empty:
+        st.info("No exception changes have been recorded yet.")
+    else:
+        render_table_with_download(
+            audit_df,
+            "scope_exception_audit_log",
+            "investment_scope_exception_audit",
+            export_df=audit_df,
+            use_container_width=True,
+            hide_index=True,
+            height=300,
+        )
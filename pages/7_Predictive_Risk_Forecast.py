@@ -8,9 +8,22 @@ import plotly.graph_objects as go
 import streamlit as st
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from src.data_loader import load_data, apply_global_filters
+from src.capital_plan import plan_capital, plan_years
+from src.data_loader import load_data, apply_global_filters, dataset_version
 from src.dashboard_chatbot import render_dashboard_chatbot
-from src.download_utils import render_plotly_with_download
+from src.download_utils import render_plotly_with_download, render_table_with_download
+from src.hazard_model import (
+    MODEL_COLUMNS as HAZARD_COLUMNS, SEVERE_RISK_SCORE, forecast_hazard, forecast_quarters, hazard_summary,
+)
+from src.lifecycle import as_of_year, years_since_snapshot
+from src.monte_carlo import (
+    COMPLIANCE_GRACE_QUARTERS, DEFAULT_SCENARIOS, PLAN_DISTRIBUTIONS, RATE_DISTRIBUTIONS, SCENARIO_CHOICES,
+    simulate_at_risk, simulate_inaction,
+)
+from src.scenario_grid import (
+    BUDGET_MAX, BUDGET_MIN, BUDGET_STEP, PACE_MULTIPLIERS, grid_index, scenario_grid, scenario_years,
+)
+from src.sensitivity import DEFAULT_RATE_SWING, PARAMETER_LABELS, PARAMETERS, pair_grid, sensitivity
 from src.theme import (
     inject_theme_css, page_header, section_divider, fmt_currency,
     COLORS, PLOTLY_LAYOUT, PLOTLY_CLEAN,
@@ -20,7 +33,8 @@ st.set_page_config(page_title="Predictive Risk Forecast", page_icon="🔮", layo
 inject_theme_css()
 
 DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "dashboard_master_data.csv")
-df = apply_global_filters(load_data(DATA_PATH))
+raw_df = load_data(DATA_PATH)
+df = apply_global_filters(raw_df)
 df["Total_Replacement_Cost"] = pd.to_numeric(df["Total_Replacement_Cost"], errors="coerce").fillna(0)
 df["Risk_Score"] = pd.to_numeric(df["Risk_Score"], errors="coerce").fillna(0)
 df["Days_Past_EoL"] = pd.to_numeric(df["Days_Past_EoL"], errors="coerce").fillna(0)
@@ -30,6 +44,47 @@ if "EoL_Year" in df.columns:
 
 main = render_dashboard_chatbot(page_title="Predictive Risk Forecast", df=df)
 
+
+def distribution_editor(defaults, labels, key, value_format="%.3f"):
+    """Editable (low, most likely, high) table; returns {name: (low, mode, high)}."""
+    edited = st.data_editor(
+        pd.DataFrame(
+            [(labels[name], *dist) for name, dist in defaults.items()],
+            columns=["Parameter", "Low", "Most Likely", "High"],
+        ),
+        key=key,
+        hide_index=True,
+        disabled=["Parameter"],
+        column_config={
+            c: st.column_config.NumberColumn(c, format=value_format)
+            for c in ["Low", "Most Likely", "High"]
+        },
+    )
+    values = edited[["Low", "Most Likely", "High"]].apply(pd.to_numeric, errors="coerce")
+    return {
+        name: tuple(float(v) for v in values.iloc[i].fillna(pd.Series(defaults[name], index=values.columns)))
+        for i, name in enumerate(defaults)
+    }
+
+
+def add_percentile_band(fig, x, bands, name, color, fill):
+    """P10-P90 shaded band with a P50 line."""
+    fig.add_trace(go.Scatter(
+        x=x, y=bands["P90"], mode="lines", line=dict(width=0),
+        showlegend=False, hoverinfo="skip",
+    ))
+    fig.add_trace(go.Scatter(
+        x=x, y=bands["P10"], mode="lines", line=dict(width=0),
+        fill="tonexty", fillcolor=fill, name=f"{name} P10–P90",
+        customdata=bands["P90"],
+        hovertemplate="P10 %{y:,.0f} · P90 %{customdata:,.0f}<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=x, y=bands["P50"], mode="lines+markers", name=f"{name} P50",
+        line=dict(color=color, width=3), marker=dict(size=7, color=color),
+    ))
+
+
 with main:
     page_header(
         "Predictive Risk & Cost Forecast",
@@ -61,7 +116,20 @@ with main:
             yearly_eol["cumulative_devices"] = yearly_eol["devices"].cumsum()
             yearly_eol["cumulative_cost"] = yearly_eol["cost"].cumsum()
 
-            current_year = 2026
+            current_year = as_of_year(2026)
+            hazard = None
+            if all(c in raw_df.columns for c in HAZARD_COLUMNS):
+                # Trained and scored on the whole active fleet, so sidebar filters only
+                # pick which devices are summed and never retrain the model; an as-of
+                # date rolls the snapshot's features to it.
+                active = raw_df.loc[~raw_df["Is_Decom"].astype(bool), HAZARD_COLUMNS]
+                hazard_fleet = active.reset_index(drop=True)
+                with st.spinner("Scoring the device hazard model..."):
+                    forecast = forecast_hazard(
+                        dataset_version(hazard_fleet), forecast_quarters(2035 - current_year + 1), hazard_fleet,
+                        years_since_snapshot(hazard_fleet),
+                    )
+                hazard = hazard_summary(forecast, active.index.get_indexer(df.index[~df["Is_Decom"]]))
             past = yearly_eol[yearly_eol["EoL_Year"] <= current_year].copy()
             future = yearly_eol[yearly_eol["EoL_Year"] >= current_year].copy()
 
@@ -95,6 +163,68 @@ with main:
             render_plotly_with_download(fig_traj, "risk_trajectory_forecast", "pred_risk_trajectory",
                                        use_container_width=True, config=PLOTLY_CLEAN)
 
+            if hazard is not None:
+                section_divider()
+
+                st.subheader("Risk-Score Extrapolation (Device Hazard Model)")
+                st.caption(
+                    f"Projects how many devices will score as severe risk (Risk Score ≥ "
+                    f"{SEVERE_RISK_SCORE:.0f}) as they age. A logistic discrete-time hazard model is fitted on "
+                    f"{hazard['n_train']:,} active devices from EoL age, days past EoL, model, device type, "
+                    f"support status and site context, then rolled forward. The Risk Score is itself derived "
+                    f"from these lifecycle fields, so this extrapolates the score formula; it is not validated "
+                    f"against incidents or failures."
+                    + (" Loaded from the saved model for this dataset." if hazard["loaded"] else "")
+                )
+                expected = hazard["expected"].set_index("quarter_num")["Expected_At_Risk"]
+                h1, h2, h3, h4 = st.columns(4)
+                now = expected.loc[0]
+                h1.metric("Severe-Risk Devices Today", f"{now:,.0f}")
+                for col, years_out in zip([h2, h3, h4], [1, 2, 3]):
+                    value = expected.loc[years_out * 4]
+                    col.metric(f"Projected in {years_out} Year{'s' if years_out > 1 else ''}", f"{value:,.0f}",
+                               delta=f"{value - now:+,.0f}", delta_color="inverse")
+
+                fig_severe = go.Figure(go.Scatter(
+                    x=current_year + expected.index / 4, y=expected.to_numpy(),
+                    mode="lines+markers", name="Projected Severe-Risk Devices",
+                    line=dict(color=COLORS["sky"], width=3),
+                    hovertemplate="%{y:,.0f} projected<extra></extra>",
+                ))
+                fig_severe.update_layout(
+                    **PLOTLY_LAYOUT,
+                    xaxis_title="Year",
+                    yaxis_title=f"Devices Projected at Risk Score ≥ {SEVERE_RISK_SCORE:.0f}",
+                    showlegend=False,
+                )
+                fig_severe.update_layout(height=360)
+                render_plotly_with_download(fig_severe, "projected_severe_risk_devices", "pred_hazard_projection",
+                                           use_container_width=True, config=PLOTLY_CLEAN)
+
+                device_risk = (
+                    df.loc[~df["Is_Decom"], ["Hostname", "Site_Code", "State", "Device Type", "Model",
+                                              "Support_Status", "EoL_Year"]]
+                    .reset_index(drop=True)
+                    .join(hazard["device"])
+                )
+                # Devices not severe today but most likely to become so within a year.
+                emerging = device_risk[device_risk["P_Now"] < 0.5].nlargest(100, "P_1y")
+                st.markdown("**Emerging Risk: Most Likely to Turn Severe Within a Year**")
+                render_table_with_download(
+                    emerging,
+                    "hazard_model_emerging_devices",
+                    "pred_hazard_emerging",
+                    export_df=device_risk,
+                    use_container_width=True,
+                    hide_index=True,
+                    height=320,
+                    column_config={
+                        c: st.column_config.ProgressColumn(c.replace("P_", "P(severe) ").replace("Now", "today"),
+                                                           min_value=0.0, max_value=1.0, format="%.2f")
+                        for c in hazard["device"].columns
+                    },
+                )
+
             section_divider()
 
             st.subheader("Year-over-Year EoL Wave")
@@ -136,7 +266,7 @@ with main:
         compliance_penalty_rate = 0.03
 
         quarters = list(range(0, 13))
-        quarter_labels = [f"Q{(i % 4) + 1} {2026 + i // 4}" for i in quarters]
+        quarter_labels = [f"Q{(i % 4) + 1} {as_of_year(2026) + i // 4}" for i in quarters]
 
         base_cost = critical_cost + high_cost
         cumulative_costs = []
@@ -147,7 +277,7 @@ with main:
         for q in quarters:
             incident = base_cost * incident_rate * q
             support = base_cost * support_premium * q
-            compliance = base_cost * compliance_penalty_rate * max(0, q - 2)
+            compliance = base_cost * compliance_penalty_rate * max(0, q - COMPLIANCE_GRACE_QUARTERS)
             total = base_cost + incident + support + compliance
             cumulative_costs.append(total)
             incident_costs.append(incident)
@@ -222,6 +352,178 @@ with main:
             display_inaction[col] = display_inaction[col].apply(lambda x: f"${x:,.0f}")
         st.dataframe(display_inaction, use_container_width=True, hide_index=True)
 
+        section_divider()
+
+        # ── Monte Carlo uncertainty ──────────────────────────────────────
+        st.subheader("Cost of Inaction Uncertainty (Monte Carlo)")
+        st.caption(
+            "The rates above are point estimates. Here each scenario draws its incident, "
+            "extended-support and compliance rates from triangular distributions; the band "
+            "shows the 10th to 90th percentile of added cost across scenarios."
+        )
+        mc_left, _, mc_right = st.columns([3, 1, 6])
+        with mc_left:
+            rate_dists = distribution_editor(
+                RATE_DISTRIBUTIONS,
+                {
+                    "incident_rate": "Incident rate / qtr",
+                    "support_premium": "Support premium / qtr",
+                    "compliance_penalty_rate": "Compliance penalty / qtr",
+                },
+                key="mc_rate_distributions",
+            )
+            n_scenarios = st.select_slider(
+                "Scenarios", options=SCENARIO_CHOICES, value=DEFAULT_SCENARIOS,
+                format_func=lambda n: f"{n:,}", key="mc_scenarios",
+            )
+        inaction_bands = simulate_inaction(float(base_cost), len(quarters), rate_dists, n_scenarios)
+
+        with mc_right:
+            fig_mc = go.Figure()
+            add_percentile_band(
+                fig_mc, quarter_labels, inaction_bands, "Added Cost",
+                COLORS["crimson"], "rgba(231, 76, 60, 0.15)",
+            )
+            fig_mc.add_trace(go.Scatter(
+                x=quarter_labels, y=inaction_df["Total Cost"] - base_cost,
+                mode="lines", name="Deterministic",
+                line=dict(color="#6B7B8D", width=2, dash="dash"),
+            ))
+            fig_mc.update_layout(
+                **PLOTLY_LAYOUT,
+                yaxis_title="Added Cost vs Replacing Today ($)",
+                xaxis_title="Quarter",
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+                hovermode="x unified",
+                yaxis_tickformat="$,.0f",
+            )
+            fig_mc.update_layout(height=420)
+            render_plotly_with_download(fig_mc, "cost_of_inaction_monte_carlo", "pred_cost_inaction_mc",
+                                       use_container_width=True, config=PLOTLY_CLEAN)
+
+        year3 = inaction_bands.iloc[-1]
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Year 3 Added Cost (P10)", fmt_currency(year3["P10"]))
+        m2.metric("Year 3 Added Cost (P50)", fmt_currency(year3["P50"]))
+        m3.metric("Year 3 Added Cost (P90)", fmt_currency(year3["P90"]))
+
+        section_divider()
+
+        # ── Sensitivity analysis ─────────────────────────────────────────
+        st.subheader("What Drives the Cost of Inaction?")
+        st.caption(
+            "Moves each assumption across its range on its own (tornado) and every pair of "
+            "assumptions together (heatmap), reading the added cost at the chosen horizon. "
+            "Cost scope swings from critical devices only to critical, high and medium devices."
+        )
+        medium_cost = df.loc[
+            df["Risk_Level"].str.contains("Medium", case=False, na=False), "Total_Replacement_Cost"
+        ].sum()
+        sens_base = {
+            "incident_rate": incident_rate,
+            "support_premium": support_premium,
+            "compliance_penalty_rate": compliance_penalty_rate,
+            "compliance_grace_quarters": float(COMPLIANCE_GRACE_QUARTERS),
+            "base_cost": float(base_cost),
+        }
+        sens_left, _, sens_right = st.columns([3, 1, 6])
+        with sens_left:
+            range_df = st.data_editor(
+                pd.DataFrame([
+                    (PARAMETER_LABELS[p], sens_base[p], *(
+                        (0.0, 4.0) if p == "compliance_grace_quarters"
+                        else (sens_base[p] * (1 - DEFAULT_RATE_SWING), sens_base[p] * (1 + DEFAULT_RATE_SWING))
+                    ))
+                    for p in PARAMETERS if p != "base_cost"
+                ], columns=["Parameter", "Base", "Low", "High"]),
+                key="sensitivity_ranges",
+                hide_index=True,
+                disabled=["Parameter", "Base"],
+                column_config={c: st.column_config.NumberColumn(c, format="%.3f") for c in ["Base", "Low", "High"]},
+            )
+            sens_quarter = st.select_slider(
+                "Horizon", options=quarters[1:], value=quarters[-1],
+                format_func=lambda q: f"{q} quarters ({quarter_labels[q]})", key="sensitivity_quarter",
+            )
+        ranges = {
+            p: (float(row["Low"]), float(row["High"]))
+            for p, (_, row) in zip([p for p in PARAMETERS if p != "base_cost"], range_df.fillna(0).iterrows())
+        }
+        sens = sensitivity(
+            sens_base, ranges, int(sens_quarter),
+            (float(critical_cost), float(critical_cost + high_cost), float(critical_cost + high_cost + medium_cost)),
+        )
+
+        def _level_text(p, value):
+            if p == "base_cost":
+                return fmt_currency(value)
+            if p == "compliance_grace_quarters":
+                return f"{value:.0f} qtrs"
+            return f"{value * 100:.1f}%"
+
+        with sens_right:
+            tornado = sens["tornado"].iloc[::-1]
+            labels = [PARAMETER_LABELS[p] for p in tornado["Parameter"]]
+            fig_tornado = go.Figure()
+            fig_tornado.add_trace(go.Bar(
+                y=labels, x=tornado["Low Result"] - sens["base_result"], base=sens["base_result"],
+                orientation="h", name="Low value", marker_color=COLORS["emerald"],
+                text=[_level_text(p, v) for p, v in zip(tornado["Parameter"], tornado["Low Value"])],
+                textposition="inside",
+                hovertemplate="%{y}: %{text} → $%{x:,.0f} change<extra></extra>",
+            ))
+            fig_tornado.add_trace(go.Bar(
+                y=labels, x=tornado["High Result"] - sens["base_result"], base=sens["base_result"],
+                orientation="h", name="High value", marker_color=COLORS["crimson"],
+                text=[_level_text(p, v) for p, v in zip(tornado["Parameter"], tornado["High Value"])],
+                textposition="inside",
+                hovertemplate="%{y}: %{text} → $%{x:,.0f} change<extra></extra>",
+            ))
+            fig_tornado.add_vline(x=sens["base_result"], line_dash="dot", line_color="#6B7B8D",
+                                  annotation_text="Base", annotation_position="top")
+            fig_tornado.update_layout(
+                **PLOTLY_LAYOUT,
+                barmode="overlay",
+                xaxis_title=f"Added Cost after {sens_quarter} Quarters ($)",
+                xaxis_tickformat="$,.0f",
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+            )
+            fig_tornado.update_layout(height=380)
+            render_plotly_with_download(fig_tornado, "cost_of_inaction_tornado", "pred_sensitivity_tornado",
+                                       use_container_width=True, config=PLOTLY_CLEAN)
+        st.caption(f"{sens['variants']:,} variants evaluated in one vectorized pass.")
+
+        h_left, h_right = st.columns(2)
+        driver_order = list(sens["tornado"]["Parameter"])
+        heat_x = h_left.selectbox(
+            "Heatmap columns", driver_order, index=0,
+            format_func=PARAMETER_LABELS.get, key="sensitivity_heat_x",
+        )
+        heat_y = h_right.selectbox(
+            "Heatmap rows", [p for p in driver_order if p != heat_x], index=0,
+            format_func=PARAMETER_LABELS.get, key="sensitivity_heat_y",
+        )
+        levels_y, levels_x, heat = pair_grid(sens, heat_y, heat_x)
+        fig_heat = go.Figure(go.Heatmap(
+            z=heat,
+            x=[_level_text(heat_x, v) for v in levels_x],
+            y=[_level_text(heat_y, v) for v in levels_y],
+            colorscale="YlOrRd",
+            colorbar=dict(title="Added Cost", tickformat="$,.0s"),
+            hovertemplate=(
+                f"{PARAMETER_LABELS[heat_x]}: %{{x}}<br>{PARAMETER_LABELS[heat_y]}: %{{y}}"
+                "<br>Added cost: $%{z:,.0f}<extra></extra>"
+            ),
+        ))
+        fig_heat.update_layout(
+            **PLOTLY_LAYOUT,
+            xaxis_title=PARAMETER_LABELS[heat_x],
+            yaxis_title=PARAMETER_LABELS[heat_y],
+        )
+        fig_heat.update_layout(height=440)
+        render_plotly_with_download(fig_heat, "cost_of_inaction_two_way", "pred_sensitivity_heatmap",
+                                   use_container_width=True, config=PLOTLY_CLEAN)
+
     # ── TAB 3: SCENARIO COMPARISON ────────────────────────────────────────
     with tab_scenario:
         st.subheader("Investment Scenario Analyzer")
@@ -230,44 +532,41 @@ with main:
         with invest_col:
             annual_budget = st.slider(
                 "Annual Investment Budget",
-                min_value=0, max_value=5_000_000, value=1_500_000, step=100_000,
+                min_value=BUDGET_MIN, max_value=BUDGET_MAX, value=1_500_000, step=BUDGET_STEP,
                 format="$%d", key="scenario_budget",
             )
             replacement_pace = st.select_slider(
                 "Replacement Pace",
-                options=["Conservative", "Moderate", "Aggressive"],
+                options=list(PACE_MULTIPLIERS),
                 value="Moderate",
             )
-            pace_multiplier = {"Conservative": 0.7, "Moderate": 1.0, "Aggressive": 1.4}[replacement_pace]
 
         total_devices = len(df)
-        critical_count = (df["Risk_Level"].str.contains("Critical", case=False, na=False)).sum()
-        high_count = (df["Risk_Level"].str.contains("High", case=False, na=False)).sum()
-        at_risk = critical_count + high_count
+        critical_mask = df["Risk_Level"].str.contains("Critical", case=False, na=False)
+        high_mask = df["Risk_Level"].str.contains("High", case=False, na=False)
+        at_risk = int(critical_mask.sum() + high_mask.sum())
         avg_cost = df.loc[df["Total_Replacement_Cost"] > 0, "Total_Replacement_Cost"].mean()
         avg_cost = avg_cost if pd.notna(avg_cost) else 2000
 
-        years = list(range(2026, 2033))
-        do_nothing_risk = []
-        invest_risk = []
-
-        remaining_risk_nothing = at_risk
-        remaining_risk_invest = at_risk
+        years = scenario_years(as_of_year(2026))
 
         if "EoL_Year" in df.columns:
-            future_eol = df[(df["EoL_Year"] >= 2026) & (df["EoL_Year"] <= 2032)]
+            # New arrivals are devices not yet at risk on the as-of date; the rest are
+            # already counted in at_risk.
+            not_at_risk = df[~(critical_mask | high_mask)]
+            future_eol = not_at_risk[(not_at_risk["EoL_Year"] >= years[0]) & (not_at_risk["EoL_Year"] <= years[-1])]
             yearly_new_eol = future_eol.groupby("EoL_Year").size().to_dict()
         else:
             yearly_new_eol = {y: int(at_risk * 0.08) for y in years}
 
-        for year in years:
-            new_eol = yearly_new_eol.get(year, 0)
-            remaining_risk_nothing += new_eol
-            do_nothing_risk.append(remaining_risk_nothing)
-
-            devices_replaced = int((annual_budget / max(avg_cost, 1)) * pace_multiplier)
-            remaining_risk_invest = max(0, remaining_risk_invest + new_eol - devices_replaced)
-            invest_risk.append(remaining_risk_invest)
+        # Every budget x pace trajectory is precomputed; the sliders only index into it.
+        grid = scenario_grid(
+            int(at_risk), tuple(int(yearly_new_eol.get(y, 0)) for y in years), float(avg_cost)
+        )
+        budget_idx, pace_idx = grid_index(annual_budget, replacement_pace)
+        do_nothing_risk = grid["do_nothing"].tolist()
+        invest_risk = grid["invest"][budget_idx, pace_idx].tolist()
+        devices_per_year = int(grid["devices_per_year"][budget_idx, pace_idx])
 
         with viz_col:
             fig_scenario = go.Figure()
@@ -286,7 +585,7 @@ with main:
                 fill="tozeroy", fillcolor="rgba(39, 174, 96, 0.06)",
             ))
 
-            fig_scenario.add_vline(x=2026, line_dash="dot", line_color="#6B7B8D",
+            fig_scenario.add_vline(x=years[0], line_dash="dot", line_color="#6B7B8D",
                                    annotation_text="Now", annotation_position="top")
 
             fig_scenario.update_layout(
@@ -302,14 +601,13 @@ with main:
 
         section_divider()
 
-        devices_per_year = int((annual_budget / max(avg_cost, 1)) * pace_multiplier)
         years_to_clear = int(np.ceil(at_risk / max(devices_per_year, 1))) if devices_per_year > 0 else 999
-        total_investment = annual_budget * min(years_to_clear, 7)
+        total_investment = annual_budget * min(years_to_clear, len(years))
         risk_reduction_y1 = min(100, (devices_per_year / max(at_risk, 1)) * 100)
 
         s1, s2, s3, s4 = st.columns(4)
         s1.metric("Devices Replaced/Year", f"{devices_per_year:,}")
-        s2.metric("Years to Clear Backlog", f"{min(years_to_clear, 7)}+" if years_to_clear > 7 else str(years_to_clear))
+        s2.metric("Years to Clear Backlog", f"{len(years)}+" if years_to_clear > len(years) else str(years_to_clear))
         s3.metric("Year 1 Risk Reduction", f"{risk_reduction_y1:.1f}%")
         s4.metric("Total Investment Required", fmt_currency(total_investment))
 
@@ -326,7 +624,7 @@ with main:
                     border-radius: 0 12px 12px 0; padding: 20px 24px; margin: 8px 0;
                     font-size: 0.95rem; line-height: 1.7; color: #1A1F2E;">
             <strong style="font-size: 1.05rem;">By investing {fmt_currency(annual_budget)} annually at a {replacement_pace.lower()} pace:</strong><br><br>
-            By 2032, your at-risk fleet reduces from <strong>{final_nothing:,}</strong> devices (do nothing)
+            By {years[-1]}, your at-risk fleet reduces from <strong>{final_nothing:,}</strong> devices (do nothing)
             to <strong>{final_invest:,}</strong> devices — a reduction of <strong>{devices_saved:,}</strong> devices
             ({devices_saved/max(final_nothing,1)*100:.0f}% improvement).<br><br>
             Estimated avoided replacement & incident cost: <strong>{fmt_currency(cost_saved)}</strong><br>
@@ -334,3 +632,169 @@ with main:
             Projected compliance risk reduction: <strong>{min(99, devices_saved/max(final_nothing,1)*100):.0f}%</strong>
         </div>
         """, unsafe_allow_html=True)
+
+        section_divider()
+
+        # ── Monte Carlo at-risk trajectory ───────────────────────────────
+        st.subheader("At-Risk Trajectory Uncertainty (Monte Carlo)")
+        st.caption(
+            "Samples how closely the replacement pace is achieved and how far vendors slip "
+            "EoL dates, then replays the scenario above for each draw. Bands show the 10th to "
+            "90th percentile of at-risk devices with and without the investment."
+        )
+        traj_left, _, traj_right = st.columns([3, 1, 6])
+        with traj_left:
+            plan_dists = distribution_editor(
+                PLAN_DISTRIBUTIONS,
+                {"pace_realization": "Pace achieved (x plan)", "eol_slip_years": "EoL slippage (years)"},
+                key="mc_plan_distributions",
+                value_format="%.2f",
+            )
+            traj_scenarios = st.select_slider(
+                "Scenarios", options=SCENARIO_CHOICES, value=DEFAULT_SCENARIOS,
+                format_func=lambda n: f"{n:,}", key="mc_traj_scenarios",
+            )
+        trajectory_bands = simulate_at_risk(
+            int(at_risk), tuple(int(yearly_new_eol.get(y, 0)) for y in years), tuple(years),
+            float(devices_per_year), plan_dists, traj_scenarios,
+        )
+        with traj_right:
+            fig_traj_mc = go.Figure()
+            add_percentile_band(
+                fig_traj_mc, years,
+                {p: trajectory_bands[f"Do_Nothing_{p}"] for p in ["P10", "P50", "P90"]},
+                "Do Nothing", COLORS["crimson"], "rgba(231, 76, 60, 0.12)",
+            )
+            add_percentile_band(
+                fig_traj_mc, years, trajectory_bands,
+                f"Invest {fmt_currency(annual_budget)}/yr", COLORS["emerald"], "rgba(39, 174, 96, 0.15)",
+            )
+            fig_traj_mc.update_layout(
+                **PLOTLY_LAYOUT,
+                xaxis_title="Year",
+                yaxis_title="At-Risk Devices",
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+                hovermode="x unified",
+            )
+            fig_traj_mc.update_layout(height=420)
+            render_plotly_with_download(fig_traj_mc, "at_risk_trajectory_monte_carlo", "pred_scenario_mc",
+                                       use_container_width=True, config=PLOTLY_CLEAN)
+
+        final = trajectory_bands.iloc[-1]
+        t1, t2, t3 = st.columns(3)
+        t1.metric(f"{years[-1]} At-Risk (P10)", f"{final['P10']:,.0f}")
+        t2.metric(f"{years[-1]} At-Risk (P50)", f"{final['P50']:,.0f}",
+                  delta=f"{final['P50'] - final_invest:+,.0f} vs deterministic", delta_color="inverse")
+        t3.metric(f"{years[-1]} At-Risk (P90)", f"{final['P90']:,.0f}")
+
+        section_divider()
+
+        # ── Multi-Year Capital Plan ──────────────────────────────────────
+        capital_years = plan_years(as_of_year(2026))
+        st.subheader(f"Multi-Year Capital Plan ({capital_years[0]} – {capital_years[-1]})")
+        st.caption(
+            "Assigns each active device a replacement year under the yearly budget caps below, "
+            "minimizing cumulative at-risk device-years. A device counts as at risk from its EoL "
+            "year until it is replaced, so the plan targets devices as they cross EoL."
+        )
+
+        if "EoL_Year" not in df.columns:
+            st.info("The dataset has no EoL_Year column, so a capital plan cannot be built.")
+        else:
+            plan_fleet = df.loc[~df["Is_Decom"], [
+                "Hostname", "Site_Code", "State", "Risk_Level",
+                "EoL_Year", "Risk_Score", "Total_Replacement_Cost",
+            ]].reset_index(drop=True)
+
+            cap_col, _, plan_col = st.columns([3, 1, 6])
+            with cap_col:
+                caps_df = st.data_editor(
+                    pd.DataFrame({"Year": capital_years, "Budget Cap": [float(annual_budget)] * len(capital_years)}),
+                    key=f"capital_plan_caps_{capital_years[0]}",
+                    hide_index=True,
+                    disabled=["Year"],
+                    column_config={
+                        "Budget Cap": st.column_config.NumberColumn(
+                            "Budget Cap", min_value=0, step=50_000, format="$%d",
+                        ),
+                    },
+                )
+                weight_by_risk = st.checkbox(
+                    "Weight at-risk years by Risk Score", value=True, key="capital_plan_weight",
+                    help="Prioritize high-risk devices instead of counting every device equally.",
+                )
+
+            caps = tuple(float(c) for c in caps_df["Budget Cap"].fillna(0).clip(lower=0))
+            with st.spinner("Optimizing the capital plan..."):
+                capital_plan = plan_capital(
+                    dataset_version(plan_fleet[["EoL_Year", "Risk_Score", "Total_Replacement_Cost"]]),
+                    capital_years, caps, weight_by_risk, plan_fleet,
+                )
+            plan_summary = capital_plan["summary"]
+
+            with plan_col:
+                fig_plan = go.Figure()
+                fig_plan.add_trace(go.Bar(
+                    x=plan_summary["Year"], y=plan_summary["Planned Spend"],
+                    name="Planned Spend", marker_color=COLORS["sky"], opacity=0.35, yaxis="y2",
+                ))
+                fig_plan.add_trace(go.Scatter(
+                    x=plan_summary["Year"], y=plan_summary["At-Risk Devices (No Plan)"],
+                    mode="lines+markers", name="Do Nothing",
+                    line=dict(color=COLORS["crimson"], width=3),
+                ))
+                fig_plan.add_trace(go.Scatter(
+                    x=plan_summary["Year"], y=plan_summary["At-Risk Devices (Plan)"],
+                    mode="lines+markers", name="Capital Plan",
+                    line=dict(color=COLORS["emerald"], width=3),
+                ))
+                fig_plan.update_layout(
+                    **PLOTLY_LAYOUT,
+                    xaxis_title="Year",
+                    yaxis_title="At-Risk Devices",
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+                    hovermode="x unified",
+                )
+                fig_plan.update_layout(
+                    height=420,
+                    yaxis2=dict(title="Planned Spend ($)", overlaying="y", side="right", showgrid=False),
+                )
+                render_plotly_with_download(fig_plan, "multi_year_capital_plan", "pred_capital_plan",
+                                           use_container_width=True, config=PLOTLY_CLEAN)
+
+            avoided = float(
+                (plan_summary["At-Risk Devices (No Plan)"] - plan_summary["At-Risk Devices (Plan)"]).sum()
+            )
+            baseline_years = float(plan_summary["At-Risk Devices (No Plan)"].sum())
+            p1, p2, p3, p4 = st.columns(4)
+            p1.metric("Planned Spend", fmt_currency(plan_summary["Planned Spend"].sum()))
+            p2.metric("Devices Planned", f"{int(plan_summary['Devices Replaced'].sum()):,}")
+            p3.metric("At-Risk Device-Years Avoided", f"{avoided:,.0f}")
+            p4.metric("Reduction vs Do Nothing", f"{avoided / max(baseline_years, 1) * 100:.1f}%")
+
+            render_table_with_download(
+                plan_summary,
+                "capital_plan_by_year",
+                "pred_capital_plan_summary",
+                export_df=plan_summary,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Budget Cap": st.column_config.NumberColumn(format="$%.0f"),
+                    "Planned Spend": st.column_config.NumberColumn(format="$%.0f"),
+                },
+            )
+
+            planned_devices = plan_fleet.assign(Replace_Year=capital_plan["replace_year"])
+            planned_devices = planned_devices[planned_devices["Replace_Year"].notna()].astype({"Replace_Year": int})
+            with st.expander(f"Device Replacement Schedule ({len(planned_devices):,} devices)", expanded=False):
+                planned_devices = planned_devices.sort_values(["Replace_Year", "Risk_Score"], ascending=[True, False])
+                render_table_with_download(
+                    planned_devices.head(1000),
+                    "capital_plan_device_schedule",
+                    "pred_capital_plan_devices",
+                    export_df=planned_devices,
+                    use_container_width=True,
+                    hide_index=True,
+                    height=360,
+                )
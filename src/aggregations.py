@@ -0,0 +1,121 @@
+"""
+Vectorized group-aggregation helpers.
+
+Counting category members or joining strings per group with a Python lambda in
+``groupby().agg()`` calls back into Python once per group, which dominates on
+site- and county-level rollups of large fleets. These helpers express the same
+results as indicator columns, crosstab-style pivots and whole-array string
+joins, so every group is handled in a few vectorized passes.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+Keys = Union[str, List[str]]
+
+HIGH_RISK_LEVELS = ["Critical (Past EoL)", "High (Near EoL)"]
+
+
+def add_indicators(df: pd.DataFrame, column: str, indicators: Dict[str, Iterable]) -> pd.DataFrame:
+    """
+    Return ``df`` with one 0/1 column per entry of ``indicators``.
+
+    Summing an indicator with the built-in ``"sum"`` aggregation replaces
+    ``lambda x: x.isin(values).sum()``.
+
+    Args:
+        df (pd.DataFrame): Source rows.
+        column (str): Column tested for membership.
+        indicators (dict): New column name -> value or values that count as a hit.
+
+    Returns:
+        pd.DataFrame: A copy of ``df`` with the indicator columns added (int32).
+    """
+    source = df[column]
+    flags = {
+        name: source.isin([values] if isinstance(values, str) else list(values)).astype(np.int32)
+        for name, values in indicators.items()
+    }
+    return df.assign(**flags)
+
+
+def crosstab_counts(
+    df: pd.DataFrame, by: Keys, column: str, categories: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Count rows per group and category, one column per category (0 where absent).
+
+    Args:
+        df (pd.DataFrame): Source rows.
+        by (str or list): Grouping column(s), used as the result index.
+        column (str): Categorical column whose values become result columns.
+        categories (list, optional): Columns to return, in order. Defaults to the
+            values present in ``column``.
+    """
+    counts = df.groupby(by, observed=True)[column].value_counts().unstack(fill_value=0)
+    if categories is not None:
+        counts = counts.reindex(columns=categories, fill_value=0)
+    counts.columns.name = None
+    return counts.astype(np.int64)
+
+
+def _join_ordered(codes: np.ndarray, values: np.ndarray, n_groups: int, sep: str) -> np.ndarray:
+    """Join ``values`` per group code; rows must already be in output order within each group."""
+    out = np.full(n_groups, "", dtype=object)
+    if not len(codes):
+        return out
+    order = np.argsort(codes, kind="stable")
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    last = np.r_[starts[1:] - 1, len(codes) - 1]
+    pieces = values + sep
+    pieces[last] = values[last]
+    out[codes[starts]] = np.add.reduceat(pieces, starts)
+    return out
+
+
+def first_n_join(
+    df: pd.DataFrame,
+    by: Keys,
+    column: str,
+    n: int = 5,
+    sep: str = ", ",
+    more: str = "...",
+    sort: bool = True,
+) -> pd.Series:
+    """
+    Join the first ``n`` values of ``column`` per group, in row order.
+
+    Equivalent to ``lambda x: sep.join(x.head(n))`` plus ``more`` appended when a
+    group has more than ``n`` rows. The result is ordered like
+    ``df.groupby(by, sort=sort)``.
+    """
+    grouped = df.groupby(by, sort=sort)
+    sizes = grouped.size()
+    # Rows with a missing key belong to no group (ngroup() gives NaN for them).
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    keep = (grouped.cumcount().to_numpy() < n) & (codes >= 0)
+    values = df[column].astype(str).to_numpy(dtype=object)
+    joined = _join_ordered(codes[keep], values[keep], len(sizes), sep)
+    joined[sizes.to_numpy() > n] += more
+    return pd.Series(joined, index=sizes.index, name=column)
+
+
+def unique_join(df: pd.DataFrame, by: Keys, column: str, sep: str = ", ") -> pd.Series:
+    """
+    Join the sorted distinct values of ``column`` per group.
+
+    Equivalent to ``lambda x: sep.join(sorted(x.unique()))``; the result is indexed
+    by the sorted group keys, like ``df.groupby(by)``. Missing values are skipped.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    index = df.groupby(keys).size().index
+    distinct = df[keys + [column]].dropna().drop_duplicates()
+    distinct = distinct.assign(_value=distinct[column].astype(str)).sort_values("_value", kind="stable")
+    codes = distinct.groupby(keys).ngroup().to_numpy()
+    # ngroup() numbers only the groups that still have values; map back to the full index.
+    present = distinct.groupby(keys).size().index
+    positions = index.get_indexer(present)[codes] if len(codes) else codes
+    joined = _join_ordered(positions, distinct["_value"].to_numpy(dtype=object), len(index), sep)
+    return pd.Series(joined, index=index, name=column)
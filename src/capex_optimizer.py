@@ -0,0 +1,218 @@
+"""
+Budget-constrained replacement selection that maximizes total risk reduction.
+
+The Budget Impact Simulator's ranking takes devices in descending Risk_Score
+until the running cost passes the budget, so one expensive device near the top
+can crowd out many cheaper high-risk ones. This module solves the underlying
+0/1 knapsack instead (value = Risk_Score, weight = replacement cost):
+
+* ``knapsack_dp``: DP over costs rounded up to ``budget / buckets`` units, so
+  every solution it returns is feasible at true cost. The rounding makes it
+  approximate: it can skip affordable devices and leave budget unspent.
+* ``ratio_greedy``: risk-per-dollar first-fit plus a swap repair pass; it runs
+  in O(n log n) and is used for fleets too large for the DP table.
+
+The DP always runs at the finest resolution its choice table allows
+(``MAX_DP_CELLS``), and the better of its answer and the greedy one is kept.
+
+With site bundling, every candidate device at a site is replaced together and
+the knapsack runs over sites.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+METHOD_AUTO = "Auto"
+METHOD_DP = "Bucketed DP"
+METHOD_GREEDY = "Ratio greedy + repair"
+METHODS = [METHOD_AUTO, METHOD_DP, METHOD_GREEDY]
+
+DEFAULT_BUCKETS = 1_000
+
+# Largest DP choice table (items x cost buckets), and the finest cost
+# resolution the DP uses.
+MAX_DP_CELLS = 40_000_000
+MAX_BUCKETS = 10_000
+
+# Unselected items tried by the swap repair pass, highest risk first.
+REPAIR_CANDIDATES = 200
+
+
+def ranking_prefix(cost: np.ndarray, value: np.ndarray, budget: float) -> np.ndarray:
+    """
+    The current simulator rule: descending value, stop at the first device
+    that no longer fits. Returns the selected item indices.
+    """
+    order = np.argsort(-value, kind="stable")
+    k = int(np.searchsorted(np.cumsum(cost[order]), budget, side="right"))
+    return order[:k]
+
+
+def _first_fit(order: np.ndarray, cost: np.ndarray, budget: float) -> np.ndarray:
+    """Take items in ``order``, skipping any that no longer fit."""
+    chosen, remaining, idx = [], float(budget), order
+    while len(idx):
+        idx = idx[cost[idx] <= remaining]
+        if not len(idx):
+            break
+        spent = np.cumsum(cost[idx])
+        k = int(np.searchsorted(spent, remaining, side="right"))
+        chosen.append(idx[:k])
+        if k:
+            remaining -= float(spent[k - 1])
+        # Item k did not fit and the remaining budget only shrinks.
+        idx = idx[k + 1:]
+    return np.concatenate(chosen) if chosen else np.zeros(0, dtype=np.int64)
+
+
+def ratio_greedy(cost: np.ndarray, value: np.ndarray, budget: float) -> np.ndarray:
+    """
+    Risk-per-dollar first-fit, then repair: swap the weakest selected items for
+    a high-value unselected one when that gains risk, and fall back to the best
+    single item when it alone beats the fill. Returns selected item indices.
+    """
+    n = len(cost)
+    free = cost <= 0
+    ratio = np.where(free, np.inf, value / np.where(free, 1.0, cost))
+    order = np.argsort(-ratio, kind="stable")
+    selected = np.zeros(n, dtype=bool)
+    selected[_first_fit(order, cost, budget)] = True
+
+    spent = float(cost[selected].sum())
+    # Selected items ordered weakest (lowest ratio) first; swaps drop a prefix of
+    # what is left of this list, so running sums answer "how much must go" by bisection.
+    chosen = np.flatnonzero(selected & ~free)
+    weakest = chosen[np.argsort(ratio[chosen], kind="stable")]
+    freed, lost = np.cumsum(cost[weakest]), np.cumsum(value[weakest])
+    dropped = 0
+    candidates = np.flatnonzero(~selected & (cost <= budget))
+    candidates = candidates[np.argsort(-value[candidates], kind="stable")][:REPAIR_CANDIDATES]
+    for j in candidates:
+        need = cost[j] - (budget - spent)
+        if need <= 0:
+            selected[j] = True
+            spent += cost[j]
+            continue
+        freed_before = freed[dropped - 1] if dropped else 0.0
+        lost_before = lost[dropped - 1] if dropped else 0.0
+        last = int(np.searchsorted(freed, freed_before + need, side="left"))
+        if last >= len(weakest):
+            continue
+        if value[j] > lost[last] - lost_before:
+            selected[weakest[dropped:last + 1]] = False
+            selected[j] = True
+            spent += cost[j] - (freed[last] - freed_before)
+            dropped = last + 1
+    # Top up whatever budget the swaps left.
+    rest = order[~selected[order]]
+    selected[_first_fit(rest, cost, budget - spent)] = True
+
+    fits = np.flatnonzero(cost <= budget)
+    if len(fits):
+        best = fits[np.argmax(value[fits])]
+        if value[best] > value[selected].sum():
+            selected[:] = False
+            selected[best] = True
+    return np.flatnonzero(selected)
+
+
+def knapsack_dp(
+    cost: np.ndarray, value: np.ndarray, budget: float, buckets: int = DEFAULT_BUCKETS
+) -> np.ndarray:
+    """
+    0/1 knapsack over costs rounded *up* to ``budget / buckets`` units, so the
+    chosen set never exceeds the true budget. Returns selected item indices.
+    """
+    free = cost <= 0
+    if budget <= 0:
+        return np.flatnonzero(free)
+    unit = budget / buckets
+    weight = np.ceil(cost / unit - 1e-9).astype(np.int64)
+    items = np.flatnonzero(~free & (weight <= buckets))
+    best = np.zeros(buckets + 1)
+    take = np.zeros((len(items), buckets + 1), dtype=bool)
+    for row, i in enumerate(items):
+        w = weight[i]
+        candidate = best[:buckets + 1 - w] + value[i]
+        better = candidate > best[w:]
+        take[row, w:] = better
+        best[w:] = np.where(better, candidate, best[w:])
+    chosen = []
+    capacity = buckets
+    for row in range(len(items) - 1, -1, -1):
+        if take[row, capacity]:
+            chosen.append(items[row])
+            capacity -= weight[items[row]]
+    return np.sort(np.r_[np.flatnonzero(free), np.array(chosen, dtype=np.int64)])
+
+
+def _solve(cost: np.ndarray, value: np.ndarray, budget: float, method: str, buckets: int) -> tuple:
+    greedy = ratio_greedy(cost, value, budget)
+    if method == METHOD_GREEDY:
+        return greedy, method
+    # Run the DP at the finest resolution the table allows and keep the better
+    # answer (cost rounding can cost the DP more than greedy loses). "Auto"
+    # skips a DP coarser than ``buckets``; an explicit DP runs at any resolution.
+    finest = min(MAX_DP_CELLS // max(len(cost), 1) - 1, MAX_BUCKETS)
+    if finest < (buckets if method == METHOD_AUTO else 1):
+        return greedy, METHOD_GREEDY
+    bucketed = knapsack_dp(cost, value, budget, finest)
+    if value[bucketed].sum() >= value[greedy].sum():
+        return bucketed, METHOD_DP
+    return greedy, METHOD_GREEDY
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def optimize_budget(
+    version: str,
+    budget: float,
+    method: str = METHOD_AUTO,
+    bundle_sites: bool = False,
+    buckets: int = DEFAULT_BUCKETS,
+    _fleet: pd.DataFrame = None,
+) -> Dict[str, object]:
+    """
+    Devices to replace within ``budget`` so as to maximize total Risk_Score.
+
+    Args:
+        version (str): Cache key identifying ``_fleet`` (see ``subset_version``).
+        budget (float): Spend limit.
+        method (str): One of ``METHODS``. The DP methods run the greedy and the
+            finest DP whose choice table fits in ``MAX_DP_CELLS``, and keep the
+            better selection; "Auto" skips a DP coarser than ``buckets``.
+        bundle_sites (bool): Replace all of a site's devices together.
+        buckets (int): Minimum DP cost resolution under "Auto".
+        _fleet (pd.DataFrame): In-scope devices with Site_Code, Risk_Score and
+            Total_Replacement_Cost.
+
+    Returns:
+        dict: ``rows`` (positions in ``_fleet``, highest risk first), ``cost``,
+        ``risk``, ``method`` actually used, and the ranking baseline's
+        ``baseline_rows``, ``baseline_cost`` and ``baseline_risk``.
+    """
+    cost = _fleet["Total_Replacement_Cost"].to_numpy(dtype=float)
+    risk = _fleet["Risk_Score"].to_numpy(dtype=float)
+    baseline = ranking_prefix(cost, risk, budget)
+
+    if bundle_sites:
+        codes, _ = pd.factorize(_fleet["Site_Code"].astype(str))
+        n_sites = codes.max() + 1 if len(codes) else 0
+        site_cost = np.bincount(codes, weights=cost, minlength=n_sites)
+        site_risk = np.bincount(codes, weights=risk, minlength=n_sites)
+        sites, used = _solve(site_cost, site_risk, budget, method, buckets)
+        rows = np.flatnonzero(np.isin(codes, sites))
+    else:
+        rows, used = _solve(cost, risk, budget, method, buckets)
+
+    rows = rows[np.argsort(-risk[rows], kind="stable")]
+    return {
+        "rows": rows,
+        "cost": float(cost[rows].sum()),
+        "risk": float(risk[rows].sum()),
+        "method": used,
+        "baseline_rows": baseline,
+        "baseline_cost": float(cost[baseline].sum()),
+        "baseline_risk": float(risk[baseline].sum()),
+    }
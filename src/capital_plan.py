@@ -0,0 +1,114 @@
+"""
+Multi-year capital plan aligned to device EoL waves.
+
+Each in-scope device is assigned a replacement year in the planning horizon
+(``plan_years``, starting at the as-of year) or left unplanned, under per-year
+budget caps, minimizing cumulative at-risk device-years. A device is at risk in
+year ``y`` once its EoL_Year is ``<= y`` until the year it is replaced, so
+replacing device ``i`` in year ``t`` saves ``last_year - max(t, EoL_i) + 1``
+at-risk years (optionally weighted by Risk_Score).
+
+That benefit never grows as the replacement moves later: it is flat up to the
+device's EoL year and then drops by the device's weight every year it waits.
+So the plan is built one year at a time. Each year's cap first goes to devices
+already past EoL, whose every year of delay costs their weight, with the
+risk-per-dollar greedy from ``src.capex_optimizer``; whatever it cannot spend
+pre-buys devices reaching EoL later in the horizon, at no loss to them and
+freeing those later years' caps. Cost is a few greedy passes per year, linear
+in the fleet, instead of an LP over every (device, year) pair.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.capex_optimizer import ratio_greedy
+
+PLAN_HORIZON_YEARS = 7
+
+
+def plan_years(start_year: int) -> List[int]:
+    """The capital plan's years, from ``start_year`` (the as-of year) on."""
+    return list(range(start_year, start_year + PLAN_HORIZON_YEARS))
+
+
+def at_risk_by_year(
+    eol_year: np.ndarray, replace_year: np.ndarray, weight: np.ndarray, years: Sequence[int]
+) -> np.ndarray:
+    """
+    (Weighted) devices at risk in each of ``years``: past EoL and not yet
+    replaced. ``replace_year`` is NaN for devices left unplanned.
+    """
+    years = np.asarray(years, dtype=float)[:, None]
+    replaced = np.where(np.isnan(replace_year), np.inf, replace_year)[None, :]
+    at_risk = (eol_year[None, :] <= years) & (years < replaced)
+    return at_risk.astype(float) @ weight
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def plan_capital(
+    version: str, years: Sequence[int], caps: Sequence[float], weight_by_risk: bool, _fleet: pd.DataFrame
+) -> Dict[str, object]:
+    """
+    Replacement year for every device under yearly budget caps.
+
+    Args:
+        version (str): Cache key identifying ``_fleet`` (see ``dataset_version``).
+        years (Sequence[int]): Consecutive plan years (see ``plan_years``).
+        caps (Sequence[float]): Budget cap for each of ``years``.
+        weight_by_risk (bool): Weight at-risk years by Risk_Score instead of counting devices.
+        _fleet (pd.DataFrame): In-scope devices with EoL_Year, Risk_Score and
+            Total_Replacement_Cost.
+
+    Returns:
+        dict: ``replace_year`` (float array aligned to ``_fleet``, NaN = unplanned),
+        ``summary`` (per-year cap, spend, devices replaced and at-risk devices with
+        and without the plan) and ``status`` (one-line outcome).
+    """
+    caps = np.asarray(caps, dtype=float)
+    years = np.asarray(years)
+    last = years[-1]
+    eol = pd.to_numeric(_fleet["EoL_Year"], errors="coerce").to_numpy(dtype=float)
+    cost = _fleet["Total_Replacement_Cost"].to_numpy(dtype=float)
+    weight = _fleet["Risk_Score"].to_numpy(dtype=float) if weight_by_risk else np.ones(len(_fleet))
+    replace_year = np.full(len(_fleet), np.nan)
+
+    # Only devices that reach EoL inside the horizon can save at-risk years.
+    open_ = np.flatnonzero(np.isfinite(eol) & (eol <= last) & (weight > 0))
+    for t, year in enumerate(years):
+        remaining = caps[t]
+        # Past EoL: replacing now rather than next year saves ``weight`` at-risk years.
+        due = open_[eol[open_] <= year]
+        # Not yet at EoL: replacing now saves as much as waiting for EoL, and frees that year's cap.
+        early = open_[eol[open_] > year]
+        for pool in (due, early):
+            if not len(pool) or remaining <= 0:
+                continue
+            gain = weight[pool] * (last - np.maximum(year, eol[pool]) + 1)
+            picked = pool[ratio_greedy(cost[pool], gain, remaining)]
+            replace_year[picked] = year
+            remaining -= cost[picked].sum()
+        open_ = open_[np.isnan(replace_year[open_])]
+
+    n_planned = int(np.isfinite(replace_year).sum())
+    status = (
+        f"{n_planned:,} devices planned; {len(open_):,} reaching EoL by {last} left unplanned."
+        if n_planned else "No device can be replaced under these caps."
+    )
+
+    planned = np.isfinite(replace_year)
+    year_idx = np.searchsorted(years, replace_year[planned]).astype(np.int64)
+    ones = np.ones(len(_fleet))
+    summary = pd.DataFrame({
+        "Year": years,
+        "Budget Cap": caps,
+        "Planned Spend": np.bincount(year_idx, weights=cost[planned], minlength=len(years)),
+        "Devices Replaced": np.bincount(year_idx, minlength=len(years)),
+        "At-Risk Devices (No Plan)": at_risk_by_year(eol, np.full(len(_fleet), np.nan), ones, years),
+        "At-Risk Devices (Plan)": at_risk_by_year(eol, replace_year, ones, years),
+    })
+    if weight_by_risk:
+        summary["At-Risk Risk Score (No Plan)"] = at_risk_by_year(eol, np.full(len(_fleet), np.nan), weight, years)
+        summary["At-Risk Risk Score (Plan)"] = at_risk_by_year(eol, replace_year, weight, years)
+    return {"replace_year": replace_year, "summary": summary, "status": status}
@@ -1,14 +1,23 @@
+import datetime
+import hashlib
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 from typing import Optional
 
+from src.geo_boundaries import COORD_CHECK_COLUMNS, COORD_STATUS_COLUMNS, verify_coordinates
+from src.lifecycle import AS_OF_STATE_KEY, apply_as_of, lifecycle_as_of, lifecycle_inputs, snapshot_date
+
 _LOGO_PATH = os.path.join(os.path.dirname(__file__), "assets", "southern-company-logo-0.png")
 
 # @st.cache_data # Removed to allow dynamic reloading from session state
 def load_data(file_path: Optional[str] = None) -> pd.DataFrame:
     """
     Loads data from a parquet or csv file, utilizing caching for performance.
+
+    Ingest checks (see ``add_ingest_checks``) run once per file version or
+    uploaded dataset, not on every page render.
     
     Args:
         file_path (str, optional): The path to the dataset.
@@ -21,6 +30,7 @@ def load_data(file_path: Optional[str] = None) -> pd.DataFrame:
 
     # If the user has uploaded a custom dataset via the Data Entry tab, use it
     if "uploaded_dataset" in st.session_state and st.session_state["uploaded_dataset"] is not None:
+        st.session_state["uploaded_dataset"] = add_ingest_checks(st.session_state["uploaded_dataset"])
         return st.session_state["uploaded_dataset"]
 
     # For scaffolding, return an empty placeholder if the file doesn't exist
@@ -28,12 +38,54 @@ def load_data(file_path: Optional[str] = None) -> pd.DataFrame:
         st.warning(f"Data file not found at {file_path}. Using placeholder data.")
         return get_placeholder_data()
 
+    if not file_path.endswith(('.parquet', '.csv')):
+        raise ValueError("Unsupported file format. Please use .csv or .parquet")
+    return _read_dataset(file_path, os.path.getmtime(file_path))
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _read_dataset(file_path: str, mtime: float) -> pd.DataFrame:
+    """Reads a dataset file and runs the ingest checks, once per modification time."""
+    _ = mtime
     if file_path.endswith('.parquet'):
-        return pd.read_parquet(file_path)
-    elif file_path.endswith('.csv'):
-        return pd.read_csv(file_path)
+        df = pd.read_parquet(file_path)
     else:
-        raise ValueError("Unsupported file format. Please use .csv or .parquet")
+        df = pd.read_csv(file_path)
+    return add_ingest_checks(df)
+
+def add_ingest_checks(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns ``df`` with the ingest-time coordinate check (``Coord_Status`` and
+    ``Located_State``, see ``verify_coordinates``) when it has State and
+    coordinates. Mismatches are only flagged; no rows are dropped. A frame
+    that already carries the columns is returned as is.
+    """
+    if not all(c in df.columns for c in COORD_CHECK_COLUMNS):
+        return df
+    if all(c in df.columns for c in COORD_STATUS_COLUMNS):
+        return df
+    return df.drop(columns=COORD_STATUS_COLUMNS, errors="ignore").join(verify_coordinates(df[COORD_CHECK_COLUMNS]))
+
+def dataset_version(df: pd.DataFrame) -> str:
+    """
+    Returns a short content hash identifying this version of the dataset.
+
+    Used as the cache key for expensive derived structures so they are rebuilt
+    only when the underlying rows (or the active filters) actually change.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def subset_version(version: str, mask: np.ndarray) -> str:
+    """
+    Returns a short hash identifying a boolean row subset of a dataset version
+    (e.g. the fleet left in scope after exceptions), without re-hashing the rows.
+    """
+    digest = hashlib.sha1(version.encode("utf-8"))
+    digest.update(np.packbits(np.asarray(mask, dtype=bool)).tobytes())
+    digest.update(str(len(mask)).encode("utf-8"))
+    return digest.hexdigest()[:16]
 
 def get_placeholder_data() -> pd.DataFrame:
     """
@@ -47,17 +99,44 @@ def get_placeholder_data() -> pd.DataFrame:
     }
     return pd.DataFrame(data)
 
+def _as_of_control(df: pd.DataFrame) -> Optional[datetime.date]:
+    """
+    Renders the sidebar as-of date and returns it, or None when it is the
+    dataset's own snapshot date. The choice is kept in session state so every
+    page evaluates the fleet on the same date.
+    """
+    if not lifecycle_inputs(df):
+        return None
+    snapshot = snapshot_date(df).astype(datetime.date)
+    chosen = st.sidebar.date_input(
+        "As-of Date",
+        value=st.session_state.get(AS_OF_STATE_KEY) or snapshot,
+        min_value=datetime.date(2000, 1, 1),
+        max_value=datetime.date(2045, 12, 31),
+        help=f"Recomputes days past EoL/EoS, support status, risk level and risk score for this date. "
+             f"The dataset snapshot is {snapshot:%b %d, %Y}.",
+    )
+    st.session_state[AS_OF_STATE_KEY] = None if chosen == snapshot else chosen
+    return st.session_state[AS_OF_STATE_KEY]
+
+
 def apply_global_filters(df: pd.DataFrame) -> pd.DataFrame:
     """
     Renders sidebar multiselect filters for State and Device Type,
     then returns a filtered copy of the dataframe.
     Empty selections mean 'show all'.
+
+    When an as-of date other than the dataset snapshot is chosen, the copy's
+    lifecycle columns (Days_Past_EoL, Days_Past_EoS, Support_Status,
+    Risk_Level and Risk_Score) are recomputed for that date before filtering.
     """
     st.sidebar.markdown(
         "<h3 style='margin: 0 0 2px 0; font-size: 0.95rem;'>⚙️ Global Controls</h3>",
         unsafe_allow_html=True,
     )
 
+    as_of = _as_of_control(df)
+
     if "State" in df.columns:
         all_states = sorted(df["State"].dropna().unique().tolist())
         selected_states = st.sidebar.multiselect(
@@ -104,6 +183,10 @@ def apply_global_filters(df: pd.DataFrame) -> pd.DataFrame:
 
     filtered_df = df.copy()
 
+    if as_of is not None:
+        inputs = df[lifecycle_inputs(df)]
+        apply_as_of(filtered_df, lifecycle_as_of(dataset_version(inputs), as_of, inputs))
+
     if selected_states:
         filtered_df = filtered_df[filtered_df["State"].isin(selected_states)]
 
@@ -0,0 +1,206 @@
+"""
+Persistent, bidirectional deck.gl map component.
+
+Unlike ``components.html``, the component iframe survives reruns: the deck.gl
+instance, WebGL context and camera are kept, and each layer's binary buffers are
+shipped only when that layer's data version changes. The component value reports
+the last clicked object (``click``), any layers whose buffers the browser is
+missing and the camera (``view``). Panning and zooming stay in the browser: the
+camera is only sent back when the zoom crosses one of ``report_zooms``, the
+points where the server would render something different.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import streamlit as st
+import streamlit.components.v1 as components
+
+from src.map_assets import (
+    CDN_FALLBACK_ENV, MAP_LIBRARIES, PINNED_ASSETS, asset_url, missing_assets, offline_basemap_style,
+)
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "assets", "deck_map")
+_deck_map_component = components.declare_component("deck_map", path=_FRONTEND_DIR)
+
+# A zoom that crosses a report threshold is sent once the view has been still for this long.
+VIEW_DEBOUNCE_MS = 600
+
+
+def map_layer(
+    layer_id: str,
+    layer_type: str,
+    version: str,
+    *,
+    attributes: Dict[str, np.ndarray],
+    props: Optional[Dict[str, Any]] = None,
+    fields: Optional[Dict[str, np.ndarray]] = None,
+    labels: Optional[Dict[str, List[str]]] = None,
+    lookups: Optional[Dict[str, List[str]]] = None,
+    tooltip: Optional[str] = None,
+    scale_radius: bool = False,
+    data_url: Optional[str] = None,
+    image: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    Describe one deck.gl layer backed by binary attribute buffers.
+
+    Args:
+        layer_id (str): Stable deck.gl layer id.
+        layer_type (str): deck.gl layer class, e.g. ``"ColumnLayer"``.
+        version (str): Data version; buffers are re-sent only when it changes.
+        attributes (dict): deck.gl accessor name -> array of shape (N,) or (N, size),
+            e.g. ``{"getPosition": float32 (N, 2), "getFillColor": uint8 (N, 4)}``.
+        props (dict, optional): Static JSON layer props (radius, pickable, ...).
+        fields (dict, optional): Extra numeric per-row arrays used by the tooltip.
+        labels (dict, optional): Per-row string arrays used by the tooltip.
+        lookups (dict, optional): Field name -> list mapping integer codes to labels.
+        tooltip (str, optional): HTML template with ``{field}`` / ``{field:$}`` placeholders.
+        scale_radius (bool): Apply inverse zoom scaling to the ``radius`` prop.
+        data_url (str, optional): Static GeoJSON the layer draws (e.g. ``asset_url("us_counties")``).
+            The browser fetches it once; ``attributes`` then hold one row per feature,
+            in file order, and only those values are shipped on each update.
+        image (np.ndarray, optional): RGBA uint8 image of shape (H, W, 4) for a
+            ``BitmapLayer``, shipped in the binary payload like any other buffer.
+    """
+    lengths = {len(a) for a in list(attributes.values()) + list((fields or {}).values())}
+    if len(lengths) > 1:
+        raise ValueError(f"Layer '{layer_id}' arrays have mismatched lengths: {sorted(lengths)}")
+    return {
+        "id": layer_id,
+        "type": layer_type,
+        "version": version,
+        "props": props or {},
+        "attributes": attributes,
+        "fields": fields or {},
+        "labels": labels or {},
+        "lookups": lookups or {},
+        "tooltip": tooltip,
+        "scaleRadius": scale_radius,
+        "dataUrl": data_url,
+        "image": image,
+        "length": lengths.pop() if lengths else 0,
+    }
+
+
+def _pack_layers(layers: List[dict], send_ids: set) -> tuple:
+    """Split layer specs into JSON specs plus one packed byte payload for ``send_ids``."""
+    chunks: List[bytes] = []
+    offset = 0
+    specs = []
+    for layer in layers:
+        spec = {
+            k: v for k, v in layer.items()
+            if k not in ("attributes", "fields", "labels", "length", "image")
+        }
+        if layer["id"] in send_ids:
+            spec["length"] = layer["length"]
+            spec["labels"] = layer["labels"]
+            for group in ("attributes", "fields"):
+                refs = {}
+                for name, values in layer[group].items():
+                    arr = np.ascontiguousarray(values)
+                    data = arr.tobytes()
+                    refs[name] = {
+                        "dtype": arr.dtype.name,
+                        "size": int(arr.shape[1]) if arr.ndim > 1 else 1,
+                        "offset": offset,
+                        "byteLength": len(data),
+                    }
+                    chunks.append(data)
+                    offset += len(data)
+                spec[group] = refs
+            if layer["image"] is not None:
+                data = np.ascontiguousarray(layer["image"], dtype=np.uint8).tobytes()
+                spec["image"] = {
+                    "height": int(layer["image"].shape[0]),
+                    "width": int(layer["image"].shape[1]),
+                    "offset": offset,
+                    "byteLength": len(data),
+                }
+                chunks.append(data)
+                offset += len(data)
+        specs.append(spec)
+    return specs, b"".join(chunks)
+
+
+def deck_map(
+    layers: List[dict],
+    view: Dict[str, float],
+    *,
+    key: str,
+    view_token: Optional[str] = None,
+    report_zooms: Optional[List[float]] = None,
+    legend: Optional[dict] = None,
+    height: int = 550,
+) -> Optional[dict]:
+    """
+    Render (or update in place) the persistent deck.gl map.
+
+    Args:
+        layers (list): Layer specs from ``map_layer``.
+        view (dict): Camera (latitude, longitude, zoom, pitch, bearing) applied on first
+            render and whenever ``view_token`` changes.
+        key (str): Widget key; must be stable for the iframe to persist.
+        view_token (str, optional): Change it to move the camera to ``view`` (e.g. on a new filter).
+        report_zooms (list, optional): Zoom thresholds the server-side rendering depends on.
+            The camera is reported (and the page reruns) only when the zoom crosses one;
+            without thresholds it is never reported.
+        legend (dict, optional): ``{"title": str, "items": [{"label": str, "color": css}]}``.
+        height (int): Frame height in pixels.
+
+    Returns:
+        dict or None: ``{"view": {...}, "click": {...}, ...}`` once the map has reported back;
+        ``view`` is the camera as of the last report, not necessarily the current one.
+        None, with an error in place of the map, when a map library is not vendored
+        (and ``CDN_FALLBACK_ENV`` does not allow the CDN).
+    """
+    missing = missing_assets(MAP_LIBRARIES)
+    if missing:
+        files = ", ".join(f"`static/{PINNED_ASSETS[k][0]}`" for k in missing)
+        if any(asset_url(k) is None for k in missing):
+            st.error(
+                f"Map libraries are not vendored: {files}. Run `python -m src.map_assets` on a "
+                f"connected machine to vendor them, or set `{CDN_FALLBACK_ENV}=1` to load them "
+                "from the CDN."
+            )
+            return None
+        urls = ", ".join(PINNED_ASSETS[k][1] for k in missing)
+        st.caption(f"⚠️ {CDN_FALLBACK_ENV}=1: loading {urls}; this map needs internet access.")
+    frontend = st.session_state.get(key)
+    sent_key = f"_{key}_sent_versions"
+    seq_key = f"_{key}_missing_seq"
+
+    if frontend is None:
+        # Fresh iframe (first run or remount after navigation): it holds no buffers yet.
+        sent: Dict[str, str] = {}
+        st.session_state[seq_key] = 0
+    else:
+        sent = dict(st.session_state.get(sent_key, {}))
+        if frontend.get("missing_seq", 0) > st.session_state.get(seq_key, 0):
+            st.session_state[seq_key] = frontend["missing_seq"]
+            for layer_id in frontend.get("missing", []):
+                sent.pop(layer_id, None)
+
+    send_ids = {layer["id"] for layer in layers if sent.get(layer["id"]) != layer["version"]}
+    specs, payload = _pack_layers(layers, send_ids)
+    st.session_state[sent_key] = {layer["id"]: layer["version"] for layer in layers}
+
+    return _deck_map_component(
+        layers=specs,
+        payload=payload,
+        view=view,
+        view_token=view_token or "",
+        legend=legend,
+        map_style=offline_basemap_style(),
+        assets={
+            "deck_js": asset_url("deck_js"),
+            "maplibre_js": asset_url("maplibre_js"),
+            "maplibre_css": asset_url("maplibre_css"),
+        },
+        report_zooms=sorted(report_zooms or []),
+        view_debounce_ms=VIEW_DEBOUNCE_MS,
+        height=height,
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,189 @@
+"""
+Rule-based bulk scope exceptions, evaluated as vectorized masks.
+
+A rule is a list of column predicates that must all hold, plus a reason and an
+optional expiry date, e.g. "Device Type is one of [Voice Gateway]" and
+"Decom_Site is one of [True]". Categorical columns are factorized once per
+dataset version, with an inverted list of rows per distinct value, so a
+membership predicate is a lookup over integer codes and a rule naming a few
+sites or models touches only the rows it matches. Hundreds of rules evaluate
+over the whole fleet in milliseconds.
+
+Predicate format: ``{"column": str, "op": str, "value": list | float}``.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Columns rules may test, when present in the fleet.
+RULE_COLUMNS = [
+    "Site_Code", "State", "PhysicalAddressCounty", "City", "Owner",
+    "Device Type", "Model", "Risk_Level", "Support_Status", "Is_Decom", "Decom_Site",
+    "Risk_Score", "Total_Replacement_Cost",
+]
+NUMERIC_RULE_COLUMNS = ["Risk_Score", "Total_Replacement_Cost"]
+
+CATEGORICAL_OPS = ["is one of", "is not one of"]
+TEXT_OPS = ["contains"]
+NUMERIC_OPS = [">=", "<="]
+
+
+class _Column(NamedTuple):
+    """A rule column prepared for fast predicate evaluation."""
+    codes: Optional[np.ndarray]       # categorical: int32 code per row
+    uniques: Optional[pd.Index]       # categorical: distinct values (as strings)
+    positions: Optional[Dict[str, int]]  # categorical: distinct value -> code
+    order: Optional[np.ndarray]       # categorical: row numbers grouped by code
+    offsets: Optional[np.ndarray]     # categorical: order[offsets[c]:offsets[c + 1]] has code c
+    numbers: Optional[np.ndarray]     # numeric: float value per row
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _prepared(version: str, _fleet: pd.DataFrame) -> Dict[str, _Column]:
+    """Per-column codes, inverted row lists and numeric arrays for one fleet version."""
+    _ = version
+    columns = {}
+    for column in RULE_COLUMNS:
+        if column not in _fleet.columns:
+            continue
+        if column in NUMERIC_RULE_COLUMNS:
+            numbers = pd.to_numeric(_fleet[column], errors="coerce").to_numpy(dtype=float)
+            columns[column] = _Column(None, None, None, None, None, numbers)
+            continue
+        values = _fleet[column]
+        if values.dtype == bool:
+            values = values.astype(str)
+        codes, uniques = pd.factorize(values.astype("string").fillna(""), sort=False)
+        codes = codes.astype(np.int32)
+        order = np.argsort(codes, kind="stable").astype(np.int64)
+        offsets = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(uniques)))]
+        uniques = pd.Index(uniques.astype(str))
+        positions = {value: code for code, value in enumerate(uniques)}
+        columns[column] = _Column(codes, uniques, positions, order, offsets, None)
+    return columns
+
+
+def _member_codes(col: _Column, values) -> np.ndarray:
+    """Codes of the listed values that occur in a categorical column."""
+    codes = (col.positions.get(str(v)) for v in values)
+    return np.fromiter((c for c in codes if c is not None), dtype=np.int64)
+
+
+def _lookup(col: _Column, op: str, value) -> np.ndarray:
+    """Boolean lookup over a categorical column's distinct values."""
+    if op in ("is one of", "is not one of"):
+        hit = np.zeros(len(col.uniques), dtype=bool)
+        hit[_member_codes(col, value)] = True
+        return ~hit if op == "is not one of" else hit
+    if op == "contains":
+        return np.asarray(col.uniques.str.contains(str(value), case=False, regex=False), dtype=bool)
+    raise ValueError(f"Unsupported rule operator: {op}")
+
+
+def _test(col: _Column, predicate: dict, rows: np.ndarray) -> np.ndarray:
+    """Boolean result of ``predicate`` for the given row numbers."""
+    op, value = predicate["op"], predicate["value"]
+    if op in NUMERIC_OPS:
+        if col.numbers is None:
+            raise ValueError(f"{predicate['column']} is not numeric")
+        numbers = col.numbers[rows]
+        with np.errstate(invalid="ignore"):
+            return numbers >= float(value) if op == ">=" else numbers <= float(value)
+    if col.codes is None:
+        raise ValueError(f"{predicate['column']} is numeric; use {' or '.join(NUMERIC_OPS)}")
+    return _lookup(col, op, value)[col.codes[rows]]
+
+
+def _seed_rows(col: _Column, predicate: dict) -> np.ndarray:
+    """Row numbers matching an "is one of" predicate, read off the inverted lists."""
+    matched = _member_codes(col, predicate["value"])
+    if not len(matched):
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate([col.order[col.offsets[c]:col.offsets[c + 1]] for c in matched]))
+
+
+def compile_rules(version: str, fleet: pd.DataFrame) -> Callable[[dict], np.ndarray]:
+    """
+    Return a function mapping a rule to the (sorted) fleet row numbers it matches.
+
+    The most selective "is one of" predicate supplies the candidate rows straight
+    from its inverted lists; the remaining predicates only filter those candidates,
+    so a rule naming a few sites or models costs time proportional to its matches
+    rather than to the fleet size.
+    """
+    columns = _prepared(version, fleet)
+    n_rows = len(fleet)
+
+    def rule_rows(rule: dict) -> np.ndarray:
+        predicates = list(rule["predicates"])
+        if any(p["column"] not in columns for p in predicates):
+            return np.zeros(0, dtype=np.int64)
+        # Seed from the "is one of" predicate with the fewest matching rows.
+        seed, seed_size = None, n_rows + 1
+        for i, p in enumerate(predicates):
+            col = columns[p["column"]]
+            if p["op"] == "is one of" and col.codes is not None:
+                matched = _member_codes(col, p["value"])
+                size = int((col.offsets[matched + 1] - col.offsets[matched]).sum())
+                if size < seed_size:
+                    seed, seed_size = i, size
+        if seed is not None:
+            first = predicates.pop(seed)
+            rows = _seed_rows(columns[first["column"]], first)
+        else:
+            rows = np.arange(n_rows, dtype=np.int64)
+        for predicate in predicates:
+            if not len(rows):
+                break
+            rows = rows[_test(columns[predicate["column"]], predicate, rows)]
+        return rows
+
+    return rule_rows
+
+
+def rule_mask(rows: np.ndarray, n_rows: int) -> np.ndarray:
+    """Boolean mask of length ``n_rows`` that is True at ``rows``."""
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[rows] = True
+    return mask
+
+
+def is_active(rule: dict, today: Optional[pd.Timestamp] = None) -> bool:
+    """A rule applies until the end of its expiry date (or forever without one)."""
+    if not rule.get("expires"):
+        return True
+    today = (today or pd.Timestamp.now()).normalize()
+    return pd.Timestamp(rule["expires"]).normalize() >= today
+
+
+def rules_mask(
+    version: str, fleet: pd.DataFrame, rules: List[dict], today: Optional[pd.Timestamp] = None
+) -> Tuple[np.ndarray, Dict[int, int]]:
+    """
+    Combined mask of fleet rows excluded by any active rule.
+
+    Returns:
+        tuple: (boolean mask over ``fleet``, rule id -> number of rows it matches).
+    """
+    rule_rows = compile_rules(version, fleet)
+    excluded = np.zeros(len(fleet), dtype=bool)
+    matches: Dict[int, int] = {}
+    for rule in rules:
+        if not is_active(rule, today):
+            matches[rule["id"]] = 0
+            continue
+        rows = rule_rows(rule)
+        matches[rule["id"]] = len(rows)
+        excluded[rows] = True
+    return excluded, matches
+
+
+def describe_rule(rule: dict) -> str:
+    """Human-readable summary of a rule's predicates."""
+    parts = []
+    for p in rule["predicates"]:
+        value = ", ".join(map(str, p["value"])) if isinstance(p["value"], list) else p["value"]
+        parts.append(f"{p['column']} {p['op']} {value}")
+    return " AND ".join(parts)
@@ -0,0 +1,302 @@
+"""
+SQLite-backed store for investment scope exceptions.
+
+Replaces the old ``dataset/exceptions.json`` file, which was rewritten whole on
+every change with no locking. Exceptions live in an indexed table (single
+hostnames, plus bulk rules evaluated by ``src.exception_rules``), every change
+is appended to an audit log (who / when / reason), and writes are batched into
+single transactions. The database runs in WAL mode so readers never block the
+writer, and a monotonically increasing store version lets pages keep the
+excepted hostname set cached until something actually changes.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "exceptions.db")
+LEGACY_JSON_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "exceptions.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exceptions (
+    hostname  TEXT PRIMARY KEY,
+    reason    TEXT NOT NULL,
+    added_by  TEXT NOT NULL,
+    added_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exception_audit (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    hostname  TEXT NOT NULL,
+    action    TEXT NOT NULL,
+    reason    TEXT,
+    actor     TEXT NOT NULL,
+    at        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exception_audit_hostname ON exception_audit (hostname);
+CREATE TABLE IF NOT EXISTS exception_rules (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT NOT NULL,
+    predicates  TEXT NOT NULL,
+    reason      TEXT NOT NULL,
+    expires     TEXT,
+    created_by  TEXT NOT NULL,
+    created_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', '0');
+"""
+
+_initialized: set = set()
+
+
+def _now() -> str:
+    return pd.Timestamp.now().isoformat(timespec="seconds")
+
+
+def _open(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def _connect(db_path: str) -> Iterator[sqlite3.Connection]:
+    """Open a connection, creating the schema (and importing legacy JSON) on first use."""
+    with closing(_open(db_path)) as conn:
+        if db_path not in _initialized:
+            conn.executescript(_SCHEMA)
+            _import_legacy_json(conn)
+            _initialized.add(db_path)
+        yield conn
+
+
+@contextmanager
+def _write(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """One immediate (write-locked) transaction that also bumps the store version."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute(
+            "UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'"
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _import_legacy_json(conn: sqlite3.Connection) -> None:
+    """Move entries from the old exceptions.json into the store, once."""
+    if conn.execute("SELECT 1 FROM store_meta WHERE key = 'legacy_imported'").fetchone():
+        return
+    legacy = {}
+    if os.path.exists(LEGACY_JSON_PATH):
+        try:
+            with open(LEGACY_JSON_PATH) as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, ValueError):
+            legacy = {}
+    with _write(conn):
+        # Re-check under the write lock: another process may have imported meanwhile.
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        rows = [
+            (host, entry.get("reason", "Other"), "legacy import", entry.get("added", _now()))
+            for host, entry in legacy.items()
+        ]
+        conn.executemany(
+            "INSERT OR IGNORE INTO exceptions (hostname, reason, added_by, added_at) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.executemany(
+            "INSERT INTO exception_audit (hostname, action, reason, actor, at) VALUES (?, 'add', ?, ?, ?)",
+            rows,
+        )
+        conn.execute("INSERT INTO store_meta (key, value) VALUES ('legacy_imported', ?)", (_now(),))
+
+
+def store_version(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Current store version; it changes on every committed write."""
+    with _connect(db_path) as conn:
+        return int(conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0])
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _hostname_set(db_path: str, version: int) -> frozenset:
+    _ = version
+    with _connect(db_path) as conn:
+        return frozenset(row[0] for row in conn.execute("SELECT hostname FROM exceptions"))
+
+
+def excepted_hostnames(db_path: str = DEFAULT_DB_PATH) -> frozenset:
+    """Hostnames currently excluded from scope (cached per store version)."""
+    return _hostname_set(db_path, store_version(db_path))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _exception_table(db_path: str, version: int) -> pd.DataFrame:
+    _ = version
+    with _connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT hostname AS Hostname, reason AS Reason, added_by AS 'Added By', "
+            "added_at AS 'Date Added' FROM exceptions ORDER BY added_at DESC, hostname",
+            conn,
+        )
+
+
+def list_exceptions(db_path: str = DEFAULT_DB_PATH) -> pd.DataFrame:
+    """All current exceptions, newest first."""
+    return _exception_table(db_path, store_version(db_path))
+
+
+def add_exceptions(
+    hostnames: Iterable[str], reason: str, actor: str, db_path: str = DEFAULT_DB_PATH
+) -> int:
+    """
+    Upsert exceptions for ``hostnames`` in one transaction and audit each change.
+
+    Returns:
+        int: Number of hostnames written.
+    """
+    at = _now()
+    rows = [(str(h), reason, actor, at) for h in dict.fromkeys(hostnames)]
+    if not rows:
+        return 0
+    with _connect(db_path) as conn, _write(conn):
+        conn.executemany(
+            "INSERT INTO exceptions (hostname, reason, added_by, added_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(hostname) DO UPDATE SET reason = excluded.reason, "
+            "added_by = excluded.added_by, added_at = excluded.added_at",
+            rows,
+        )
+        conn.executemany(
+            "INSERT INTO exception_audit (hostname, action, reason, actor, at) VALUES (?, 'add', ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def remove_exceptions(
+    hostnames: Iterable[str], actor: str, reason: Optional[str] = None, db_path: str = DEFAULT_DB_PATH
+) -> int:
+    """
+    Delete exceptions for ``hostnames`` in one transaction and audit each removal.
+
+    Returns:
+        int: Number of exceptions actually removed.
+    """
+    at = _now()
+    hosts = [str(h) for h in dict.fromkeys(hostnames)]
+    if not hosts:
+        return 0
+    with _connect(db_path) as conn, _write(conn):
+        removed = 0
+        for start in range(0, len(hosts), 500):
+            chunk = hosts[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            present = [
+                row[0] for row in
+                conn.execute(f"SELECT hostname FROM exceptions WHERE hostname IN ({marks})", chunk)
+            ]
+            conn.execute(f"DELETE FROM exceptions WHERE hostname IN ({marks})", chunk)
+            conn.executemany(
+                "INSERT INTO exception_audit (hostname, action, reason, actor, at) VALUES (?, 'remove', ?, ?, ?)",
+                [(h, reason, actor, at) for h in present],
+            )
+            removed += len(present)
+    return removed
+
+
+def audit_log(limit: int = 500, db_path: str = DEFAULT_DB_PATH) -> pd.DataFrame:
+    """Most recent audit entries, newest first."""
+    with _connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT at AS 'When', actor AS 'Who', action AS 'Action', hostname AS Hostname, "
+            "reason AS Reason FROM exception_audit ORDER BY id DESC LIMIT ?",
+            conn,
+            params=(int(limit),),
+        )
+
+
+# ── Rule-based exceptions ─────────────────────────────────────────────────────
+def _rule_target(rule_id: int) -> str:
+    """Audit-log target for a rule (the audit table is keyed by hostname)."""
+    return f"rule:{rule_id}"
+
+
+def add_rule(
+    name: str,
+    predicates: List[dict],
+    reason: str,
+    actor: str,
+    expires: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> int:
+    """
+    Save a bulk exclusion rule (see ``src.exception_rules`` for the predicate format).
+
+    Returns:
+        int: The new rule's id.
+    """
+    at = _now()
+    with _connect(db_path) as conn, _write(conn):
+        cursor = conn.execute(
+            "INSERT INTO exception_rules (name, predicates, reason, expires, created_by, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, json.dumps(predicates), reason, expires, actor, at),
+        )
+        rule_id = int(cursor.lastrowid)
+        conn.execute(
+            "INSERT INTO exception_audit (hostname, action, reason, actor, at) VALUES (?, 'add rule', ?, ?, ?)",
+            (_rule_target(rule_id), f"{name}: {reason}", actor, at),
+        )
+    return rule_id
+
+
+def remove_rules(rule_ids: Iterable[int], actor: str, db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete rules by id and audit each removal. Returns the number removed."""
+    at = _now()
+    ids = [int(i) for i in dict.fromkeys(rule_ids)]
+    if not ids:
+        return 0
+    marks = ",".join("?" * len(ids))
+    with _connect(db_path) as conn, _write(conn):
+        present = conn.execute(
+            f"SELECT id, name FROM exception_rules WHERE id IN ({marks})", ids
+        ).fetchall()
+        conn.execute(f"DELETE FROM exception_rules WHERE id IN ({marks})", ids)
+        conn.executemany(
+            "INSERT INTO exception_audit (hostname, action, reason, actor, at) VALUES (?, 'remove rule', ?, ?, ?)",
+            [(_rule_target(rule_id), name, actor, at) for rule_id, name in present],
+        )
+    return len(present)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _rule_table(db_path: str, version: int) -> List[dict]:
+    _ = version
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id, name, predicates, reason, expires, created_by, created_at "
+            "FROM exception_rules ORDER BY id"
+        ).fetchall()
+    return [
+        {
+            "id": rule_id, "name": name, "predicates": json.loads(predicates), "reason": reason,
+            "expires": expires, "created_by": created_by, "created_at": created_at,
+        }
+        for rule_id, name, predicates, reason, expires, created_by, created_at in rows
+    ]
+
+
+def list_rules(db_path: str = DEFAULT_DB_PATH) -> List[dict]:
+    """All saved rules (including expired ones), oldest first; cached per store version."""
+    return _rule_table(db_path, store_version(db_path))
@@ -0,0 +1,333 @@
+"""
+Bundled US boundary geometry, joins from device data onto it, and coordinate
+verification against it.
+
+The simplified boundary files in ``static/geo/`` (see ``dataset/build_geo_assets.py``)
+are read once per process. The browser fetches the same files once per map by their
+versioned static URL, so a rerun only has to ship the per-feature value vector,
+never the geometry itself.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.map_assets import PINNED_ASSETS, STATIC_DIR
+
+# Words dropped when matching free-text county names to Census names.
+_COUNTY_SUFFIXES = r"\s+(COUNTY|PARISH|BOROUGH|CENSUS AREA|CITY AND BOROUGH|MUNICIPALITY)$"
+
+# Sequential ramp for choropleth fills: light (low) -> coral -> deep red (high).
+CHOROPLETH_STOPS = np.array([
+    [252, 233, 220],
+    [232, 115, 74],
+    [150, 40, 30],
+], dtype=float)
+CHOROPLETH_ALPHA = 210
+
+# Coordinate verification outcomes.
+COORD_VERIFIED = "Verified"
+COORD_OUTSIDE_STATE = "Outside State"
+COORD_MISSING = "Missing Coordinates"
+COORD_UNKNOWN_STATE = "Unknown State"
+COORD_CHECK_COLUMNS = ["State", "Latitude", "Longitude"]
+COORD_STATUS_COLUMNS = ["Coord_Status", "Located_State"]
+# Points this close (degrees) to their state's outline count as inside it: the
+# bundled outlines are Douglas-Peucker simplified at 0.01 deg and rounded to
+# 3 decimals (see ``dataset/build_geo_assets.py``), so coastal and border
+# sites can fall just outside the simplified polygon.
+BOUNDARY_TOLERANCE_DEG = 0.0105
+
+# Latitude bands per state polygon; each point is ray-cast only against its band's edges.
+_MAX_BANDS = 64
+_EDGES_PER_BAND = 16
+# Cap on (points x edges) evaluated per vectorized step, to bound memory.
+_CHUNK_CELLS = 4_000_000
+
+
+def boundary_path(key: str) -> str:
+    """Local path of a bundled boundary file (a ``PINNED_ASSETS`` key)."""
+    return os.path.join(STATIC_DIR, PINNED_ASSETS[key][0])
+
+
+@st.cache_resource(show_spinner=False)
+def _load_boundaries(path: str, mtime: float) -> dict:
+    """Parse a boundary GeoJSON once per process (re-read only if the file changes)."""
+    _ = mtime
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_boundaries(key: str) -> dict:
+    """Return the cached FeatureCollection for a bundled boundary file."""
+    path = boundary_path(key)
+    return _load_boundaries(path, os.path.getmtime(path))
+
+
+def normalize_county_names(names: pd.Series) -> pd.Series:
+    """
+    Normalize county names for joining: upper case, no punctuation, ``SAINT`` -> ``ST``
+    and without trailing ``County``/``Parish``/``Borough`` style suffixes.
+    """
+    return (
+        names.astype(str)
+        .str.upper()
+        .str.replace(".", "", regex=False)
+        .str.replace("'", "", regex=False)
+        .str.replace(r"^SAINT\s", "ST ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.replace(_COUNTY_SUFFIXES, "", regex=True)
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _county_index(path: str, mtime: float) -> pd.DataFrame:
+    features = _load_boundaries(path, mtime)["features"]
+    index = pd.DataFrame([f["properties"] for f in features], columns=["GEOID", "NAME", "STUSPS"])
+    index["join_key"] = index["STUSPS"] + "|" + normalize_county_names(index["NAME"])
+    return index
+
+
+def county_index() -> pd.DataFrame:
+    """
+    Return GEOID, NAME, STUSPS and a normalized ``join_key`` for every bundled county,
+    in the same order as the features of ``us-counties.geojson``.
+    """
+    path = boundary_path("us_counties")
+    return _county_index(path, os.path.getmtime(path))
+
+
+def align_to_counties(
+    agg: pd.DataFrame, county_col: str, state_col: str, value_cols: List[str]
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Reorder county-level aggregates into the feature order of the bundled counties.
+
+    Args:
+        agg (pd.DataFrame): One row per (county, state) with the value columns.
+        county_col (str): Column holding free-text county names.
+        state_col (str): Column holding two-letter state codes.
+        value_cols (list): Columns to carry over; counties without data get 0.
+
+    Returns:
+        tuple: (frame with one row per county feature, number of aggregate rows
+        that matched no bundled county).
+    """
+    index = county_index()
+    keys = agg[state_col].astype(str).str.upper().str.strip() + "|" + normalize_county_names(agg[county_col])
+    values = agg[value_cols].groupby(keys.to_numpy()).sum()
+    aligned = values.reindex(index["join_key"]).fillna(0).reset_index(drop=True)
+    # Independent cities share their name with a county; the county (first GEOID) wins.
+    aligned.loc[index["join_key"].duplicated().to_numpy(), value_cols] = 0
+    aligned = pd.concat([index[["GEOID", "NAME", "STUSPS"]], aligned], axis=1)
+    unmatched = int((~values.index.isin(index["join_key"])).sum())
+    return aligned, unmatched
+
+
+def choropleth_colors(values: np.ndarray) -> np.ndarray:
+    """
+    Map values to RGBA uint8 fills on a log-scaled sequential ramp.
+
+    Zero and missing values are fully transparent so the basemap shows through.
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    colors = np.zeros((len(values), 4), dtype=np.uint8)
+    present = values > 0
+    if not present.any():
+        return colors
+    logged = np.log1p(values[present])
+    low, high = np.quantile(logged, [0.02, 0.98])
+    t = np.clip((logged - low) / (high - low), 0.0, 1.0) if high > low else np.ones_like(logged)
+    segment = np.minimum((t * (len(CHOROPLETH_STOPS) - 1)).astype(int), len(CHOROPLETH_STOPS) - 2)
+    frac = (t * (len(CHOROPLETH_STOPS) - 1) - segment)[:, None]
+    rgb = CHOROPLETH_STOPS[segment] * (1 - frac) + CHOROPLETH_STOPS[segment + 1] * frac
+    colors[present, :3] = np.round(rgb).astype(np.uint8)
+    colors[present, 3] = CHOROPLETH_ALPHA
+    return colors
+
+
+def choropleth_legend(title: str, values: np.ndarray, fmt) -> Dict[str, object]:
+    """Three-stop ``deck_map`` legend matching the colour stops of ``choropleth_colors``."""
+    present = np.asarray(values, dtype=float)
+    present = present[present > 0]
+    if not len(present):
+        return {"title": title, "items": []}
+    low, high = np.quantile(np.log1p(present), [0.02, 0.98])
+    stops = np.expm1([low, (low + high) / 2, high])
+    return {
+        "title": title,
+        "items": [
+            {"label": fmt(v), "color": "rgb({},{},{})".format(*map(int, c))}
+            for v, c in zip(stops, CHOROPLETH_STOPS)
+        ],
+    }
+
+
+# ── Point-in-polygon verification ──────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def _state_index(path: str, mtime: float) -> Dict[str, dict]:
+    """Per-state polygon edges, bounding box and latitude-band edge buckets."""
+    index: Dict[str, dict] = {}
+    for feature in _load_boundaries(path, mtime)["features"]:
+        segments = []
+        for polygon in feature["geometry"]["coordinates"]:
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=float)
+                segments.append(np.column_stack([ring[:-1], ring[1:]]))
+        edges = np.concatenate(segments)  # x1, y1, x2, y2
+        south = float(min(edges[:, 1].min(), edges[:, 3].min()))
+        north = float(max(edges[:, 1].max(), edges[:, 3].max()))
+        n_bands = int(np.clip(len(edges) // _EDGES_PER_BAND, 1, _MAX_BANDS))
+        band_height = max((north - south) / n_bands, 1e-9)
+        lo = np.floor((np.minimum(edges[:, 1], edges[:, 3]) - south) / band_height).clip(0, n_bands - 1)
+        hi = np.floor((np.maximum(edges[:, 1], edges[:, 3]) - south) / band_height).clip(0, n_bands - 1)
+        index[feature["properties"]["STUSPS"]] = {
+            "bbox": (
+                float(min(edges[:, 0].min(), edges[:, 2].min())), south,
+                float(max(edges[:, 0].max(), edges[:, 2].max())), north,
+            ),
+            "band_height": band_height,
+            "bands": [edges[(lo <= b) & (hi >= b)] for b in range(n_bands)],
+        }
+    return index
+
+
+def state_index() -> Dict[str, dict]:
+    """Return the cached per-state polygon index built from ``us-states.geojson``."""
+    path = boundary_path("us_states")
+    return _state_index(path, os.path.getmtime(path))
+
+
+def _ray_cast(px: np.ndarray, py: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting of points against polygon edges (all rings, holes included)."""
+    inside = np.zeros(len(px), dtype=bool)
+    if not len(edges) or not len(px):
+        return inside
+    x1, y1, x2, y2 = (edges[:, i][None, :] for i in range(4))
+    step = max(1, _CHUNK_CELLS // len(edges))
+    for start in range(0, len(px), step):
+        x = px[start:start + step, None]
+        y = py[start:start + step, None]
+        straddles = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        crossings = np.count_nonzero(straddles & (x < x_cross), axis=1)
+        inside[start:start + step] = crossings % 2 == 1
+    return inside
+
+
+def _edge_distance(px: np.ndarray, py: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Planar distance (degrees) from each point to the nearest of ``edges``."""
+    distance = np.full(len(px), np.inf)
+    if not len(edges) or not len(px):
+        return distance
+    x1, y1, x2, y2 = (edges[:, i][None, :] for i in range(4))
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = np.maximum(dx * dx + dy * dy, 1e-18)
+    step = max(1, _CHUNK_CELLS // len(edges))
+    for start in range(0, len(px), step):
+        x = px[start:start + step, None]
+        y = py[start:start + step, None]
+        t = np.clip(((x - x1) * dx + (y - y1) * dy) / length_sq, 0.0, 1.0)
+        distance[start:start + step] = np.hypot(x1 + t * dx - x, y1 + t * dy - y).min(axis=1)
+    return distance
+
+
+def points_in_state(lat: np.ndarray, lon: np.ndarray, usps: str, tolerance: float = 0.0) -> np.ndarray:
+    """
+    True where (lat, lon) falls inside the bundled boundary of state ``usps``,
+    or within ``tolerance`` degrees of it.
+    """
+    entry = state_index().get(usps)
+    inside = np.zeros(len(lat), dtype=bool)
+    if entry is None:
+        return inside
+    west, south, east, north = entry["bbox"]
+    candidates = np.flatnonzero(
+        (lon >= west - tolerance) & (lon <= east + tolerance)
+        & (lat >= south - tolerance) & (lat <= north + tolerance)
+    )
+    if not len(candidates):
+        return inside
+    n_bands = len(entry["bands"])
+
+    def band_of(values: np.ndarray) -> np.ndarray:
+        return np.clip(((values - south) / entry["band_height"]).astype(int), 0, n_bands - 1)
+
+    bands = band_of(lat[candidates])
+    for band in np.unique(bands):
+        members = candidates[bands == band]
+        inside[members] = _ray_cast(lon[members], lat[members], entry["bands"][band])
+    if tolerance > 0:
+        # Any edge within the tolerance spans a band between those of lat -/+ tolerance.
+        outside = candidates[~inside[candidates]]
+        low, high = band_of(lat[outside] - tolerance), band_of(lat[outside] + tolerance)
+        for band in range(int(low.min(initial=0)), int(high.max(initial=-1)) + 1):
+            members = outside[(low <= band) & (high >= band)]
+            near = _edge_distance(lon[members], lat[members], entry["bands"][band]) <= tolerance
+            inside[members[near]] = True
+    return inside
+
+
+def locate_states(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """USPS code of the state containing each point ("" when in none)."""
+    located = np.full(len(lat), "", dtype=object)
+    pending = np.arange(len(lat))
+    for usps in state_index():
+        if not len(pending):
+            break
+        hit = points_in_state(lat[pending], lon[pending], usps)
+        located[pending[hit]] = usps
+        pending = pending[~hit]
+    return located
+
+
+def verify_coordinates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Check each row's Latitude/Longitude against the boundary of its State.
+
+    Distinct (State, Latitude, Longitude) triples are tested once each: a bounding-box
+    prefilter, then vectorized ray casting against the state's polygon edges. Points
+    within ``BOUNDARY_TOLERANCE_DEG`` of the outline also pass. The check runs once at
+    ingest (see ``src.data_loader.load_data``), which stores the result as columns.
+
+    Args:
+        df (pd.DataFrame): Rows with State, Latitude and Longitude.
+
+    Returns:
+        pd.DataFrame: Indexed like ``df`` with ``Coord_Status`` (``COORD_VERIFIED``,
+        ``COORD_OUTSIDE_STATE``, ``COORD_MISSING`` or ``COORD_UNKNOWN_STATE``) and
+        ``Located_State`` (state actually containing the point, for mismatches).
+    """
+    points = pd.DataFrame({
+        "State": df["State"].astype("string").str.strip().str.upper(),
+        "Latitude": pd.to_numeric(df["Latitude"], errors="coerce"),
+        "Longitude": pd.to_numeric(df["Longitude"], errors="coerce"),
+    }, index=df.index)
+    result = pd.DataFrame(
+        {"Coord_Status": COORD_MISSING, "Located_State": ""}, index=df.index
+    )
+    located = points.dropna()
+    known = located["State"].isin(list(state_index()))
+    result.loc[located.index[~known], "Coord_Status"] = COORD_UNKNOWN_STATE
+
+    unique = located[known].drop_duplicates().reset_index(drop=True)
+    lat = unique["Latitude"].to_numpy(dtype=float)
+    lon = unique["Longitude"].to_numpy(dtype=float)
+    inside = np.zeros(len(unique), dtype=bool)
+    for usps, rows in unique.groupby("State").indices.items():
+        inside[rows] = points_in_state(lat[rows], lon[rows], usps, BOUNDARY_TOLERANCE_DEG)
+    unique["Coord_Status"] = np.where(inside, COORD_VERIFIED, COORD_OUTSIDE_STATE)
+    unique["Located_State"] = ""
+    outside = ~inside
+    unique.loc[outside, "Located_State"] = locate_states(lat[outside], lon[outside])
+
+    matched = located[known].reset_index().merge(unique, on=["State", "Latitude", "Longitude"], how="left")
+    result.loc[matched["index"], ["Coord_Status", "Located_State"]] = (
+        matched[["Coord_Status", "Located_State"]].to_numpy()
+    )
+    return result
@@ -0,0 +1,350 @@
+"""
+Device-level hazard model for the Predictive Risk Forecast page.
+
+The dataset carries no incident history, so the modelled event is a device
+being in the severe-risk state (``Risk_Score >= SEVERE_RISK_SCORE``). That label
+is itself computed by the ETL from the lifecycle fields the model reads, so
+the model is an extrapolation of the risk score, not a validated predictor of
+failures. It mostly relearns the score formula, and no fit metric on this
+label would measure predictive accuracy, so none is reported. A discrete-time
+hazard model, a logistic regression over device-quarter features, learns
+P(severe) from:
+
+* ``eol_age_years``: years since EoL (negative before it), as a cubic spline
+* ``days_past_eol``
+* model family, device type and support status (one-hot)
+* site context: devices at the site and the site's share of past-EoL devices
+
+Forecasting rolls each device forward to the requested quarters: its EoL age
+and days past EoL grow, and support lapses once EoL passes. Only those three
+features move, and the model is additive, so a device's logit at quarter q is
+its logit today plus a shift that depends only on (age, days, support) today
+and q. The shifts are scored once per distinct state and quarter, and one
+broadcast adds them to the fleet's logits. All quarters then cost about one
+fleet pass. Scoring evaluates the fitted coefficients directly (a spline basis,
+scaled numeric terms and a coefficient lookup per category). The column sums
+are the expected at-risk counts, and the hazard is the rise in P(severe) among
+devices not yet severe.
+
+The model is trained once on the whole active fleet at its snapshot, before
+any sidebar filters and as-of dates, and keyed by that fleet's version. An
+as-of date is a roll forward (or back) from the snapshot, so moving it
+rescores the fleet without retraining. Filtered views score their rows
+with the same model. Fitted models are persisted with joblib under
+``MODEL_DIR``, so a rerun or a restart loads the artifact instead of
+retraining, and only the ``MAX_ARTIFACTS`` most recently used are kept.
+"""
+import glob
+import os
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import OneHotEncoder, SplineTransformer, StandardScaler
+
+from src.lifecycle import SUPPORT_EXPIRED, SUPPORT_NONE, snapshot_date
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "dataset", "models")
+# Bump when features or training change so stale artifacts are not loaded.
+MODEL_SCHEMA = 4
+# Saved models kept on disk (one per fleet version), most recently used first.
+MAX_ARTIFACTS = 4
+
+SEVERE_RISK_SCORE = 50.0
+
+# Columns the model reads; anything else in the frame is ignored.
+MODEL_COLUMNS = [
+    "Hostname", "Model", "Device Type", "Support_Status", "Site_Code",
+    "Days_Past_EoL", "EoL_Year", "Risk_Score", "Is_Decom",
+]
+FEATURES = [
+    "eol_age_years", "days_past_eol", "model_family", "device_type",
+    "support_status", "site_devices", "site_past_eol_share",
+]
+CATEGORICAL = ["model_family", "device_type", "support_status"]
+SITE_FEATURES = ["site_devices", "site_past_eol_share"]
+# Rare categories beyond this share one "other" code.
+MAX_CATEGORIES = 250
+PREDICT_BATCH_ROWS = 500_000
+# Quarters reported per device: today and one, two and three years out.
+HORIZON_QUARTERS = (0, 4, 8, 12)
+
+
+def _vocabulary(values: pd.Series) -> List[str]:
+    """Most frequent categories, capped so the rest share the "other" code."""
+    return values.fillna("Unknown").astype(str).value_counts().index[:MAX_CATEGORIES - 1].tolist()
+
+
+def _codes(values: pd.Series, vocabulary: List[str]) -> np.ndarray:
+    codes = pd.Categorical(values.fillna("Unknown").astype(str), categories=vocabulary).codes
+    return np.where(codes < 0, len(vocabulary), codes).astype(float)
+
+
+def base_features(df: pd.DataFrame, vocabularies: Dict[str, List[str]], year: int) -> pd.DataFrame:
+    """
+    Feature frame for ``df`` (column order ``FEATURES``) as of ``year``, the
+    year its Days_Past_EoL and Support_Status describe.
+    """
+    days = pd.to_numeric(df["Days_Past_EoL"], errors="coerce").fillna(0).clip(lower=0).to_numpy(dtype=float)
+    eol_year = pd.to_numeric(df["EoL_Year"], errors="coerce").fillna(year).to_numpy(dtype=float)
+    age = np.where(days > 0, days / 365.25, np.minimum(year - eol_year, 0.0))
+    site, _ = pd.factorize(df["Site_Code"])
+    site = np.where(site < 0, site.max(initial=-1) + 1, site)
+    site_devices = np.bincount(site).astype(float)
+    site_past = np.bincount(site, weights=(days > 0).astype(float)) / site_devices
+    return pd.DataFrame({
+        "eol_age_years": age,
+        "days_past_eol": days,
+        "model_family": _codes(df["Model"], vocabularies["model_family"]),
+        "device_type": _codes(df["Device Type"], vocabularies["device_type"]),
+        "support_status": _codes(df["Support_Status"], vocabularies["support_status"]),
+        "site_devices": site_devices[site],
+        "site_past_eol_share": site_past[site],
+    }, index=df.index)[FEATURES]
+
+
+def _snapshot_year(df: pd.DataFrame) -> int:
+    return int(str(snapshot_date(df))[:4])
+
+
+def _artifact_path(version: str) -> str:
+    return os.path.join(MODEL_DIR, f"hazard_v{MODEL_SCHEMA}_{version}.joblib")
+
+
+def _prune_artifacts(keep: str) -> None:
+    """Delete all but the ``MAX_ARTIFACTS`` most recently used artifacts (``keep`` always stays)."""
+    paths = sorted(glob.glob(os.path.join(MODEL_DIR, "hazard_v*.joblib")), key=os.path.getmtime, reverse=True)
+    stale = [p for p in paths if p != keep][MAX_ARTIFACTS - 1:]
+    for path in stale:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # already gone, or removed by another session
+
+
+def _pipeline() -> Pipeline:
+    columns = {name: [FEATURES.index(name)] for name in FEATURES}
+    encoder = ColumnTransformer([
+        ("age", SplineTransformer(n_knots=8, degree=3, extrapolation="linear"), columns["eol_age_years"]),
+        ("days", StandardScaler(), columns["days_past_eol"]),
+        ("categories", OneHotEncoder(handle_unknown="ignore"), [FEATURES.index(c) for c in CATEGORICAL]),
+        ("site", StandardScaler(), [FEATURES.index(c) for c in SITE_FEATURES]),
+    ])
+    return make_pipeline(encoder, LogisticRegression(max_iter=1_000))
+
+
+def _train(df: pd.DataFrame) -> Dict[str, object]:
+    vocabularies = {
+        "model_family": _vocabulary(df["Model"]),
+        "device_type": _vocabulary(df["Device Type"]),
+        "support_status": _vocabulary(df["Support_Status"]),
+    }
+    X = base_features(df, vocabularies, _snapshot_year(df)).to_numpy(dtype=float)
+    y = (pd.to_numeric(df["Risk_Score"], errors="coerce").fillna(0) >= SEVERE_RISK_SCORE).to_numpy()
+    # A single class has no hazard to learn.
+    model = _pipeline().fit(X, y) if y.any() and not y.all() else None
+    return {
+        "model": model,
+        "vocabularies": vocabularies,
+        "support_past_eol": vocabularies["support_status"].index(SUPPORT_NONE)
+        if SUPPORT_NONE in vocabularies["support_status"] else None,
+        "support_expired": vocabularies["support_status"].index(SUPPORT_EXPIRED)
+        if SUPPORT_EXPIRED in vocabularies["support_status"] else None,
+        "severe_rate": float(y.mean()) if len(y) else 0.0,
+        "n_train": int(len(y)),
+    }
+
+
+def _logit(artifact: Dict[str, object], X: np.ndarray) -> np.ndarray:
+    """
+    Log-odds of severe for feature rows ``X`` (``FEATURES`` order), evaluated
+    term by term: the spline basis for EoL age, scaled numeric terms and a
+    coefficient lookup per category code. This avoids materializing the sparse
+    one-hot design matrix.
+    """
+    encoder, classifier = artifact["model"][0], artifact["model"][-1]
+    coef = classifier.coef_[0]
+    logit = np.full(len(X), classifier.intercept_[0])
+    for name, transformer, columns in encoder.transformers_:
+        if name == "remainder":
+            continue
+        weights = coef[encoder.output_indices_[name]]
+        values = X[:, columns]
+        if isinstance(transformer, OneHotEncoder):
+            offset = 0
+            for j, categories in enumerate(transformer.categories_):
+                pos = np.minimum(np.searchsorted(categories, values[:, j]), len(categories) - 1)
+                known = categories[pos] == values[:, j]
+                logit += np.where(known, weights[offset + pos], 0.0)
+                offset += len(categories)
+        elif isinstance(transformer, StandardScaler):
+            logit += ((values - transformer.mean_) / transformer.scale_) @ weights
+        else:
+            logit += transformer.transform(values) @ weights
+    return logit
+
+
+def predict_severe(artifact: Dict[str, object], X: np.ndarray) -> np.ndarray:
+    """P(severe) for feature rows ``X`` (``FEATURES`` order)."""
+    if artifact["model"] is None:
+        return np.full(len(X), artifact["severe_rate"])
+    return 1.0 / (1.0 + np.exp(-_logit(artifact, X)))
+
+
+def _roll(artifact: Dict[str, object], X0: np.ndarray, years: float) -> np.ndarray:
+    """
+    Features ``X0`` rolled ``years`` forward (or back, when negative): ages
+    move, days past EoL follow, and support lapses once past EoL (or returns
+    to expired support when rolled back before it).
+    """
+    age_col, days_col = FEATURES.index("eol_age_years"), FEATURES.index("days_past_eol")
+    support_col = FEATURES.index("support_status")
+    X = X0.copy()
+    X[:, age_col] = X0[:, age_col] + years
+    X[:, days_col] = np.maximum(X[:, age_col], 0.0) * 365.25
+    past_code, expired_code = artifact["support_past_eol"], artifact.get("support_expired")
+    if past_code is not None:
+        support = X0[:, support_col]
+        if expired_code is not None:
+            support = np.where(support == past_code, expired_code, support)
+        X[:, support_col] = np.where(X[:, age_col] > 0, past_code, support)
+    return X
+
+
+def forecast_quarters(years: int) -> List[int]:
+    """Quarters the page reads: yearly points over ``years`` plus ``HORIZON_QUARTERS``."""
+    return sorted(set(range(0, years * 4, 4)) | set(HORIZON_QUARTERS))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def hazard_model(version: str, _df: pd.DataFrame) -> Dict[str, object]:
+    """
+    Fitted model artifact for one fleet version: loaded from disk when it
+    was already trained, otherwise trained and persisted.
+
+    Args:
+        version (str): Cache key identifying ``_df`` (see ``dataset_version``).
+        _df (pd.DataFrame): The whole active fleet (before sidebar filters)
+            with ``MODEL_COLUMNS``.
+
+    Returns:
+        dict: ``model``, ``vocabularies``, ``severe_rate``,
+        ``n_train`` and ``loaded`` (True when read from a persisted artifact).
+    """
+    path = _artifact_path(version)
+    if os.path.exists(path):
+        try:
+            artifact = {**joblib.load(path), "loaded": True}
+            os.utime(path)  # mark as recently used for pruning
+            _prune_artifacts(path)
+            return artifact
+        except Exception:
+            pass  # unreadable artifact: retrain and overwrite it
+    artifact = _train(_df)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    _prune_artifacts(path)
+    return {**artifact, "loaded": False}
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def forecast_hazard(
+    version: str, quarters: Sequence[int], _df: pd.DataFrame, offset_years: float = 0.0
+) -> Dict[str, object]:
+    """
+    P(severe) for every device of the fleet at each of ``quarters``.
+
+    Args:
+        version (str): Cache key identifying ``_df``.
+        quarters (Sequence[int]): Quarters from the as-of date to score (see
+            ``forecast_quarters``); quarter 0 is always included.
+        _df (pd.DataFrame): The whole active fleet with ``MODEL_COLUMNS``, as
+            of the data snapshot.
+        offset_years (float): Years from the data snapshot to the as-of date
+            the quarters count from (negative to look back).
+
+    Returns:
+        dict: ``quarters`` (sorted), ``probability`` (read-only devices x
+        quarters P(severe), held at its running maximum since severe is
+        absorbing) and model diagnostics.
+    """
+    artifact = hazard_model(version, _df)
+    quarters = np.array(sorted(set(quarters) | {0}))
+    X0 = base_features(_df, artifact["vocabularies"], _snapshot_year(_df)).to_numpy(dtype=float)
+    n = len(X0)
+
+    if artifact["model"] is None or not n:
+        probability = np.full((n, len(quarters)), artifact["severe_rate"], dtype=np.float32)
+    else:
+        if offset_years:
+            X0 = _roll(artifact, X0, offset_years)
+        logit0 = np.concatenate([
+            _logit(artifact, X0[start:start + PREDICT_BATCH_ROWS]) for start in range(0, n, PREDICT_BATCH_ROWS)
+        ]).astype(np.float32)
+        # Devices sharing an (age, days, support) state share every future shift.
+        dynamic = [FEATURES.index(c) for c in ["eol_age_years", "days_past_eol", "support_status"]]
+        state = pd.DataFrame(X0[:, dynamic]).groupby(list(range(len(dynamic))), sort=False).ngroup().to_numpy()
+        first = np.zeros(state.max() + 1, dtype=np.int64)
+        first[state[::-1]] = np.arange(n)[::-1]
+        template = X0[first]
+        rolled = np.vstack([_roll(artifact, template, q / 4) for q in quarters])
+        shift = _logit(artifact, rolled).reshape(len(quarters), len(template)) - _logit(artifact, template)
+        logits = logit0[:, None] + shift.T.astype(np.float32)[state]
+        probability = 1.0 / (1.0 + np.exp(-logits))
+    running = np.maximum.accumulate(probability, axis=1)
+    running.setflags(write=False)
+    return {
+        "quarters": quarters,
+        "probability": running,
+        "severe_rate": artifact["severe_rate"],
+        "n_train": artifact["n_train"],
+        "loaded": artifact["loaded"],
+    }
+
+
+def hazard_summary(forecast: Dict[str, object], rows: Optional[np.ndarray] = None) -> Dict[str, object]:
+    """
+    Expected at-risk counts and per-device horizons for a subset of the fleet.
+
+    Args:
+        forecast (dict): Result of ``forecast_hazard``.
+        rows (np.ndarray, optional): Fleet positions to include (all when None).
+
+    Returns:
+        dict: ``device`` (P(severe) today and 1-3 years out, one row per entry
+        of ``rows``), ``expected`` (DataFrame of quarter_num, Expected_At_Risk
+        and Hazard, the expected share of not-yet-severe devices turning
+        severe since the previous scored quarter) and the forecast's model
+        diagnostics.
+    """
+    running = forecast["probability"]
+    if rows is not None:
+        running = running[rows]
+    n, quarters = running.shape
+    scored = forecast["quarters"]
+    # Severe is an absorbing state here, so the hazard is the rise in P(severe)
+    # relative to the devices still outside it.
+    previous = np.c_[np.zeros(n, dtype=np.float32), running[:, :-1]]
+    entering = (running - previous).sum(axis=0)
+    outside = (1 - previous).sum(axis=0)
+    hazard = np.divide(entering, outside, out=np.full(quarters, np.nan), where=outside > 0)
+    hazard[0] = np.nan
+    expected = pd.DataFrame({
+        "quarter_num": scored,
+        "Expected_At_Risk": running.sum(axis=0),
+        "Hazard": hazard,
+    })
+    position = {int(q): i for i, q in enumerate(scored)}
+    horizons = {f"P_{q // 4}y" if q else "P_Now": position[q] for q in HORIZON_QUARTERS if q in position}
+    return {
+        "device": pd.DataFrame({name: running[:, i] for name, i in horizons.items()}),
+        "expected": expected,
+        **{k: v for k, v in forecast.items() if k not in ("probability", "quarters")},
+    }
@@ -0,0 +1,175 @@
+"""
+Server-side hostname typeahead for exception selection.
+
+Hostnames are lower-cased and sorted once per dataset version. A prefix query
+is then a pair of ``searchsorted`` calls on the sorted array, the flat
+equivalent of walking a trie. Substring queries of three or more characters go
+through a trigram index. Each trigram maps to the sorted positions of the
+hostnames containing it, stored CSR-style as one postings array plus offsets.
+The two rarest trigrams of the query are intersected, and the candidates are
+checked in chunks only until enough matches are found.
+
+Both paths return positions in hostname order, so a search reads a bounded
+number of entries. The page receives at most ``MATCH_LIMIT`` rows however large
+the fleet is.
+"""
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+MATCH_LIMIT = 50
+MIN_SUBSTRING_LENGTH = 3
+CONTEXT_COLUMNS = ["Hostname", "Site_Code", "State", "Risk_Level", "Risk_Score"]
+
+MATCH_PREFIX = "Prefix"
+MATCH_CONTAINS = "Contains"
+
+# Hostnames per block when extracting trigrams; bounds the (block, width) code matrix.
+_TRIGRAM_BLOCK = 65_536
+# Code points fit in 21 bits, so three of them pack into one int64.
+_CHAR_BITS = 21
+_MAX_CHAR = "\U0010ffff"
+
+
+def _trigram_codes(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(trigram code, position) for every distinct trigram of every key."""
+    codes, positions = [], []
+    for start in range(0, len(keys), _TRIGRAM_BLOCK):
+        block = np.ascontiguousarray(keys[start:start + _TRIGRAM_BLOCK])
+        chars = block.view(np.uint32).reshape(len(block), -1).astype(np.int64)
+        if chars.shape[1] < 3:
+            continue
+        grams = (chars[:, :-2] << 2 * _CHAR_BITS) | (chars[:, 1:-1] << _CHAR_BITS) | chars[:, 2:]
+        valid = chars[:, 2:] != 0
+        codes.append(grams[valid])
+        positions.append(np.nonzero(valid)[0] + start)
+    if not codes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes, positions = np.concatenate(codes), np.concatenate(positions)
+    order = np.lexsort((positions, codes))
+    codes, positions = codes[order], positions[order]
+    distinct = np.r_[True, (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])]
+    return codes[distinct], positions[distinct]
+
+
+class HostnameIndex:
+    """Sorted-array prefix index plus trigram postings over one fleet's hostnames."""
+
+    def __init__(self, version: str, hosts: pd.DataFrame):
+        """
+        Args:
+            version (str): Dataset version the index was built for.
+            hosts (pd.DataFrame): Devices with Hostname and any of ``CONTEXT_COLUMNS``.
+        """
+        self.version = version
+        keys = hosts["Hostname"].astype(str).str.lower().to_numpy(dtype=str)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.rows = order  # sorted position -> row of ``hosts``
+        columns = [c for c in CONTEXT_COLUMNS if c in hosts.columns]
+        self.context = hosts[columns].iloc[order].reset_index(drop=True)
+        self.context["Row"] = order
+
+        codes, positions = _trigram_codes(self.keys)
+        self._grams, starts = np.unique(codes, return_index=True)
+        self._offsets = np.r_[starts, len(codes)]
+        self._postings = positions.astype(np.int32 if len(self.keys) < 2**31 else np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _prefix_range(self, key: str) -> Tuple[int, int]:
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        hi = int(np.searchsorted(self.keys, key + _MAX_CHAR, side="left"))
+        return lo, hi
+
+    def _postings_for(self, gram: int) -> np.ndarray:
+        i = int(np.searchsorted(self._grams, gram))
+        if i >= len(self._grams) or self._grams[i] != gram:
+            return self._postings[:0]
+        return self._postings[self._offsets[i]:self._offsets[i + 1]]
+
+    @staticmethod
+    def _take(
+        candidates: np.ndarray, limit: int, keep: Callable[[np.ndarray], np.ndarray], chunk: int
+    ) -> np.ndarray:
+        """First ``limit`` candidates passing ``keep``, tested ``chunk`` at a time."""
+        found = []
+        n_found = 0
+        for start in range(0, len(candidates), chunk):
+            block = candidates[start:start + chunk]
+            block = block[keep(block)]
+            found.append(block)
+            n_found += len(block)
+            if n_found >= limit:
+                break
+        if not found:
+            return candidates[:0]
+        return np.concatenate(found)[:limit]
+
+    def search(
+        self, query: str, exclude: Optional[np.ndarray] = None, limit: int = MATCH_LIMIT
+    ) -> pd.DataFrame:
+        """
+        Top hostname matches for ``query``: prefix matches first, then substring
+        matches, each in hostname order.
+
+        Args:
+            query (str): Case-insensitive search text.
+            exclude (np.ndarray, optional): Boolean mask aligned to the indexed
+                rows; masked hostnames are never returned.
+            limit (int): Maximum number of matches.
+
+        Returns:
+            pd.DataFrame: Context columns, Row (position in the indexed frame) and
+            Match (``MATCH_PREFIX`` or ``MATCH_CONTAINS``).
+        """
+        key = query.strip().lower()
+        if not key or limit <= 0:
+            return self.context.iloc[:0].assign(Match=pd.Series(dtype=str))
+
+        def keep(positions: np.ndarray) -> np.ndarray:
+            if exclude is None:
+                return np.ones(len(positions), dtype=bool)
+            return ~exclude[self.rows[positions]]
+
+        chunk = max(limit * 4, 256)
+        lo, hi = self._prefix_range(key)
+        prefix = self._take(np.arange(lo, hi), limit, keep, chunk)
+
+        contains = prefix[:0]
+        if len(prefix) < limit and len(key) >= MIN_SUBSTRING_LENGTH:
+            grams, _ = _trigram_codes(np.array([key]))
+            postings = sorted((self._postings_for(g) for g in np.unique(grams)), key=len)
+            candidates = postings[0]
+            if len(postings) > 1:
+                candidates = np.intersect1d(candidates, postings[1], assume_unique=True)
+            # Prefix matches were already taken; the rest must really contain the key.
+            candidates = candidates[(candidates < lo) | (candidates >= hi)]
+
+            def keep_contains(positions: np.ndarray) -> np.ndarray:
+                found = np.char.find(self.keys[positions], key) >= 0
+                return found & keep(positions)
+
+            contains = self._take(candidates, limit - len(prefix), keep_contains, chunk)
+
+        positions = np.r_[prefix, contains].astype(np.int64)
+        matches = self.context.iloc[positions].reset_index(drop=True)
+        matches["Match"] = [MATCH_PREFIX] * len(prefix) + [MATCH_CONTAINS] * len(contains)
+        return matches
+
+    def lookup(self, hostnames: Iterable[str]) -> pd.DataFrame:
+        """Context rows for exact hostnames (case-insensitive); unknown names are skipped."""
+        keys = np.array([str(h).lower() for h in hostnames], dtype=str)
+        if not len(keys) or not len(self.keys):
+            return self.context.iloc[:0]
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.context.iloc[positions[self.keys[positions] == keys]].reset_index(drop=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def hostname_index(version: str, _hosts: pd.DataFrame) -> HostnameIndex:
+    """``HostnameIndex`` for ``_hosts``, built once per dataset version."""
+    return HostnameIndex(version, _hosts)
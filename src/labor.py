@@ -0,0 +1,127 @@
+"""
+Per-device replacement labor: hours by role and labor cost.
+
+Hours come from the raw workbook's ModelData sheet (DE / SE / FOT hours per
+Model). Labor dollars come from the same row's DE / SE / FOT Cost. When a model
+has no costs there, its replacement device (ModelData "Repl Device") is looked
+up as a Product in the Pricing sheet for Labor-DE / Labor-SE / Labor-FO. Pricing
+is keyed by Product, never by the device's own Model. Devices whose model
+resolves in neither sheet fall back to typical hours for their Device Type,
+costed at default hourly rates. Every device records which sources were used,
+and ``source_shares`` reports how much of a fleet is on the fallback.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DEFAULT_WORKBOOK_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "dataset", "UAInnovateDataset-SoCo-Dummy.xlsx"
+)
+
+# Design engineer, systems engineer, field operations technician.
+ROLES = ["DE", "SE", "FO"]
+MODEL_HOUR_COLUMNS = {"DE": "DE Hrs", "SE": "SE Hrs", "FO": "FOT Hrs"}
+MODEL_COST_COLUMNS = {"DE": "DE Cost", "SE": "SE Cost", "FO": "FOT Cost"}
+PRICING_LABOR_COLUMNS = {"DE": "Labor-DE", "SE": "Labor-SE", "FO": "Labor-FO"}
+# ModelData column naming the Pricing Product that replaces a model.
+REPLACEMENT_PRODUCT_COLUMN = "Repl Device"
+
+# Typical hours per device when the model has no ModelData row.
+DEFAULT_HOURS_BY_TYPE = {
+    "Wireless AP": {"DE": 0.25, "SE": 0.5, "FO": 1.0},
+    "Switch": {"DE": 1.0, "SE": 2.0, "FO": 3.0},
+    "Router": {"DE": 2.0, "SE": 3.0, "FO": 3.0},
+    "Firewall": {"DE": 3.0, "SE": 4.0, "FO": 2.0},
+    "Voice Gateway": {"DE": 1.5, "SE": 2.5, "FO": 2.5},
+}
+DEFAULT_HOURS = {"DE": 1.0, "SE": 2.0, "FO": 2.5}
+DEFAULT_HOURLY_RATE = {"DE": 145.0, "SE": 125.0, "FO": 85.0}
+
+SOURCE_MODEL = "ModelData"
+SOURCE_PRICING = "Pricing"
+SOURCE_DEFAULT = "Default"
+
+
+@st.cache_resource(show_spinner=False)
+def _load_labor_tables(path: str, mtime: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Role hours and role labor dollars (with their ``Source``) by Model, read once per workbook version."""
+    _ = mtime
+    hours = pd.DataFrame(columns=ROLES)
+    dollars = pd.DataFrame(columns=[*ROLES, "Source"])
+    with pd.ExcelFile(path) as xls:
+        model_data = xls.parse("ModelData") if "ModelData" in xls.sheet_names else pd.DataFrame()
+        pricing = xls.parse("Pricing") if "Pricing" in xls.sheet_names else pd.DataFrame()
+    if "Model" not in model_data.columns:
+        return hours, dollars
+    if all(c in model_data.columns for c in MODEL_HOUR_COLUMNS.values()):
+        hours = _role_table(model_data, "Model", MODEL_HOUR_COLUMNS).dropna()
+    if all(c in model_data.columns for c in MODEL_COST_COLUMNS.values()):
+        dollars = _role_table(model_data, "Model", MODEL_COST_COLUMNS).dropna().assign(Source=SOURCE_MODEL)
+    if (
+        REPLACEMENT_PRODUCT_COLUMN in model_data.columns and "Product" in pricing.columns
+        and all(c in pricing.columns for c in PRICING_LABOR_COLUMNS.values())
+    ):
+        by_product = _role_table(pricing, "Product", PRICING_LABOR_COLUMNS).dropna()
+        products = model_data.assign(
+            Model=model_data["Model"].astype(str).str.strip(),
+            Product=model_data[REPLACEMENT_PRODUCT_COLUMN].astype(str).str.strip(),
+        ).drop_duplicates("Model").set_index("Model")["Product"]
+        priced = by_product.reindex(products.to_numpy()).set_axis(products.index).dropna()
+        priced = priced[~priced.index.isin(dollars.index)].assign(Source=SOURCE_PRICING)
+        dollars = pd.concat([dollars, priced])
+    return hours, dollars
+
+
+def _role_table(sheet: pd.DataFrame, key: str, columns: Dict[str, str]) -> pd.DataFrame:
+    """Role columns of ``sheet`` by ``key``; rows with an unparseable role value are NaN."""
+    table = sheet[[key, *columns.values()]].rename(columns={v: k for k, v in columns.items()})
+    table[key] = table[key].astype(str).str.strip()
+    table[ROLES] = table[ROLES].apply(pd.to_numeric, errors="coerce")
+    return table.drop_duplicates(key).set_index(key)[ROLES]
+
+
+def labor_tables(path: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(hours by Model, labor dollars and their Source by Model); empty if the workbook is missing."""
+    path = path or DEFAULT_WORKBOOK_PATH
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ROLES), pd.DataFrame(columns=[*ROLES, "Source"])
+    return _load_labor_tables(path, os.path.getmtime(path))
+
+
+def device_labor(df: pd.DataFrame, path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Labor for each device in ``df`` (needs Model; Device Type improves the fallback).
+
+    Returns:
+        pd.DataFrame: Indexed like ``df`` with ``Labor_Hours_<role>``, ``Labor_Hours``,
+        ``Labor_Cost`` (ModelData or Pricing labor dollars, else hours at
+        ``DEFAULT_HOURLY_RATE``) and ``Labor_Hours_Source`` / ``Labor_Cost_Source``.
+    """
+    hours_table, dollar_table = labor_tables(path)
+    models = df["Model"].astype(str).str.strip() if "Model" in df.columns else pd.Series("", index=df.index)
+    types = df["Device Type"] if "Device Type" in df.columns else pd.Series("", index=df.index)
+
+    out = pd.DataFrame(index=df.index)
+    model_hours = hours_table.reindex(models.to_numpy())
+    from_model = model_hours.notna().all(axis=1).to_numpy()
+    for role in ROLES:
+        fallback = types.map({t: h[role] for t, h in DEFAULT_HOURS_BY_TYPE.items()}).fillna(DEFAULT_HOURS[role])
+        out[f"Labor_Hours_{role}"] = np.where(from_model, model_hours[role].to_numpy(), fallback.to_numpy())
+    out["Labor_Hours"] = out[[f"Labor_Hours_{r}" for r in ROLES]].sum(axis=1)
+
+    rated = sum(out[f"Labor_Hours_{r}"] * DEFAULT_HOURLY_RATE[r] for r in ROLES)
+    priced = dollar_table.reindex(models.to_numpy())
+    from_table = priced["Source"].notna().to_numpy()
+    out["Labor_Cost"] = np.where(from_table, priced[ROLES].sum(axis=1).to_numpy(), rated.to_numpy())
+    out["Labor_Hours_Source"] = np.where(from_model, SOURCE_MODEL, SOURCE_DEFAULT)
+    out["Labor_Cost_Source"] = np.where(from_table, priced["Source"].to_numpy(), SOURCE_DEFAULT)
+    return out
+
+
+def source_shares(labor: pd.DataFrame, column: str) -> Dict[str, float]:
+    """Share of devices per source in ``column`` of ``device_labor`` output (0 when absent)."""
+    shares = labor[column].value_counts(normalize=True)
+    return {src: float(shares.get(src, 0.0)) for src in [SOURCE_MODEL, SOURCE_PRICING, SOURCE_DEFAULT]}
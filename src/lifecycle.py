@@ -0,0 +1,272 @@
+"""
+Lifecycle metrics as of any date.
+
+The ETL freezes Days_Past_EoL, Support_Status and Risk_Level at its run date.
+This module reconstructs each device's milestone dates once per dataset
+version and re-derives those columns for any as-of date with datetime64
+arithmetic:
+
+* EoL date: the ModelData EoL date for the device's model when it parses as a
+  date; otherwise the snapshot date minus Days_Past_EoL for devices already
+  past EoL, or mid-year of EoL_Year (never on or before the snapshot) for the
+  rest.
+* EoS date: the ModelData EoS date when available; otherwise January 1 of the
+  year before the EoL year, which reproduces the ETL's "past EoS" band.
+* Last Day of Support: only when ModelData has a ``LDOS_COLUMNS`` column with
+  a date for the model (NaT otherwise).
+
+Days past EoL / EoS are exact day counts. Risk level and support status use
+the ETL's calendar-year bands: on the as-of date a device is Critical once its
+EoL year is over, High once past EoS, Medium while its EoL year is within
+``MEDIUM_HORIZON_YEARS`` and Low otherwise. The ETL's Risk_Score is a per-device
+base plus a term linear in days past EoL. Its slope is fitted on the past-EoL
+devices, and each score moves by that slope times the change in days past
+EoL, clipped to 0-100. The results for a date are a few
+compact arrays, cached per date, so moving the date rescores the whole fleet
+without rebuilding the milestones.
+
+The snapshot (ETL run) date is not stored in the dataset. It is estimated as
+the latest date consistent with every past-EoL device's EoL year and days past
+EoL.
+"""
+import datetime
+import os
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.labor import DEFAULT_WORKBOOK_PATH
+
+RISK_CRITICAL = "Critical (Past EoL)"
+RISK_HIGH = "High (Near EoL)"
+RISK_MEDIUM = "Medium (Approaching EoL)"
+RISK_LOW = "Low (Healthy)"
+SUPPORT_NONE = "No Support (Past EoL)"
+SUPPORT_EXPIRED = "Expired Support / At Risk (Past EoS)"
+SUPPORT_UNDER = "Under Support"
+RISK_LEVELS = np.array([RISK_CRITICAL, RISK_HIGH, RISK_MEDIUM, RISK_LOW], dtype=object)
+SUPPORT_STATUSES = np.array([SUPPORT_NONE, SUPPORT_EXPIRED, SUPPORT_UNDER], dtype=object)
+
+# EoL years up to this many years after the as-of year count as Medium.
+MEDIUM_HORIZON_YEARS = 4
+# Used when no device is past EoL, so the snapshot cannot be estimated.
+DEFAULT_SNAPSHOT = np.datetime64("2026-01-01", "D")
+AS_OF_STATE_KEY = "_as_of_date"
+# ModelData headers accepted for the Last Day of Support milestone.
+LDOS_COLUMNS = ["Last Day of Support", "LDoS", "LDOS"]
+MODEL_DATE_COLUMNS = ["EoS", "EoL", "LDoS"]
+
+
+class Milestones(NamedTuple):
+    """Per-device milestone dates (datetime64[D]), aligned to the source rows."""
+    eos: np.ndarray
+    eol: np.ndarray
+    ldos: np.ndarray              # NaT where the model has no Last Day of Support
+    eol_year: np.ndarray          # int64
+    snapshot: np.datetime64
+    eos_from_model: np.ndarray    # bool: EoS is the ModelData date, not the Jan 1 estimate
+    eol_from_model: np.ndarray    # bool: EoL is the ModelData date, not estimated
+
+
+def lifecycle_inputs(df: pd.DataFrame) -> List[str]:
+    """
+    Columns the as-of metrics depend on (empty if ``df`` lacks the lifecycle
+    columns). Model only matters when ModelData supplies dates, so it is left
+    out otherwise.
+    """
+    if not all(c in df.columns for c in ["EoL_Year", "Days_Past_EoL"]):
+        return []
+    columns = ["EoL_Year", "Days_Past_EoL"]
+    if "Model" in df.columns and _has_dates(model_dates()):
+        columns = ["Model"] + columns
+    if "Risk_Score" in df.columns:
+        columns.append("Risk_Score")
+    return columns
+
+
+def _year_start(years: np.ndarray) -> np.ndarray:
+    return (years - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+
+
+def _eol_inputs(df: pd.DataFrame):
+    eol_year = pd.to_numeric(df["EoL_Year"], errors="coerce").fillna(9999).to_numpy(dtype=np.int64)
+    days = pd.to_numeric(df["Days_Past_EoL"], errors="coerce").fillna(0).clip(lower=0).to_numpy(dtype=np.int64)
+    return eol_year, days
+
+
+def risk_score_per_day(df: pd.DataFrame) -> float:
+    """Least-squares slope of Risk_Score against days past EoL over past-EoL, uncapped devices."""
+    if "Risk_Score" not in df.columns:
+        return 0.0
+    _, days = _eol_inputs(df)
+    score = pd.to_numeric(df["Risk_Score"], errors="coerce").to_numpy(dtype=float)
+    fit = (days > 0) & (score < 100) & ~np.isnan(score)
+    if fit.sum() < 2 or days[fit].std() == 0:
+        return 0.0
+    x = days[fit] - days[fit].mean()
+    return max(float((x * score[fit]).sum() / (x * x).sum()), 0.0)
+
+
+def snapshot_date(df: pd.DataFrame) -> np.datetime64:
+    """Estimated ETL run date: max over past-EoL devices of Jan 1 of EoL_Year + days past EoL."""
+    eol_year, days = _eol_inputs(df)
+    past = (days > 0) & (eol_year < 9999)
+    if not past.any():
+        return DEFAULT_SNAPSHOT
+    return (_year_start(eol_year[past]) + days[past].astype("timedelta64[D]")).max()
+
+
+@st.cache_resource(show_spinner=False)
+def _load_model_dates(path: str, mtime: float) -> pd.DataFrame:
+    """ModelData EoS / EoL / LDoS dates by Model; unparseable values become NaT."""
+    _ = mtime
+    with pd.ExcelFile(path) as xls:
+        if "ModelData" not in xls.sheet_names:
+            return pd.DataFrame(columns=MODEL_DATE_COLUMNS)
+        sheet = xls.parse("ModelData")
+    if "Model" not in sheet.columns:
+        return pd.DataFrame(columns=MODEL_DATE_COLUMNS)
+    ldos = next((c for c in LDOS_COLUMNS if c in sheet.columns), None)
+    dates = pd.DataFrame({"Model": sheet["Model"].astype(str).str.strip()})
+    for col, source in zip(MODEL_DATE_COLUMNS, ["EoS", "EoL", ldos]):
+        values = sheet[source] if source in sheet.columns else pd.Series(pd.NaT, index=sheet.index)
+        dates[col] = pd.to_datetime(values, errors="coerce", format="mixed")
+    return dates.drop_duplicates("Model").set_index("Model")
+
+
+def _has_dates(table: pd.DataFrame) -> bool:
+    return not table.empty and bool(table.notna().to_numpy().any())
+
+
+def model_dates(path: Optional[str] = None) -> pd.DataFrame:
+    """EoS / EoL / LDoS dates by Model from the workbook; empty if it is missing."""
+    path = path or DEFAULT_WORKBOOK_PATH
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=MODEL_DATE_COLUMNS)
+    return _load_model_dates(path, os.path.getmtime(path))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def device_milestones(version: str, _df: pd.DataFrame) -> Milestones:
+    """
+    Milestone dates for every device, built once per dataset version.
+
+    Args:
+        version (str): Cache key identifying ``_df`` (see ``dataset_version``).
+        _df (pd.DataFrame): Devices with EoL_Year and Days_Past_EoL (Model optional).
+    """
+    eol_year, days = _eol_inputs(_df)
+    snapshot = snapshot_date(_df)
+    mid_year = _year_start(np.minimum(eol_year, 9000)) + np.timedelta64(181, "D")
+    eol = np.where(
+        days > 0,
+        snapshot - days.astype("timedelta64[D]"),
+        np.maximum(mid_year, snapshot + np.timedelta64(1, "D")),
+    )
+    eos = _year_start(np.minimum(eol_year, 9000) - 1)
+    ldos = np.full(len(_df), np.datetime64("NaT"), dtype="datetime64[D]")
+
+    has_eos = np.zeros(len(_df), dtype=bool)
+    has_eol = np.zeros(len(_df), dtype=bool)
+    if "Model" in _df.columns:
+        table = model_dates()
+        if _has_dates(table):
+            matched = table.reindex(_df["Model"].astype(str).str.strip().to_numpy())
+            model_eol = matched["EoL"].to_numpy(dtype="datetime64[D]")
+            model_eos = matched["EoS"].to_numpy(dtype="datetime64[D]")
+            ldos = matched["LDoS"].to_numpy(dtype="datetime64[D]")
+            has_eol, has_eos = ~np.isnat(model_eol), ~np.isnat(model_eos)
+            eol = np.where(has_eol, model_eol, eol)
+            eos = np.where(has_eos, model_eos, eos)
+            eol_year = np.where(has_eol, eol.astype("datetime64[Y]").astype(np.int64) + 1970, eol_year)
+    eos = np.minimum(eos, eol)
+    for arr in (eos, eol, ldos, eol_year, has_eos, has_eol):
+        arr.setflags(write=False)
+    return Milestones(
+        eos=eos, eol=eol, ldos=ldos, eol_year=eol_year, snapshot=snapshot,
+        eos_from_model=has_eos, eol_from_model=has_eol,
+    )
+
+
+class AsOf(NamedTuple):
+    """Lifecycle state of every device on one date, aligned to the source rows."""
+    days_past_eol: np.ndarray     # int32
+    days_past_eos: np.ndarray     # int32
+    risk_level: np.ndarray        # int8 index into RISK_LEVELS
+    support_status: np.ndarray    # int8 index into SUPPORT_STATUSES
+    risk_score: Optional[np.ndarray]  # float, None when the frame has no Risk_Score
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def lifecycle_as_of(version: str, as_of: datetime.date, _df: pd.DataFrame) -> AsOf:
+    """
+    Days past EoL / EoS, risk level, support status and risk score of every device on ``as_of``.
+
+    Args:
+        version (str): Cache key identifying ``_df``'s ``lifecycle_inputs`` columns.
+        as_of (datetime.date): Date to evaluate.
+        _df (pd.DataFrame): Devices with EoL_Year and Days_Past_EoL.
+    """
+    m = device_milestones(version, _df)
+    day = np.datetime64(as_of, "D")
+    year = as_of.year
+    days_past_eol = np.maximum((day - m.eol).astype(np.int64), 0).astype(np.int32)
+    days_past_eos = np.maximum((day - m.eos).astype(np.int64), 0).astype(np.int32)
+    # Like the ETL, risk bands follow the calendar year of EoL: a device whose
+    # EoL falls in the as-of year is still High until the year is out.
+    level = np.full(len(m.eol), 3, dtype=np.int8)
+    level[m.eol_year <= year + MEDIUM_HORIZON_YEARS] = 2
+    level[m.eos <= day] = 1
+    level[m.eol_year < year] = 0
+    support = np.minimum(level, 2)
+
+    risk_score = None
+    if "Risk_Score" in _df.columns:
+        _, days_then = _eol_inputs(_df)
+        score = pd.to_numeric(_df["Risk_Score"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        risk_score = score + risk_score_per_day(_df) * (days_past_eol - days_then)
+        risk_score = np.round(np.clip(risk_score, 0.0, 100.0), 1)
+    result = AsOf(days_past_eol, days_past_eos, level, support, risk_score)
+    for arr in result:
+        if arr is not None:
+            arr.setflags(write=False)
+    return result
+
+
+def _labels(df: pd.DataFrame, column: str, labels: np.ndarray, codes: np.ndarray):
+    # Take from a small array already in the column's string dtype, so pandas
+    # does not re-infer the dtype of a fleet-sized object array.
+    dtype = df[column].dtype if column in df.columns else object
+    return pd.array(labels, dtype=dtype).take(codes.astype(np.intp))
+
+
+def apply_as_of(df: pd.DataFrame, state: AsOf) -> pd.DataFrame:
+    """Overwrite ``df``'s lifecycle columns (in place) with ``state``; rows must align."""
+    df["Days_Past_EoL"] = state.days_past_eol
+    df["Days_Past_EoS"] = state.days_past_eos
+    df["Support_Status"] = _labels(df, "Support_Status", SUPPORT_STATUSES, state.support_status)
+    df["Risk_Level"] = _labels(df, "Risk_Level", RISK_LEVELS, state.risk_level)
+    if state.risk_score is not None:
+        df["Risk_Score"] = state.risk_score
+    return df
+
+
+def as_of_date() -> Optional[datetime.date]:
+    """The as-of date chosen in the sidebar, or None while the dataset snapshot is used."""
+    return st.session_state.get(AS_OF_STATE_KEY)
+
+
+def as_of_year(default: int) -> int:
+    """Year of the chosen as-of date, or ``default`` for the dataset snapshot."""
+    chosen = as_of_date()
+    return chosen.year if chosen is not None else default
+
+
+def years_since_snapshot(df: pd.DataFrame) -> float:
+    """Years from ``df``'s snapshot to the chosen as-of date (0 for the snapshot itself)."""
+    chosen = as_of_date()
+    if chosen is None:
+        return 0.0
+    return float((np.datetime64(chosen, "D") - snapshot_date(df)).astype("timedelta64[D]").astype(np.int64)) / 365.25
@@ -0,0 +1,156 @@
+"""
+Pinned, locally served front-end assets for the deck.gl / MapLibre maps.
+
+Files live under ``static/`` at the project root and are served by Streamlit's
+static file serving (``server.enableStaticServing`` in ``.streamlit/config.toml``)
+at ``app/static/...``. URLs carry a ``?v=`` content version, so a new pin or new
+file content yields a new URL and never a stale cached copy.
+
+Run ``python -m src.map_assets`` once on a connected machine to vendor any
+pinned library that is not yet present (e.g. before an air-gapped deployment).
+A library that is not vendored has no URL, and the maps say so instead of
+reaching out to the CDN, unless ``CDN_FALLBACK_ENV`` is set to ``1``.
+"""
+import hashlib
+import os
+import urllib.request
+from typing import Dict, Iterable, List, Optional
+
+import streamlit as st
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STATIC_DIR = os.path.join(PROJECT_ROOT, "static")
+STATIC_URL_PREFIX = "app/static"
+
+DECK_GL_VERSION = "8.9.35"
+MAPLIBRE_VERSION = "3.6.2"
+
+# asset key -> (path under static/, upstream URL used only for vendoring / fallback)
+PINNED_ASSETS: Dict[str, tuple] = {
+    "deck_js": (
+        f"vendor/deck.gl@{DECK_GL_VERSION}/dist.min.js",
+        f"https://unpkg.com/deck.gl@{DECK_GL_VERSION}/dist.min.js",
+    ),
+    "maplibre_js": (
+        f"vendor/maplibre-gl@{MAPLIBRE_VERSION}/maplibre-gl.js",
+        f"https://unpkg.com/maplibre-gl@{MAPLIBRE_VERSION}/dist/maplibre-gl.js",
+    ),
+    "maplibre_css": (
+        f"vendor/maplibre-gl@{MAPLIBRE_VERSION}/maplibre-gl.css",
+        f"https://unpkg.com/maplibre-gl@{MAPLIBRE_VERSION}/dist/maplibre-gl.css",
+    ),
+    "us_states": ("geo/us-states.geojson", None),
+    "us_counties": ("geo/us-counties.geojson", None),
+}
+# Libraries the deck.gl map cannot start without.
+MAP_LIBRARIES = ["deck_js", "maplibre_js", "maplibre_css"]
+# Set to "1" to load libraries that are not vendored from their pinned CDN URL.
+CDN_FALLBACK_ENV = "MAP_ASSETS_CDN_FALLBACK"
+
+# Offline basemap palette (close to Carto Positron, which the maps used before).
+BASEMAP_BACKGROUND = "#F2F3F0"
+BASEMAP_LAND = "#FAFAF8"
+BASEMAP_BORDER = "#C9CFD3"
+
+
+@st.cache_resource(show_spinner=False)
+def _file_version(path: str, mtime: float) -> str:
+    """Short content hash for a static file (recomputed only when it changes on disk)."""
+    _ = mtime
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def asset_url(key: str) -> Optional[str]:
+    """
+    Return the URL for a pinned asset.
+
+    Locally vendored files resolve to a versioned ``app/static`` URL, relative so it
+    works under any ``server.baseUrlPath``. Missing files return ``None``, except that
+    libraries fall back to their pinned CDN URL when ``CDN_FALLBACK_ENV`` is ``1``.
+    """
+    rel_path, upstream = PINNED_ASSETS[key]
+    path = os.path.join(STATIC_DIR, rel_path)
+    if os.path.exists(path):
+        version = _file_version(path, os.path.getmtime(path))
+        return f"{STATIC_URL_PREFIX}/{rel_path}?v={version}"
+    if upstream is not None and os.getenv(CDN_FALLBACK_ENV) == "1":
+        return upstream
+    return None
+
+
+def missing_assets(keys: Iterable[str]) -> List[str]:
+    """Keys among ``keys`` whose file is not present under ``static/``."""
+    return [k for k in keys if not os.path.exists(os.path.join(STATIC_DIR, PINNED_ASSETS[k][0]))]
+
+
+def offline_basemap_style() -> dict:
+    """
+    MapLibre style that needs no network: a flat background plus bundled state
+    polygons and borders. Source URLs are relative and resolved in the browser.
+    """
+    return {
+        "version": 8,
+        "sources": {
+            "states": {"type": "geojson", "data": asset_url("us_states")},
+        },
+        "layers": [
+            {
+                "id": "background",
+                "type": "background",
+                "paint": {"background-color": BASEMAP_BACKGROUND},
+            },
+            {
+                "id": "state-fill",
+                "type": "fill",
+                "source": "states",
+                "paint": {"fill-color": BASEMAP_LAND},
+            },
+            {
+                "id": "state-border",
+                "type": "line",
+                "source": "states",
+                "paint": {"line-color": BASEMAP_BORDER, "line-width": 0.8},
+            },
+        ],
+    }
+
+
+def plotly_offline_basemap() -> dict:
+    """
+    ``fig.update_layout`` arguments giving Plotly mapbox figures the same offline
+    basemap. The boundary file is referenced by URL, so it is not re-serialized
+    into every figure.
+    """
+    states_url = asset_url("us_states")
+    return dict(
+        mapbox_style="white-bg",
+        mapbox_layers=[
+            {
+                "sourcetype": "geojson", "source": states_url, "type": "fill",
+                "color": BASEMAP_LAND, "below": "traces",
+            },
+            {
+                "sourcetype": "geojson", "source": states_url, "type": "line",
+                "color": BASEMAP_BORDER, "line": {"width": 0.8}, "below": "traces",
+            },
+        ],
+    )
+
+
+def vendor_map_assets(force: bool = False) -> None:
+    """Download every pinned library that is missing from ``static/``."""
+    for key, (rel_path, upstream) in PINNED_ASSETS.items():
+        path = os.path.join(STATIC_DIR, rel_path)
+        if upstream is None or (os.path.exists(path) and not force):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(upstream, timeout=60) as response:
+            data = response.read()
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"Vendored {key}: {upstream} -> static/{rel_path} ({len(data) / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    vendor_map_assets()
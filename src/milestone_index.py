@@ -0,0 +1,210 @@
+"""
+Interval index over model lifecycle milestones.
+
+Devices are grouped once per dataset version by model and the vendor
+milestone dates ModelData lists for it (EoS, EoL and, when the sheet has the
+column, Last Day of Support), so a model with vendor dates is one group. A
+model without a vendor EoL date has no per-model milestone: its devices keep
+the per-device EoL estimate from ``src.lifecycle`` and group by model and
+that date, flagged as estimated, and the Jan 1 EoS placeholder is never
+indexed. Each group carries its device count and exposure (replacement cost);
+its milestone dates become events in one date-sorted array.
+
+"Which models hit a milestone between A and B" is two ``searchsorted`` calls on
+that array plus the ``k`` events between them, so O(log n + k) however many
+devices sit behind each group. The device rows behind the matched groups are
+contiguous CSR slices of a group-sorted row array. The quarterly calendar
+buckets only the matched events, never the device rows.
+"""
+import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.lifecycle import Milestones, device_milestones
+
+MILESTONES = ["EoS", "EoL", "LDoS"]
+MILESTONE_LABELS = {
+    "EoS": "End of Support",
+    "EoL": "End of Life",
+    "LDoS": "Last Day of Support",
+}
+INDEX_COLUMNS = ["Model", "EoL_Year", "Days_Past_EoL", "Total_Replacement_Cost"]
+
+_NAT = np.iinfo(np.int64).min
+
+
+def quarter_label(quarter: int) -> str:
+    """Label for a quarter counted from Q1 1970, e.g. ``2027 Q3``."""
+    return f"{1970 + quarter // 4} Q{quarter % 4 + 1}"
+
+
+def _quarters(days: np.ndarray) -> np.ndarray:
+    """Quarter number (from Q1 1970) of datetime64[D] values held as int64 days."""
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) // 3
+
+
+def _day(value: datetime.date) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def _group_codes(keys: np.ndarray) -> np.ndarray:
+    """
+    Dense group code per row of an int64 key matrix. Columns are folded in
+    one at a time with hash factorization, which is much faster than
+    ``np.unique(axis=0)`` and keeps every combined code below n squared.
+    """
+    codes = np.zeros(len(keys), dtype=np.int64)
+    for column in keys.T:
+        column_codes, uniques = pd.factorize(column)
+        codes, _ = pd.factorize(codes * len(uniques) + column_codes)
+    return codes.astype(np.int64)
+
+
+class MilestoneIndex:
+    """Date-sorted milestone events over device groups, with CSR device rows."""
+
+    def __init__(self, version: str, devices: pd.DataFrame, milestones: Milestones):
+        """
+        Args:
+            version (str): Dataset version the index was built for.
+            devices (pd.DataFrame): Devices with Model and Total_Replacement_Cost.
+            milestones (Milestones): Milestone dates aligned to ``devices``.
+        """
+        self.version = version
+        model_codes, models = pd.factorize(devices["Model"].fillna("Unknown").astype(str))
+        dates = {
+            "EoS": np.where(milestones.eos_from_model, milestones.eos.astype(np.int64), _NAT),
+            "EoL": milestones.eol.astype(np.int64),
+            "LDoS": np.where(np.isnat(milestones.ldos), _NAT, milestones.ldos.astype(np.int64)),
+        }
+        estimated = ~milestones.eol_from_model
+        keys = np.column_stack([model_codes, estimated] + [dates[m] for m in MILESTONES])
+        group_of = _group_codes(keys)
+        n_groups = int(group_of.max()) + 1 if len(group_of) else 0
+        first_row = np.zeros(n_groups, dtype=np.int64)
+        first_row[group_of[::-1]] = np.arange(len(group_of))[::-1]
+        group_keys = keys[first_row]
+
+        cost = pd.to_numeric(devices["Total_Replacement_Cost"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        self.group_model = np.asarray(models, dtype=object)[group_keys[:, 0]]
+        self.group_estimated = group_keys[:, 1].astype(bool)
+        self.group_devices = np.bincount(group_of, minlength=n_groups)
+        self.group_exposure = np.bincount(group_of, weights=cost, minlength=n_groups)
+
+        # CSR: device rows of group g are rows[offsets[g]:offsets[g + 1]].
+        self.rows = np.argsort(group_of, kind="stable")
+        self.offsets = np.r_[0, np.cumsum(self.group_devices)]
+        self.estimated_devices = int(estimated.sum())
+        self.estimated_models = int(len(np.unique(group_keys[self.group_estimated, 0])))
+
+        event_dates, event_groups, event_kinds = [], [], []
+        for kind, column in enumerate(group_keys[:, 2:].T):
+            present = np.nonzero(column != _NAT)[0]
+            event_dates.append(column[present])
+            event_groups.append(present)
+            event_kinds.append(np.full(len(present), kind, dtype=np.int8))
+        event_dates = np.concatenate(event_dates)
+        order = np.argsort(event_dates, kind="stable")
+        self._event_dates = event_dates[order]
+        self._event_groups = np.concatenate(event_groups)[order]
+        self._event_kinds = np.concatenate(event_kinds)[order]
+        self.milestones = [m for k, m in enumerate(MILESTONES) if (self._event_kinds == k).any()]
+
+    def __len__(self) -> int:
+        return len(self.group_devices)
+
+    def _events(
+        self, start: datetime.date, end: datetime.date, milestones: Optional[Iterable[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(dates, groups, kinds) of the events from ``start`` to ``end`` inclusive."""
+        lo = np.searchsorted(self._event_dates, _day(start), side="left")
+        hi = np.searchsorted(self._event_dates, _day(end), side="right")
+        dates, groups, kinds = self._event_dates[lo:hi], self._event_groups[lo:hi], self._event_kinds[lo:hi]
+        if milestones is not None:
+            keep = np.isin(kinds, [MILESTONES.index(m) for m in milestones])
+            dates, groups, kinds = dates[keep], groups[keep], kinds[keep]
+        return dates, groups, kinds
+
+    def query(
+        self, start: datetime.date, end: datetime.date, milestones: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Models hitting a milestone from ``start`` to ``end`` inclusive, in date order.
+
+        Returns:
+            pd.DataFrame: Date, Milestone, Model, Dates ("ModelData" or
+            "Estimated"), Devices and Exposure, one row per (group, milestone) event.
+        """
+        dates, groups, kinds = self._events(start, end, milestones)
+        return pd.DataFrame({
+            "Date": dates.astype("datetime64[D]"),
+            "Milestone": np.asarray(MILESTONES, dtype=object)[kinds],
+            "Model": self.group_model[groups],
+            "Dates": np.where(self.group_estimated[groups], "Estimated", "ModelData"),
+            "Devices": self.group_devices[groups],
+            "Exposure": self.group_exposure[groups],
+        })
+
+    def device_rows(
+        self, start: datetime.date, end: datetime.date, milestones: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Positions (into the indexed frame) of the devices hitting a milestone in the range."""
+        _, groups, _ = self._events(start, end, milestones)
+        groups = np.unique(groups)
+        if not len(groups):
+            return np.empty(0, dtype=np.int64)
+        lengths = self.group_devices[groups]
+        # Concatenate the CSR slices without a Python loop over groups.
+        starts = np.repeat(self.offsets[groups] - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        return np.sort(self.rows[starts + np.arange(lengths.sum())])
+
+    def calendar(
+        self, start: datetime.date, end: datetime.date, milestones: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Quarterly milestone calendar from ``start`` to ``end``.
+
+        Returns:
+            pd.DataFrame: Quarter, Milestone, Models, Devices and Exposure for
+            every quarter in the range and every milestone the index holds
+            (zeros where nothing falls due).
+        """
+        dates, groups, kinds = self._events(start, end, milestones)
+        first, last = _quarters(np.array([_day(start), _day(end)]))
+        shown = [m for m in self.milestones if milestones is None or m in milestones]
+        kind_ids = np.array([MILESTONES.index(m) for m in shown], dtype=np.int64)
+        n_quarters, n_kinds = int(last - first + 1), len(kind_ids)
+
+        kind_pos = np.searchsorted(kind_ids, kinds)
+        cell = (_quarters(dates) - first) * n_kinds + kind_pos
+        size = n_quarters * n_kinds
+        devices = np.bincount(cell, weights=self.group_devices[groups], minlength=size)
+        exposure = np.bincount(cell, weights=self.group_exposure[groups], minlength=size)
+        # Distinct models per cell: unique (cell, model) pairs.
+        model_codes = pd.factorize(self.group_model[groups])[0]
+        pairs = np.unique(np.column_stack([cell, model_codes]), axis=0)
+        models = np.bincount(pairs[:, 0], minlength=size)
+
+        quarters = np.repeat(np.arange(first, last + 1), n_kinds)
+        return pd.DataFrame({
+            "Quarter": [quarter_label(q) for q in quarters],
+            "Milestone": np.tile(np.asarray(shown, dtype=object), n_quarters),
+            "Models": models,
+            "Devices": devices.astype(np.int64),
+            "Exposure": exposure,
+        })
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def milestone_index(version: str, _devices: pd.DataFrame) -> MilestoneIndex:
+    """
+    Milestone index for one dataset version, built once and reused across reruns.
+
+    Args:
+        version (str): Cache key identifying ``_devices``'s ``INDEX_COLUMNS``.
+        _devices (pd.DataFrame): Devices with ``INDEX_COLUMNS``.
+    """
+    return MilestoneIndex(version, _devices, device_milestones(version, _devices))
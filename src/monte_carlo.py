@@ -0,0 +1,145 @@
+"""
+Monte Carlo forecasts for the Predictive Risk Forecast page.
+
+The page's deterministic models fix the incident, extended-support and
+compliance rates, the replacement pace and the EoL calendar. Here each of those
+inputs is drawn from a triangular (low, most likely, high) distribution, one
+draw per scenario. Every forecast is a NumPy array of shape (scenarios x periods)
+built by broadcasting, with no per-scenario or per-period Python loops:
+
+* Cost of inaction: ``base x (1 + (incident + support) x q + compliance x max(q - 2, 0))``.
+* At-risk devices under a budget: ``x_t = max(0, x_{t-1} + new_eol_t - replaced_t)``
+  is a Lindley recursion, solved in closed form by ``lindley``. EoL slippage
+  shifts the cumulative EoL curve in time (linear interpolation between
+  years), which spreads arrivals accordingly.
+
+Results are reduced to P10 / P50 / P90 bands and cached per parameter set.
+"""
+from typing import Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+Triangular = Tuple[float, float, float]  # (low, most likely, high)
+
+PERCENTILES = (10, 50, 90)
+SCENARIO_CHOICES = [1_000, 10_000, 50_000, 100_000]
+DEFAULT_SCENARIOS = 10_000
+DEFAULT_SEED = 2026
+
+# Quarterly rates as fractions of the at-risk replacement cost (most likely = the
+# deterministic model's values).
+RATE_DISTRIBUTIONS: Dict[str, Triangular] = {
+    "incident_rate": (0.01, 0.02, 0.04),
+    "support_premium": (0.05, 0.08, 0.12),
+    "compliance_penalty_rate": (0.01, 0.03, 0.06),
+}
+# Realized pace as a multiple of the planned pace, and vendor EoL slippage in years.
+PLAN_DISTRIBUTIONS: Dict[str, Triangular] = {
+    "pace_realization": (0.75, 1.0, 1.1),
+    "eol_slip_years": (0.0, 0.25, 1.5),
+}
+# Quarters before compliance penalties start accruing.
+COMPLIANCE_GRACE_QUARTERS = 2
+
+
+def sample_triangular(dist: Triangular, n: int, rng: np.random.Generator) -> np.ndarray:
+    """``n`` draws from a triangular distribution; a degenerate range returns its mode."""
+    low, mode, high = (float(v) for v in dist)
+    low, high = min(low, high), max(low, high)
+    if high <= low:
+        return np.full(n, mode)
+    return rng.triangular(low, min(max(mode, low), high), high, size=n)
+
+
+def lindley(start: float, increments: np.ndarray) -> np.ndarray:
+    """
+    ``x_t = max(0, x_{t-1} + increments_t)`` with ``x_0 = start`` along the last
+    axis, in closed form: ``S_t - min(0, min_{k<=t} S_k)`` over the running sum ``S``.
+    """
+    running = start + np.cumsum(increments, axis=-1)
+    return running - np.minimum(np.minimum.accumulate(running, axis=-1), 0.0)
+
+
+def percentile_bands(samples: np.ndarray) -> Dict[str, np.ndarray]:
+    """P10 / P50 / P90 per period of a (scenarios x periods) array."""
+    bands = np.percentile(samples, PERCENTILES, axis=0)
+    return {f"P{p}": band for p, band in zip(PERCENTILES, bands)}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def simulate_inaction(
+    base_cost: float,
+    quarters: int,
+    distributions: Mapping[str, Triangular],
+    n_scenarios: int = DEFAULT_SCENARIOS,
+    seed: int = DEFAULT_SEED,
+) -> pd.DataFrame:
+    """
+    Added cost of delaying replacement, per quarter.
+
+    Args:
+        base_cost (float): Replacement cost of the at-risk devices.
+        quarters (int): Quarters to project, starting at quarter 0 (today).
+        distributions (Mapping[str, Triangular]): Keys of ``RATE_DISTRIBUTIONS``.
+        n_scenarios (int): Number of sampled scenarios.
+        seed (int): Random seed, so a parameter set always gives the same bands.
+
+    Returns:
+        pd.DataFrame: quarter_num, P10, P50, P90 (added cost) and Mean.
+    """
+    rng = np.random.default_rng(seed)
+    rates = {k: sample_triangular(distributions[k], n_scenarios, rng)[:, None] for k in RATE_DISTRIBUTIONS}
+    q = np.arange(quarters, dtype=float)[None, :]
+    added = base_cost * (
+        (rates["incident_rate"] + rates["support_premium"]) * q
+        + rates["compliance_penalty_rate"] * np.maximum(q - COMPLIANCE_GRACE_QUARTERS, 0.0)
+    )
+    return pd.DataFrame({"quarter_num": np.arange(quarters), **percentile_bands(added), "Mean": added.mean(axis=0)})
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def simulate_at_risk(
+    at_risk: int,
+    eol_counts: Sequence[int],
+    years: Sequence[int],
+    devices_per_year: float,
+    distributions: Mapping[str, Triangular],
+    n_scenarios: int = DEFAULT_SCENARIOS,
+    seed: int = DEFAULT_SEED,
+) -> pd.DataFrame:
+    """
+    At-risk devices at the end of each year under an investment plan.
+
+    Args:
+        at_risk (int): Devices at risk today.
+        eol_counts (Sequence[int]): Devices reaching EoL in each of ``years`` (as scheduled).
+        years (Sequence[int]): Consecutive forecast years.
+        devices_per_year (float): Planned replacements per year (budget / unit cost x pace).
+        distributions (Mapping[str, Triangular]): Keys of ``PLAN_DISTRIBUTIONS``.
+        n_scenarios (int): Number of sampled scenarios.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Year, P10, P50, P90 and Mean at-risk devices with the plan,
+        and Do_Nothing_P10 / P50 / P90 without it.
+    """
+    rng = np.random.default_rng(seed)
+    pace = sample_triangular(distributions["pace_realization"], n_scenarios, rng)[:, None]
+    slip = sample_triangular(distributions["eol_slip_years"], n_scenarios, rng)[:, None]
+
+    years = np.asarray(years, dtype=float)
+    # Cumulative scheduled EoL arrivals at the end of each year, shifted later by the slip.
+    knots = np.r_[years[0] - 1, years]
+    cumulative = np.r_[0.0, np.cumsum(np.asarray(eol_counts, dtype=float))]
+    arrived = np.interp(years[None, :] - slip, knots, cumulative)
+    new_eol = np.diff(np.c_[np.zeros(n_scenarios), arrived], axis=1)
+
+    do_nothing = at_risk + np.cumsum(new_eol, axis=1)
+    with_plan = lindley(at_risk, new_eol - devices_per_year * pace)
+
+    out = pd.DataFrame({"Year": years.astype(int), **percentile_bands(with_plan), "Mean": with_plan.mean(axis=0)})
+    for name, band in percentile_bands(do_nothing).items():
+        out[f"Do_Nothing_{name}"] = band
+    return out
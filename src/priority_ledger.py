@@ -0,0 +1,137 @@
+"""
+Ranked replacement ledger for the Budget Impact Simulator.
+
+Devices are ranked once per dataset version (highest Risk_Score first) and
+their replacement costs are held in a Fenwick (binary indexed) tree alongside a
+second tree counting in-scope devices. Excluding or restoring a device is an
+O(log n) point update, and "how many of the top-ranked in-scope devices fit in
+budget B" is an O(log n) descent over the cost tree, so budget and exception
+changes never re-sort or re-accumulate the fleet.
+"""
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _fenwick_build(values: np.ndarray) -> np.ndarray:
+    """1-based Fenwick tree of ``values``, built in O(n) from prefix sums."""
+    n = len(values)
+    prefix = np.r_[0, np.cumsum(values)]
+    i = np.arange(1, n + 1)
+    tree = np.zeros(n + 1, dtype=prefix.dtype)
+    tree[1:] = prefix[i] - prefix[i - (i & -i)]
+    return tree
+
+
+def _fenwick_add(tree: np.ndarray, position: int, delta) -> None:
+    """Add ``delta`` at 0-based ``position``."""
+    i = position + 1
+    n = len(tree) - 1
+    while i <= n:
+        tree[i] += delta
+        i += i & -i
+
+
+class PriorityLedger:
+    """Fleet ranked by Risk_Score with Fenwick trees over in-scope cost and count."""
+
+    def __init__(self, version: str, fleet: pd.DataFrame):
+        """
+        Args:
+            version (str): Dataset version the ledger was built for.
+            fleet (pd.DataFrame): Rows with Risk_Score and Total_Replacement_Cost;
+                row positions are the ledger's device identifiers.
+        """
+        self.version = version
+        risk = fleet["Risk_Score"].to_numpy(dtype=float)
+        # Stable, so equal scores keep their dataset order.
+        self.order = np.argsort(-risk, kind="stable")
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+        self.cost = fleet["Total_Replacement_Cost"].to_numpy(dtype=float)[self.order]
+        self.excluded = np.zeros(len(self.order), dtype=bool)
+        self._cost_tree = _fenwick_build(self.cost)
+        self._count_tree = _fenwick_build(np.ones(len(self.order), dtype=np.int64))
+        self.in_scope = len(self.order)
+        self._step = 1 << max(len(self.order).bit_length() - 1, 0)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    # ── updates ───────────────────────────────────────────────────────────
+    def _set(self, ranks: np.ndarray, exclude: bool) -> None:
+        ranks = ranks[self.excluded[ranks] != exclude]
+        sign = -1 if exclude else 1
+        for r in ranks.tolist():
+            _fenwick_add(self._cost_tree, r, sign * self.cost[r])
+            _fenwick_add(self._count_tree, r, sign)
+        self.excluded[ranks] = exclude
+        self.in_scope += sign * len(ranks)
+
+    def exclude(self, rows: np.ndarray) -> None:
+        """Take fleet rows out of scope (O(log n) each)."""
+        self._set(self.rank[np.asarray(rows, dtype=np.int64)], True)
+
+    def restore(self, rows: np.ndarray) -> None:
+        """Bring fleet rows back into scope (O(log n) each)."""
+        self._set(self.rank[np.asarray(rows, dtype=np.int64)], False)
+
+    def sync(self, excluded_rows: np.ndarray) -> int:
+        """
+        Match the ledger to a boolean exclusion mask over fleet rows, updating
+        only the devices whose state changed.
+
+        Returns:
+            int: Number of devices updated.
+        """
+        changed = np.flatnonzero(np.asarray(excluded_rows, dtype=bool)[self.order] != self.excluded)
+        if len(changed) * max(len(self).bit_length(), 1) > len(self):
+            # Bulk change: rebuilding is cheaper than point updates.
+            self.excluded[changed] = ~self.excluded[changed]
+            self._cost_tree = _fenwick_build(np.where(self.excluded, 0.0, self.cost))
+            self._count_tree = _fenwick_build((~self.excluded).astype(np.int64))
+            self.in_scope = int((~self.excluded).sum())
+        else:
+            to_exclude = changed[~self.excluded[changed]]
+            self._set(changed[self.excluded[changed]], False)
+            self._set(to_exclude, True)
+        return len(changed)
+
+    # ── queries ───────────────────────────────────────────────────────────
+    def fit(self, budget: float) -> Tuple[int, float]:
+        """
+        Longest run of top-ranked in-scope devices whose total cost is within budget.
+
+        Returns:
+            tuple: (devices that fit, their total cost).
+        """
+        position, spend, count = 0, 0.0, 0
+        step = self._step if len(self) else 0
+        while step:
+            nxt = position + step
+            if nxt <= len(self) and spend + self._cost_tree[nxt] <= budget:
+                position = nxt
+                spend += self._cost_tree[nxt]
+                count += int(self._count_tree[nxt])
+            step >>= 1
+        return count, float(spend)
+
+    def _position_of(self, k: int) -> int:
+        """Ledger position just past the ``k``-th in-scope device (O(log n))."""
+        position, remaining, step = 0, k, self._step if len(self) else 0
+        while step:
+            nxt = position + step
+            if nxt <= len(self) and self._count_tree[nxt] < remaining:
+                position = nxt
+                remaining -= int(self._count_tree[nxt])
+            step >>= 1
+        return min(position + 1, len(self))
+
+    def top_rows(self, k: int) -> np.ndarray:
+        """Fleet rows of the ``k`` highest-ranked in-scope devices, in priority order."""
+        k = min(int(k), self.in_scope)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        end = self._position_of(k)
+        return self.order[np.flatnonzero(~self.excluded[:end])]
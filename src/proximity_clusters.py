@@ -0,0 +1,180 @@
+"""
+Incrementally maintained proximity clusters of sites.
+
+Two sites belong to the same cluster when a chain of sites, each within the
+cluster radius of the next, connects them (single linkage; the same clusters
+DBSCAN finds with ``min_samples=2``). Sites are hashed onto a uniform lat/long
+grid whose cells are at least one radius wide, so a site's neighbours are found
+in its 3x3 block of cells, and connectivity is kept in a union-find.
+
+Adding a site touches only its neighbouring cells. Removing sites re-links only
+the clusters they belonged to. Cluster IDs are stable: a cluster keeps its ID as
+sites join or leave, a merge keeps the larger cluster's ID and a split keeps it
+on the largest piece.
+"""
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.05
+
+# Longitude cells are widened for the highest latitude served (northern Alaska).
+MAX_ABS_LATITUDE = 72.0
+
+
+def _haversine_miles(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in miles from one point to many."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class ProximityClusterIndex:
+    """Grid hash plus union-find over sites within ``radius_miles`` of each other."""
+
+    def __init__(self, radius_miles: float):
+        self.radius_miles = float(radius_miles)
+        self._dlat = self.radius_miles / MILES_PER_DEGREE_LAT
+        self._dlon = self._dlat / math.cos(math.radians(MAX_ABS_LATITUDE))
+        self._coords: Dict[str, Tuple[float, float]] = {}
+        self._grid: Dict[Tuple[int, int], Set[str]] = {}
+        self._parent: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {}   # root -> sites in its cluster
+        self._cluster_id: Dict[str, int] = {}     # root -> ID (clusters of 2+ sites only)
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    # ── grid ──────────────────────────────────────────────────────────────
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._dlat), math.floor(lon / self._dlon)
+
+    def _neighbours(self, site: str) -> List[str]:
+        """Sites within the radius of ``site`` (excluding itself)."""
+        lat, lon = self._coords[site]
+        row, col = self._cell(lat, lon)
+        candidates = [
+            other
+            for dr in (-1, 0, 1)
+            for dc in (-1, 0, 1)
+            for other in self._grid.get((row + dr, col + dc), ())
+            if other != site
+        ]
+        if not candidates:
+            return []
+        coords = np.array([self._coords[c] for c in candidates])
+        close = _haversine_miles(lat, lon, coords[:, 0], coords[:, 1]) <= self.radius_miles
+        return [c for c, keep in zip(candidates, close) if keep]
+
+    # ── union-find ────────────────────────────────────────────────────────
+    def _find(self, site: str) -> str:
+        root = site
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[site] != root:
+            self._parent[site], site = root, self._parent[site]
+        return root
+
+    def _union(self, a: str, b: str) -> None:
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return
+        if len(self._members[ra]) < len(self._members[rb]):
+            ra, rb = rb, ra
+        # ra (the larger cluster) survives and keeps its ID; rb's ID is retired.
+        id_a, id_b = self._cluster_id.pop(ra, None), self._cluster_id.pop(rb, None)
+        self._parent[rb] = ra
+        self._members[ra] |= self._members.pop(rb)
+        keep = id_a if id_a is not None else id_b
+        self._cluster_id[ra] = keep if keep is not None else self._new_id()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+    # ── updates ───────────────────────────────────────────────────────────
+    def add(self, site: str, lat: float, lon: float) -> None:
+        """Insert a site and link it to every site within the radius."""
+        self._coords[site] = (float(lat), float(lon))
+        self._grid.setdefault(self._cell(lat, lon), set()).add(site)
+        self._parent[site] = site
+        self._members[site] = {site}
+        for other in self._neighbours(site):
+            self._union(site, other)
+
+    def remove(self, sites: Iterable[str]) -> None:
+        """Delete sites, then re-link only the clusters that contained them."""
+        affected: Dict[str, Set[str]] = {}
+        for site in sites:
+            if site not in self._coords:
+                continue
+            root = self._find(site)
+            affected.setdefault(root, set()).add(site)
+        for root, removed in affected.items():
+            members = self._members.pop(root)
+            old_id = self._cluster_id.pop(root, None)
+            for site in removed:
+                lat, lon = self._coords.pop(site)
+                cell = self._grid[self._cell(lat, lon)]
+                cell.discard(site)
+                if not cell:
+                    del self._grid[self._cell(lat, lon)]
+                del self._parent[site]
+            self._relink(members - removed, old_id)
+
+    def _relink(self, sites: Set[str], old_id: Optional[int]) -> None:
+        """Rebuild connectivity among ``sites`` (the remains of one cluster)."""
+        unvisited = set(sites)
+        pieces: List[Set[str]] = []
+        while unvisited:
+            start = unvisited.pop()
+            piece, frontier = {start}, [start]
+            while frontier:
+                for other in self._neighbours(frontier.pop()):
+                    if other in unvisited:
+                        unvisited.discard(other)
+                        piece.add(other)
+                        frontier.append(other)
+            pieces.append(piece)
+        pieces.sort(key=len, reverse=True)
+        for rank, piece in enumerate(pieces):
+            root = next(iter(piece))
+            for site in piece:
+                self._parent[site] = root
+            self._members[root] = piece
+            if len(piece) >= 2:
+                keep = old_id if rank == 0 and old_id is not None else None
+                self._cluster_id[root] = keep if keep is not None else self._new_id()
+
+    def sync(self, sites: pd.DataFrame) -> Tuple[int, int]:
+        """
+        Bring the index in line with ``sites`` (Site_Code, Latitude, Longitude),
+        applying only the differences since the previous call.
+
+        Returns:
+            tuple: (sites added, sites removed); a moved site counts as both.
+        """
+        current = dict(zip(
+            sites["Site_Code"].astype(str),
+            zip(sites["Latitude"].astype(float), sites["Longitude"].astype(float)),
+        ))
+        stale = [s for s, xy in self._coords.items() if current.get(s) != xy]
+        self.remove(stale)
+        added = [s for s in current if s not in self._coords]
+        for site in added:
+            self.add(site, *current[site])
+        return len(added), len(stale)
+
+    def labels(self, site_codes: Iterable[str]) -> np.ndarray:
+        """Cluster ID for each site, or -1 for sites with no neighbour in range."""
+        return np.array(
+            [self._cluster_id.get(self._find(str(s)), -1) for s in site_codes], dtype=np.int64
+        )
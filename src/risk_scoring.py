@@ -0,0 +1,109 @@
+"""
+Configurable device risk scoring.
+
+Each device is described by a small normalized feature matrix, built once per
+dataset version:
+
+* ``eol``: days past EoL, saturating at ``EOL_SATURATION_DAYS``
+* ``support``: support status severity (no support > expired > under support)
+* ``criticality``: device type criticality (firewalls and routers highest)
+* ``cost``: log-scaled replacement cost relative to the fleet's most expensive device
+* ``decom``: 1 for devices flagged for decommission
+
+A score is ``clip(features @ weights, 0, 100)``. Changing the weights is one
+matrix-vector product over the cached matrix, so planners can retune the
+weighting live. The default weights sum to 100 over the positive features, so
+the scores stay on the dataset's 0-100 scale.
+"""
+import hashlib
+from typing import Dict, Mapping
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+FEATURES = ["eol", "support", "criticality", "cost", "decom"]
+FEATURE_LABELS = {
+    "eol": "Days past EoL",
+    "support": "Support status",
+    "criticality": "Device type criticality",
+    "cost": "Replacement cost",
+    "decom": "Decommission flag",
+}
+# Columns read when present; missing ones leave their feature at zero.
+SCORING_COLUMNS = ["Days_Past_EoL", "Support_Status", "Device Type", "Is_Decom", "Total_Replacement_Cost"]
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "eol": 45.0,
+    "support": 30.0,
+    "criticality": 15.0,
+    "cost": 10.0,
+    "decom": -100.0,
+}
+
+# Five years past EoL counts as fully exposed.
+EOL_SATURATION_DAYS = 1825.0
+
+SUPPORT_SEVERITY = {
+    "No Support (Past EoL)": 1.0,
+    "Expired Support / At Risk (Past EoS)": 0.6,
+    "Under Support": 0.0,
+}
+DEVICE_CRITICALITY = {
+    "Firewall": 1.0,
+    "Router": 0.9,
+    "Voice Gateway": 0.7,
+    "Switch": 0.6,
+    "Wireless AP": 0.3,
+}
+DEFAULT_CRITICALITY = 0.5
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def risk_features(version: str, _df: pd.DataFrame) -> np.ndarray:
+    """
+    Read-only (devices x ``FEATURES``) float32 matrix, aligned to ``_df``.
+
+    Args:
+        version (str): Cache key identifying ``_df`` (see ``dataset_version``).
+        _df (pd.DataFrame): Devices with any of ``SCORING_COLUMNS``.
+    """
+    n = len(_df)
+    features = np.zeros((n, len(FEATURES)), dtype=np.float32)
+
+    def column(name: str) -> pd.Series:
+        return _df[name] if name in _df.columns else pd.Series(np.nan, index=_df.index)
+
+    days = pd.to_numeric(column("Days_Past_EoL"), errors="coerce").fillna(0).to_numpy(dtype=float)
+    features[:, 0] = np.clip(days / EOL_SATURATION_DAYS, 0.0, 1.0)
+    features[:, 1] = column("Support_Status").map(SUPPORT_SEVERITY).fillna(0.0).to_numpy(dtype=float)
+    features[:, 2] = column("Device Type").map(DEVICE_CRITICALITY).fillna(DEFAULT_CRITICALITY).to_numpy(dtype=float)
+    cost = np.log1p(np.maximum(
+        pd.to_numeric(column("Total_Replacement_Cost"), errors="coerce").fillna(0).to_numpy(dtype=float), 0.0
+    ))
+    features[:, 3] = cost / cost.max() if n and cost.max() > 0 else 0.0
+    features[:, 4] = column("Is_Decom").fillna(False).astype(bool).to_numpy()
+    features.setflags(write=False)
+    return features
+
+
+def weight_vector(weights: Mapping[str, float]) -> np.ndarray:
+    """Weights in ``FEATURES`` order; features not named get their default weight."""
+    return np.array([float(weights.get(f, DEFAULT_WEIGHTS[f])) for f in FEATURES], dtype=np.float32)
+
+
+def score_features(features: np.ndarray, weights: Mapping[str, float]) -> np.ndarray:
+    """Risk scores (0-100, one decimal) for a feature matrix under ``weights``."""
+    scores = features @ weight_vector(weights)
+    np.clip(scores, 0.0, 100.0, out=scores)
+    return np.round(scores, 1).astype(float)
+
+
+def weighted_version(version: str, weights: Mapping[str, float]) -> str:
+    """
+    Short hash identifying a dataset version rescored under ``weights``,
+    without re-hashing the rows.
+    """
+    digest = hashlib.sha1(version.encode("utf-8"))
+    digest.update(weight_vector(weights).tobytes())
+    return digest.hexdigest()[:16]
@@ -0,0 +1,62 @@
+"""
+Precomputed grid for the Investment Scenario Analyzer.
+
+The analyzer's sliders only ever take ``len(BUDGET_STEPS)`` budgets and
+``len(PACE_MULTIPLIERS)`` paces, so every at-risk trajectory they can show is
+computed at once. It is a (budgets x paces x years) tensor built by one
+broadcast plus the closed-form ``lindley`` recursion. The tensor is cached per
+fleet summary (devices at risk, the EoL calendar and unit cost), which changes
+only with the data or the filters. Moving a slider is then an index lookup.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import streamlit as st
+
+from src.monte_carlo import lindley
+
+BUDGET_MIN = 0
+BUDGET_MAX = 5_000_000
+BUDGET_STEP = 100_000
+BUDGET_STEPS = np.arange(BUDGET_MIN, BUDGET_MAX + BUDGET_STEP, BUDGET_STEP)
+
+PACE_MULTIPLIERS = {"Conservative": 0.7, "Moderate": 1.0, "Aggressive": 1.4}
+# Years shown, starting with the as-of year.
+SCENARIO_HORIZON_YEARS = 7
+
+
+def scenario_years(start_year: int) -> List[int]:
+    """The analyzer's years, from ``start_year`` (the as-of year) on."""
+    return list(range(start_year, start_year + SCENARIO_HORIZON_YEARS))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def scenario_grid(at_risk: int, eol_counts: Sequence[int], avg_cost: float) -> Dict[str, np.ndarray]:
+    """
+    Every analyzer scenario for one fleet.
+
+    Args:
+        at_risk (int): Devices at risk today.
+        eol_counts (Sequence[int]): Devices newly reaching EoL in each of the
+            ``scenario_years``, excluding those already at risk.
+        avg_cost (float): Average replacement cost per device.
+
+    Returns:
+        dict: ``devices_per_year`` (budgets x paces), ``invest`` (budgets x paces x
+        years at-risk devices with the investment) and ``do_nothing`` (years).
+    """
+    paces = np.fromiter(PACE_MULTIPLIERS.values(), dtype=float)
+    devices_per_year = np.floor(BUDGET_STEPS[:, None] / max(avg_cost, 1) * paces[None, :])
+    new_eol = np.asarray(eol_counts, dtype=float)
+    invest = lindley(at_risk, new_eol[None, None, :] - devices_per_year[:, :, None])
+    return {
+        "devices_per_year": devices_per_year.astype(np.int64),
+        "invest": np.rint(invest).astype(np.int64),
+        "do_nothing": at_risk + np.cumsum(new_eol).astype(np.int64),
+    }
+
+
+def grid_index(budget: float, pace: str) -> Tuple[int, int]:
+    """(budget index, pace index) of a slider position."""
+    b = int(np.clip(np.searchsorted(BUDGET_STEPS, budget), 0, len(BUDGET_STEPS) - 1))
+    return b, list(PACE_MULTIPLIERS).index(pace)
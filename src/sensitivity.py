@@ -0,0 +1,133 @@
+"""
+Sensitivity analysis for the Cost of Inaction model.
+
+The model's added cost after ``q`` quarters is
+
+    base x ((incident + support) x q + compliance x max(q - grace, 0))
+
+with ``base`` the replacement cost of the devices in scope. Each parameter
+gets a list of levels, from its low to its high value. Every variant is one row
+of a (variants x parameters) matrix holding the base case with one parameter
+(one-at-a-time) or two parameters (pairwise grid) moved to their levels. One
+broadcast expression evaluates the whole matrix, so hundreds of variants cost
+about the same as the single deterministic evaluation.
+"""
+from itertools import combinations
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PARAMETERS = ["incident_rate", "support_premium", "compliance_penalty_rate", "compliance_grace_quarters", "base_cost"]
+PARAMETER_LABELS = {
+    "incident_rate": "Incident rate / qtr",
+    "support_premium": "Support premium / qtr",
+    "compliance_penalty_rate": "Compliance penalty / qtr",
+    "compliance_grace_quarters": "Compliance grace (quarters)",
+    "base_cost": "Cost scope",
+}
+# Levels per parameter in the pairwise grids (integer parameters use each whole value).
+GRID_LEVELS = 11
+# Default one-at-a-time swing for the rates: +/- this share of the base value.
+DEFAULT_RATE_SWING = 0.5
+
+
+def added_cost(params: np.ndarray, quarter: int) -> np.ndarray:
+    """Added cost after ``quarter`` quarters for each row of a (variants x ``PARAMETERS``) matrix."""
+    incident, support, compliance, grace, base = params.T
+    return base * ((incident + support) * quarter + compliance * np.maximum(quarter - grace, 0.0))
+
+
+def parameter_levels(low: float, high: float, integer: bool = False) -> np.ndarray:
+    """Evenly spaced levels from ``low`` to ``high`` (whole numbers when ``integer``)."""
+    low, high = min(low, high), max(low, high)
+    if integer:
+        return np.arange(np.floor(low), np.floor(high) + 1, dtype=float)
+    return np.linspace(low, high, GRID_LEVELS)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def sensitivity(
+    base: Mapping[str, float],
+    ranges: Mapping[str, Tuple[float, float]],
+    quarter: int,
+    scope_levels: Sequence[float] = (),
+) -> Dict[str, object]:
+    """
+    One-at-a-time and pairwise sensitivity of the added cost at ``quarter``.
+
+    Args:
+        base (Mapping[str, float]): Base value of each of ``PARAMETERS``.
+        ranges (Mapping[str, Tuple[float, float]]): (low, high) per parameter;
+            ``base_cost`` may be omitted when ``scope_levels`` is given.
+        quarter (int): Quarters of delay at which the added cost is read.
+        scope_levels (Sequence[float]): Base costs of alternative device scopes,
+            used as the ``base_cost`` levels instead of a continuous range.
+
+    Returns:
+        dict: ``base_result``, ``variants`` (number evaluated), ``tornado``
+        (Parameter, Low/High value and result, Swing; largest swing first) and
+        ``pairwise`` ({(p1, p2): (levels1, levels2, len1 x len2 results)}).
+    """
+    base_row = np.array([float(base[p]) for p in PARAMETERS])
+    levels: Dict[str, np.ndarray] = {}
+    for p in PARAMETERS:
+        if p == "base_cost" and len(scope_levels):
+            levels[p] = np.sort(np.asarray(scope_levels, dtype=float))
+        else:
+            levels[p] = parameter_levels(*ranges[p], integer=p == "compliance_grace_quarters")
+
+    # Assemble every variant as a row of one matrix.
+    blocks: List[np.ndarray] = []
+    one_at_a_time: Dict[str, slice] = {}
+    pairwise: Dict[Tuple[str, str], slice] = {}
+    offset = 0
+    for i, p in enumerate(PARAMETERS):
+        rows = np.tile(base_row, (len(levels[p]), 1))
+        rows[:, i] = levels[p]
+        blocks.append(rows)
+        one_at_a_time[p] = slice(offset, offset + len(rows))
+        offset += len(rows)
+    for (i, p), (j, q) in combinations(enumerate(PARAMETERS), 2):
+        a, b = np.meshgrid(levels[p], levels[q], indexing="ij")
+        rows = np.tile(base_row, (a.size, 1))
+        rows[:, i], rows[:, j] = a.ravel(), b.ravel()
+        blocks.append(rows)
+        pairwise[(p, q)] = slice(offset, offset + len(rows))
+        offset += len(rows)
+
+    matrix = np.vstack(blocks)
+    results = added_cost(matrix, quarter)
+    base_result = float(added_cost(base_row[None, :], quarter)[0])
+
+    tornado = []
+    for p in PARAMETERS:
+        values = results[one_at_a_time[p]]
+        tornado.append({
+            "Parameter": p,
+            "Low Value": levels[p][0],
+            "High Value": levels[p][-1],
+            "Low Result": float(values[0]),
+            "High Result": float(values[-1]),
+            "Swing": float(values.max() - values.min()),
+        })
+    tornado_df = pd.DataFrame(tornado).sort_values("Swing", ascending=False, kind="stable").reset_index(drop=True)
+
+    return {
+        "base_result": base_result,
+        "variants": len(matrix),
+        "tornado": tornado_df,
+        "pairwise": {
+            key: (levels[key[0]], levels[key[1]], results[part].reshape(len(levels[key[0]]), len(levels[key[1]])))
+            for key, part in pairwise.items()
+        },
+    }
+
+
+def pair_grid(result: Dict[str, object], p: str, q: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(levels of p, levels of q, p x q results) for a pair in either order."""
+    if (p, q) in result["pairwise"]:
+        return result["pairwise"][(p, q)]
+    levels_q, levels_p, grid = result["pairwise"][(q, p)]
+    return levels_p, levels_q, grid.T
@@ -0,0 +1,80 @@
+"""
+Site-bundled replacement costing.
+
+``Total_Replacement_Cost`` prices every device as its own truck roll. Bundled,
+the devices of a site (or a proximity cluster of sites) share one visit:
+
+    bundle cost = visit cost + sum(hardware) + marginal labor share x sum(labor)
+
+where a device's labor comes from ``src.labor`` and its hardware is the rest of
+its replacement cost. Bundle totals are group sums computed once per grouping;
+pricing and ranking by risk per dollar are O(bundles) array operations, so
+changing the visit cost or labor share re-ranks instantly.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_VISIT_COST = 750.0
+DEFAULT_MARGINAL_LABOR_SHARE = 0.6
+
+
+def bundle_totals(devices: pd.DataFrame, keys: pd.Series) -> pd.DataFrame:
+    """
+    Per-bundle sums for devices grouped by ``keys``.
+
+    Args:
+        devices (pd.DataFrame): Devices with Site_Code, Risk_Score,
+            Total_Replacement_Cost and Labor_Cost.
+        keys (pd.Series): Bundle key for each device, aligned to ``devices``.
+
+    Returns:
+        pd.DataFrame: Bundle, Sites, Devices, Risk_Score, Device_Cost (sum of
+        per-device replacement costs), Hardware_Cost and Labor_Cost.
+    """
+    codes, uniques = pd.factorize(keys.to_numpy())
+    n = len(uniques)
+    device_cost = devices["Total_Replacement_Cost"].to_numpy(dtype=float)
+    labor = np.minimum(devices["Labor_Cost"].to_numpy(dtype=float), device_cost)
+    sites = (
+        pd.DataFrame({"code": codes, "site": devices["Site_Code"].to_numpy()})
+        .drop_duplicates()["code"]
+        .to_numpy()
+    )
+    return pd.DataFrame({
+        "Bundle": uniques,
+        "Sites": np.bincount(sites, minlength=n),
+        "Devices": np.bincount(codes, minlength=n),
+        "Risk_Score": np.bincount(codes, weights=devices["Risk_Score"].to_numpy(dtype=float), minlength=n),
+        "Device_Cost": np.bincount(codes, weights=device_cost, minlength=n),
+        "Hardware_Cost": np.bincount(codes, weights=device_cost - labor, minlength=n),
+        "Labor_Cost": np.bincount(codes, weights=labor, minlength=n),
+    })
+
+
+def price_bundles(
+    totals: pd.DataFrame,
+    visit_cost: float = DEFAULT_VISIT_COST,
+    marginal_labor_share: float = DEFAULT_MARGINAL_LABOR_SHARE,
+) -> pd.DataFrame:
+    """
+    Bundle costs and ranking by risk per dollar, best first.
+
+    Returns:
+        pd.DataFrame: ``totals`` plus Bundle_Cost, Savings (vs per-device costing),
+        Risk_per_1k (risk per $1,000) and Cumulative_Cost in rank order.
+    """
+    priced = totals.copy()
+    priced["Bundle_Cost"] = visit_cost + priced["Hardware_Cost"] + marginal_labor_share * priced["Labor_Cost"]
+    priced["Savings"] = priced["Device_Cost"] - priced["Bundle_Cost"]
+    cost = priced["Bundle_Cost"].to_numpy()
+    priced["Risk_per_1k"] = np.divide(
+        priced["Risk_Score"].to_numpy() * 1_000, cost, out=np.zeros(len(priced)), where=cost > 0
+    )
+    priced = priced.sort_values(["Risk_per_1k", "Risk_Score"], ascending=False, kind="stable")
+    priced["Cumulative_Cost"] = priced["Bundle_Cost"].cumsum()
+    return priced.reset_index(drop=True)
+
+
+def bundles_within(priced: pd.DataFrame, budget: float) -> int:
+    """Number of top-ranked bundles whose cumulative cost fits in ``budget``."""
+    return int(np.searchsorted(priced["Cumulative_Cost"].to_numpy(), budget, side="right"))
@@ -0,0 +1,136 @@
+"""
+Cost-weighted kernel density surface for the Geographic page.
+
+Replacement cost is binned onto a fixed-size lat/long grid and smoothed with a
+Gaussian kernel by FFT convolution, so the cost of the smoothing depends only on
+the grid size, not on the number of devices. Surfaces are cached per dataset
+version and bandwidth.
+"""
+import math
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+MILES_PER_DEGREE_LAT = 69.05
+
+# Longest grid side, in cells; the other side follows the extent's aspect ratio.
+GRID_SIZE = 512
+
+# Kernel truncation and extent padding, in bandwidths.
+KERNEL_SIGMAS = 4.0
+
+# Transparent -> gold -> coral -> crimson, as (position, RGBA).
+DENSITY_STOPS = np.array([
+    [0.00, 240, 168, 48, 0],
+    [0.25, 240, 168, 48, 110],
+    [0.60, 232, 115, 74, 170],
+    [1.00, 200, 40, 40, 215],
+], dtype=float)
+
+
+def _gaussian_kernel(sigma_rows: float, sigma_cols: float) -> np.ndarray:
+    half_r = max(1, int(math.ceil(KERNEL_SIGMAS * sigma_rows)))
+    half_c = max(1, int(math.ceil(KERNEL_SIGMAS * sigma_cols)))
+    rows = np.exp(-0.5 * (np.arange(-half_r, half_r + 1) / sigma_rows) ** 2)
+    cols = np.exp(-0.5 * (np.arange(-half_c, half_c + 1) / sigma_cols) ** 2)
+    kernel = np.outer(rows, cols)
+    return kernel / kernel.sum()
+
+
+def fft_convolve(grid: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """'Same'-size linear convolution via real FFTs (zero-padded, no wrap-around)."""
+    shape = (grid.shape[0] + kernel.shape[0] - 1, grid.shape[1] + kernel.shape[1] - 1)
+    full = np.fft.irfft2(np.fft.rfft2(grid, shape) * np.fft.rfft2(kernel, shape), shape)
+    r0, c0 = kernel.shape[0] // 2, kernel.shape[1] // 2
+    return full[r0:r0 + grid.shape[0], c0:c0 + grid.shape[1]]
+
+
+def _mercator_y(lat: np.ndarray) -> np.ndarray:
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cost_density(version: str, bandwidth_miles: float, _points: pd.DataFrame) -> Dict[str, object]:
+    """
+    Kernel density of Total_Replacement_Cost for one dataset version and bandwidth.
+
+    Args:
+        version (str): Cache key identifying ``_points`` (see ``dataset_version``).
+        bandwidth_miles (float): Gaussian kernel standard deviation in miles.
+        _points (pd.DataFrame): Rows with Latitude, Longitude and Total_Replacement_Cost.
+
+    Returns:
+        dict: ``density`` (float32 grid, north row first, rows evenly spaced in
+        Web-Mercator so it can be drawn as a map image), ``bounds``
+        ([west, south, east, north]) and ``peak`` (max cost density per square mile).
+    """
+    lat = _points["Latitude"].to_numpy(dtype=float)
+    lon = _points["Longitude"].to_numpy(dtype=float)
+    cost = _points["Total_Replacement_Cost"].to_numpy(dtype=float)
+    keep = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(cost)
+    lat, lon, cost = lat[keep], lon[keep], cost[keep]
+    if not len(lat):
+        return {"density": np.zeros((1, 1), dtype=np.float32), "bounds": [0, 0, 0, 0], "peak": 0.0}
+
+    # Extent padded so the kernel tails stay on the grid.
+    mid_lat = float(np.clip((lat.min() + lat.max()) / 2, -80, 80))
+    pad_lat = KERNEL_SIGMAS * bandwidth_miles / MILES_PER_DEGREE_LAT
+    pad_lon = pad_lat / math.cos(math.radians(mid_lat))
+    south, north = max(lat.min() - pad_lat, -85.0), min(lat.max() + pad_lat, 85.0)
+    west, east = lon.min() - pad_lon, lon.max() + pad_lon
+
+    # Roughly square cells on the ground.
+    ground_w = (east - west) * math.cos(math.radians(mid_lat))
+    ground_h = north - south
+    scale = GRID_SIZE / max(ground_w, ground_h)
+    n_cols = max(16, int(round(ground_w * scale)))
+    n_rows = max(16, int(round(ground_h * scale)))
+    cell_lat = (north - south) / n_rows
+    cell_lon = (east - west) / n_cols
+
+    # Linear binning: each device's cost is shared among its four nearest cells.
+    fy = (lat - south) / cell_lat - 0.5
+    fx = (lon - west) / cell_lon - 0.5
+    y0, x0 = np.floor(fy).astype(int), np.floor(fx).astype(int)
+    wy, wx = fy - y0, fx - x0
+    grid = np.zeros(n_rows * n_cols)
+    for dy, dx, w in (
+        (0, 0, (1 - wy) * (1 - wx)), (0, 1, (1 - wy) * wx),
+        (1, 0, wy * (1 - wx)), (1, 1, wy * wx),
+    ):
+        rows, cols = np.clip(y0 + dy, 0, n_rows - 1), np.clip(x0 + dx, 0, n_cols - 1)
+        grid += np.bincount(rows * n_cols + cols, weights=cost * w, minlength=n_rows * n_cols)
+    grid = grid.reshape(n_rows, n_cols)
+
+    sigma_rows = bandwidth_miles / MILES_PER_DEGREE_LAT / cell_lat
+    sigma_cols = bandwidth_miles / (MILES_PER_DEGREE_LAT * math.cos(math.radians(mid_lat))) / cell_lon
+    density = np.maximum(fft_convolve(grid, _gaussian_kernel(sigma_rows, sigma_cols)), 0.0)
+    cell_sq_miles = (cell_lat * MILES_PER_DEGREE_LAT) * (cell_lon * MILES_PER_DEGREE_LAT * math.cos(math.radians(mid_lat)))
+    density /= cell_sq_miles
+
+    # Resample rows to even Web-Mercator spacing, north first, for display as an image.
+    merc = np.linspace(_mercator_y(np.array(north)), _mercator_y(np.array(south)), n_rows)
+    row_lat = np.degrees(2 * np.arctan(np.exp(merc)) - np.pi / 2)
+    pos = np.clip((row_lat - south) / cell_lat - 0.5, 0, n_rows - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, n_rows - 1)
+    frac = (pos - lo)[:, None]
+    density = density[lo] * (1 - frac) + density[hi] * frac
+
+    return {
+        "density": density.astype(np.float32),
+        "bounds": [float(west), float(south), float(east), float(north)],
+        "peak": float(density.max()),
+    }
+
+
+def density_image(density: np.ndarray) -> np.ndarray:
+    """Colour a density grid as an RGBA uint8 image (square-root scaled to its peak)."""
+    peak = float(density.max())
+    t = np.sqrt(density / peak) if peak > 0 else np.zeros_like(density)
+    image = np.empty(density.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        image[..., channel] = np.interp(t, DENSITY_STOPS[:, 0], DENSITY_STOPS[:, channel + 1])
+    return image
@@ -0,0 +1,142 @@
+"""
+Level-of-detail spatial aggregation for the 3-D Risk Map.
+
+Devices are bucketed into Web-Mercator tile cells at several zoom levels (the
+same grid the basemap uses), plus an exact co-located level. The pyramid is
+built once per dataset version; each render ships only the level that suits
+the current view, encoded as compact typed arrays.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.aggregations import first_n_join
+
+# Tile zoom levels in the pyramid, coarse to fine. "exact" groups co-located devices.
+LOD_LEVELS = (3, 5, 7, 9, 11)
+EXACT_LEVEL = "exact"
+
+# A cell grid this many zoom steps finer than the view keeps columns a few pixels apart.
+ZOOM_OFFSET = 5
+
+# Upper bound on cells sent to the browser (keeps the payload in the low hundreds of KB).
+MAX_CELLS = 2500
+
+HOSTNAME_SAMPLE = 5
+
+# Columns the pyramid reads; hash exactly these to key the cache.
+LOD_COLUMNS = [
+    "Latitude", "Longitude", "Hostname", "State", "Total_Replacement_Cost", "risk_severity",
+]
+
+
+def _tile_index(lat: np.ndarray, lon: np.ndarray, level: int) -> np.ndarray:
+    """Return a single int64 Web-Mercator tile key for each coordinate at ``level``."""
+    n = 1 << level
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    x = np.floor((lon + 180.0) / 360.0 * n).astype(np.int64).clip(0, n - 1)
+    y = np.floor(
+        (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * n
+    ).astype(np.int64).clip(0, n - 1)
+    return x * n + y
+
+
+def _aggregate(points: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Aggregate device points into one row per group of ``keys``."""
+    grouped = points.groupby(keys, sort=False)
+    cells = grouped.agg(
+        Latitude=("Latitude", "mean"),
+        Longitude=("Longitude", "mean"),
+        Total_Replacement_Cost=("Total_Replacement_Cost", "sum"),
+        Device_Count=("Hostname", "size"),
+        State=("State", "first"),
+        risk_severity=("risk_severity", "min"),
+    )
+    cells = cells.reset_index(drop=True)
+    cells["Hostnames"] = first_n_join(points, keys, "Hostname", HOSTNAME_SAMPLE, sort=False).to_numpy()
+    return cells
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_lod_pyramid(version: str, _points: pd.DataFrame) -> Dict[object, pd.DataFrame]:
+    """
+    Precompute the aggregation pyramid for one dataset version.
+
+    Args:
+        version (str): Cache key identifying ``_points`` (see ``dataset_version``).
+        _points (pd.DataFrame): Device rows with Latitude, Longitude, Hostname,
+            State, Total_Replacement_Cost and a numeric ``risk_severity``.
+
+    Returns:
+        dict: Level (tile zoom, or ``EXACT_LEVEL``) -> aggregated cells, coarse to fine.
+    """
+    points = _points[LOD_COLUMNS]
+    lat = points["Latitude"].to_numpy(dtype=float)
+    lon = points["Longitude"].to_numpy(dtype=float)
+
+    pyramid: Dict[object, pd.DataFrame] = {}
+    for level in LOD_LEVELS:
+        keyed = points.assign(_cell=_tile_index(lat, lon, level))
+        pyramid[level] = _aggregate(keyed, ["_cell"])
+
+    exact = _aggregate(points.assign(_lat=lat, _lon=lon), ["_lat", "_lon"])
+    pyramid[EXACT_LEVEL] = exact
+    return pyramid
+
+
+def select_level(
+    pyramid: Dict[object, pd.DataFrame], zoom: float, max_cells: int = MAX_CELLS
+) -> object:
+    """Pick the finest pyramid level that suits ``zoom`` and fits within ``max_cells``."""
+    target = zoom + ZOOM_OFFSET
+    chosen = next(iter(pyramid))
+    for level, cells in pyramid.items():
+        too_fine = target <= LOD_LEVELS[-1] if level == EXACT_LEVEL else level > target
+        if too_fine or len(cells) > max_cells:
+            break
+        chosen = level
+    return chosen
+
+
+def level_zooms() -> List[float]:
+    """
+    View zooms at which ``select_level`` can switch levels.
+
+    Between two consecutive values the chosen level depends only on the pyramid,
+    so the map needs to report its camera only when the zoom crosses one.
+    """
+    return [float(level - ZOOM_OFFSET) for level in LOD_LEVELS]
+
+
+def encode_cells(cells: pd.DataFrame) -> dict:
+    """
+    Encode aggregated cells as compact typed arrays for the browser.
+
+    Positions are float32 (~1 m precision at US longitudes), costs float32,
+    severities uint8 and states dictionary-encoded as uint16 codes.
+    """
+    states, state_codes = np.unique(cells["State"].fillna("").astype(str), return_inverse=True)
+    return {
+        "position": cells[["Longitude", "Latitude"]].to_numpy(dtype=np.float32),
+        "cost": cells["Total_Replacement_Cost"].to_numpy(dtype=np.float32),
+        "count": cells["Device_Count"].to_numpy(dtype=np.uint32),
+        "sev": cells["risk_severity"].clip(upper=255).to_numpy(dtype=np.uint8),
+        "state": state_codes.astype(np.uint16),
+        "states": states.tolist(),
+        "hosts": cells["Hostnames"].tolist(),
+    }
+
+
+def points_in_cell(points: pd.DataFrame, level: object, cell: pd.Series) -> pd.DataFrame:
+    """Return the device rows aggregated into ``cell`` (one row of ``pyramid[level]``)."""
+    if level == EXACT_LEVEL:
+        mask = (points["Latitude"] == cell["Latitude"]) & (points["Longitude"] == cell["Longitude"])
+        return points[mask]
+    # A cell's device-weighted centroid always falls inside the cell itself.
+    target = _tile_index(np.array([cell["Latitude"]]), np.array([cell["Longitude"]]), level)[0]
+    keys = _tile_index(
+        points["Latitude"].to_numpy(dtype=float), points["Longitude"].to_numpy(dtype=float), level
+    )
+    return points[keys == target]
@@ -0,0 +1,151 @@
+"""
+Local spatial statistics: Getis-Ord Gi* hotspot z-scores.
+
+Neighbours are every unit within a fixed distance band (found with a haversine
+BallTree radius query) and are stored as a SciPy sparse weight matrix, so the
+statistic for all units is a handful of sparse matrix-vector products. The
+matrix holds one entry per neighbour pair, which grows with the square of the
+unit count for a wide band; ``band_pair_estimates`` lets callers keep to bands
+whose matrix stays under ``MAX_BAND_PAIRS``.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import streamlit as st
+from scipy.stats import norm
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_MILES = 3958.8
+# Widest weight matrix built (~12 bytes per pair in CSR, plus the query's own lists).
+MAX_BAND_PAIRS = 10_000_000
+# Units sampled to estimate a band's pair count.
+PAIR_SAMPLE = 2000
+
+# (two-sided confidence, z threshold), strongest first.
+CONFIDENCE_LEVELS = [(99, 2.576), (95, 1.960), (90, 1.645)]
+NOT_SIGNIFICANT = "Not Significant"
+
+HOTSPOT_ORDER = (
+    [f"Hot Spot ({c}%)" for c, _ in CONFIDENCE_LEVELS]
+    + [NOT_SIGNIFICANT]
+    + [f"Cold Spot ({c}%)" for c, _ in reversed(CONFIDENCE_LEVELS)]
+)
+HOTSPOT_COLORS = {
+    "Hot Spot (99%)": "#B03A2E",
+    "Hot Spot (95%)": "#E74C3C",
+    "Hot Spot (90%)": "#F1948A",
+    NOT_SIGNIFICANT: "#D5D8DC",
+    "Cold Spot (90%)": "#85C1E9",
+    "Cold Spot (95%)": "#3498DB",
+    "Cold Spot (99%)": "#1F618D",
+}
+
+
+def distance_band_weights(lat: np.ndarray, lon: np.ndarray, radius_miles: float) -> sp.csr_matrix:
+    """
+    Binary distance-band weights: w_ij = 1 when unit j is within ``radius_miles``
+    of unit i, including i itself (the "star" in Gi*).
+    """
+    coords = np.radians(np.column_stack([lat, lon]))
+    tree = BallTree(coords, metric="haversine")
+    neighbours = tree.query_radius(coords, r=radius_miles / EARTH_RADIUS_MILES)
+    counts = np.fromiter((len(n) for n in neighbours), dtype=np.int64, count=len(neighbours))
+    indptr = np.r_[0, np.cumsum(counts)]
+    indices = np.concatenate(neighbours) if len(neighbours) else np.zeros(0, dtype=np.int64)
+    data = np.ones(len(indices), dtype=np.float64)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(lat), len(lat)))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def band_pair_estimates(version: str, radii: Tuple[float, ...], _units: pd.DataFrame) -> Dict[float, int]:
+    """
+    Estimated neighbour pairs (weight matrix non-zeros) for each band in ``radii``.
+
+    Counts the neighbours of a random sample of at most ``PAIR_SAMPLE`` units
+    and scales up, so checking a wide band costs a fraction of building it.
+
+    Args:
+        version (str): Cache key identifying ``_units`` (see ``dataset_version``).
+        radii (tuple): Candidate distance bands in miles.
+        _units (pd.DataFrame): One row per unit with Latitude and Longitude.
+    """
+    coords = np.radians(_units[["Latitude", "Longitude"]].to_numpy(dtype=float))
+    n = len(coords)
+    if not n:
+        return {radius: 0 for radius in radii}
+    tree = BallTree(coords, metric="haversine")
+    sample = coords
+    if n > PAIR_SAMPLE:
+        sample = coords[np.random.default_rng(0).choice(n, PAIR_SAMPLE, replace=False)]
+    return {
+        radius: int(tree.query_radius(sample, r=radius / EARTH_RADIUS_MILES, count_only=True).sum()
+                    * n / len(sample))
+        for radius in radii
+    }
+
+
+def getis_ord_gi_star(values: np.ndarray, weights: sp.csr_matrix) -> np.ndarray:
+    """
+    Gi* z-score of every unit for ``values`` under ``weights`` (rows include self).
+
+    Gi*_i = (sum_j w_ij x_j - mean * W_i) / (S * sqrt((n * sum_j w_ij^2 - W_i^2) / (n - 1)))
+    where W_i = sum_j w_ij and S is the population standard deviation of x.
+    """
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    mean = x.mean() if n else 0.0
+    s = np.sqrt(max((x ** 2).mean() - mean ** 2, 0.0)) if n else 0.0
+    if n < 3 or s == 0:
+        return np.zeros(n)
+    w_sum = np.asarray(weights.sum(axis=1)).ravel()
+    w_sq = np.asarray(weights.multiply(weights).sum(axis=1)).ravel()
+    numerator = weights @ x - mean * w_sum
+    denominator = s * np.sqrt(np.maximum(n * w_sq - w_sum ** 2, 0.0) / (n - 1))
+    z = np.zeros(n)
+    np.divide(numerator, denominator, out=z, where=denominator > 0)
+    return z
+
+
+def classify_hotspots(z: np.ndarray) -> np.ndarray:
+    """Label z-scores as hot/cold spots at 90/95/99% confidence."""
+    labels = np.full(len(z), NOT_SIGNIFICANT, dtype=object)
+    for confidence, threshold in reversed(CONFIDENCE_LEVELS):
+        labels[z >= threshold] = f"Hot Spot ({confidence}%)"
+        labels[z <= -threshold] = f"Cold Spot ({confidence}%)"
+    return labels
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def hotspot_analysis(
+    version: str, radius_miles: float, value_col: str, _units: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Gi* hotspot statistics for a set of spatial units (sites, counties, ...).
+
+    Args:
+        version (str): Cache key identifying ``_units`` (see ``dataset_version``).
+        radius_miles (float): Distance band defining neighbours.
+        value_col (str): Column of ``_units`` analysed.
+        _units (pd.DataFrame): One row per unit with Latitude, Longitude and ``value_col``.
+
+    Returns:
+        pd.DataFrame: ``_units`` plus Neighbors, Gi_Z_Score, Gi_P_Value and Hotspot.
+    """
+    units = _units.reset_index(drop=True).copy()
+    weights = distance_band_weights(
+        units["Latitude"].to_numpy(dtype=float), units["Longitude"].to_numpy(dtype=float), radius_miles
+    )
+    z = getis_ord_gi_star(units[value_col].to_numpy(dtype=float), weights)
+    units["Neighbors"] = np.diff(weights.indptr) - 1
+    units["Gi_Z_Score"] = z
+    units["Gi_P_Value"] = 2 * norm.sf(np.abs(z))
+    units["Hotspot"] = classify_hotspots(z)
+    return units
+
+
+def hotspot_summary(results: pd.DataFrame) -> Dict[str, int]:
+    """Number of units in each hotspot class, in ``HOTSPOT_ORDER``."""
+    counts = results["Hotspot"].value_counts()
+    return {label: int(counts.get(label, 0)) for label in HOTSPOT_ORDER}
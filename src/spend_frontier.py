@@ -0,0 +1,84 @@
+"""
+Spend-vs-risk frontier for the Investment Prioritization page.
+
+For one in-scope fleet, cumulative spend and cumulative risk retired are
+computed once along two orders: the current risk ranking (descending
+Risk_Score) and the efficient order (risk retired by funding devices in
+descending risk per dollar). Both are cached
+per (dataset, exceptions) version, so "how much risk does budget B clear" and
+"what is the least budget that clears X%" are ``searchsorted`` lookups.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CRITICAL_LEVEL = "Critical (Past EoL)"
+
+# Risk measures a frontier can be read against: all risk, or risk on critical devices only.
+METRIC_ALL = "risk"
+METRIC_CRITICAL = "critical"
+
+
+def _curve(order: np.ndarray, cost: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Cumulative spend and values along ``order``, starting from (0, 0)."""
+    curve = {"spend": np.r_[0.0, np.cumsum(cost[order])]}
+    for key, value in values.items():
+        curve[key] = np.r_[0.0, np.cumsum(value[order])]
+    return curve
+
+
+def _efficient_order(cost: np.ndarray, value: np.ndarray) -> np.ndarray:
+    """Descending value per dollar; free items first, valueless items last."""
+    free = cost <= 0
+    ratio = np.where(free, np.inf, value / np.where(free, 1.0, cost))
+    ratio[value <= 0] = -np.inf
+    return np.argsort(-ratio, kind="stable")
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def spend_frontier(version: str, _fleet: pd.DataFrame) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Frontier curves for one in-scope fleet.
+
+    Args:
+        version (str): Cache key identifying ``_fleet`` (see ``subset_version``).
+        _fleet (pd.DataFrame): Devices with Risk_Level, Risk_Score and Total_Replacement_Cost.
+
+    Returns:
+        dict: ``ranking`` (spend / risk / critical along descending Risk_Score) and,
+        for each metric, ``efficient_<metric>`` (spend / <metric> in descending
+        <metric> per dollar).
+    """
+    cost = _fleet["Total_Replacement_Cost"].to_numpy(dtype=float)
+    risk = _fleet["Risk_Score"].to_numpy(dtype=float)
+    critical = np.where(_fleet["Risk_Level"].to_numpy() == CRITICAL_LEVEL, risk, 0.0)
+    values = {METRIC_ALL: risk, METRIC_CRITICAL: critical}
+
+    frontier = {"ranking": _curve(np.argsort(-risk, kind="stable"), cost, values)}
+    for metric, value in values.items():
+        frontier[f"efficient_{metric}"] = _curve(_efficient_order(cost, value), cost, {metric: value})
+    return frontier
+
+
+def value_at(curve: Dict[str, np.ndarray], metric: str, budget: float) -> float:
+    """Value retired by the longest prefix of ``curve`` costing at most ``budget``."""
+    i = int(np.searchsorted(curve["spend"], budget, side="right")) - 1
+    return float(curve[metric][max(i, 0)])
+
+
+def budget_for(curve: Dict[str, np.ndarray], metric: str, target: float) -> Optional[float]:
+    """Least spend along ``curve`` that retires at least ``target``; None if unreachable."""
+    i = int(np.searchsorted(curve[metric], target - 1e-9, side="left"))
+    if i >= len(curve["spend"]):
+        return None
+    return float(curve["spend"][i])
+
+
+def sample_curve(curve: Dict[str, np.ndarray], metric: str, points: int = 1_500) -> pd.DataFrame:
+    """Evenly spaced (by spend) samples of a curve for plotting."""
+    spend = curve["spend"]
+    grid = np.linspace(0.0, spend[-1], points)
+    idx = np.searchsorted(spend, grid, side="right") - 1
+    return pd.DataFrame({"Spend": grid, "Value": curve[metric][np.maximum(idx, 0)]})
@@ -0,0 +1,145 @@
+"""
+Crew-capacity-constrained refresh wave scheduler.
+
+High-risk devices are grouped into site work packages (one crew visit per
+site) and each state's packages are queued in descending site risk. A state's
+crews work through its queue at their quarterly crew-hour capacity, so a
+site's wave is where the state's cumulative hours reach it:
+``floor(hours_before / capacity)``. A site larger than a quarter's capacity
+spans several waves.
+
+Queues and cumulative hours are fixed per dataset version, so editing one
+state's capacity only re-divides that state's slice of the queue; other
+states keep their schedule untouched.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+START_YEAR = 2026
+UNSCHEDULED = -1
+
+# Default crew assumptions: 12 working weeks x 40 hours per crew per quarter.
+DEFAULT_CREW_HOURS_PER_QUARTER = 480.0
+DEFAULT_CREWS_PER_STATE = 2
+
+
+def wave_label(wave: int, start_year: int = START_YEAR) -> str:
+    """Quarter name of a zero-based wave index (``UNSCHEDULED`` -> "Unscheduled")."""
+    if wave < 0:
+        return "Unscheduled"
+    return f"{start_year + wave // 4} Q{wave % 4 + 1}"
+
+
+def site_packages(devices: pd.DataFrame) -> pd.DataFrame:
+    """
+    One work package per site.
+
+    Args:
+        devices (pd.DataFrame): Devices with Site_Code, State, Risk_Score and Labor_Hours.
+
+    Returns:
+        pd.DataFrame: Site_Code, State, Devices, Labor_Hours and Risk_Score (sums).
+    """
+    return (
+        devices.assign(State=devices["State"].fillna("Unknown").astype(str))
+        .groupby("Site_Code", sort=False)
+        .agg(
+            State=("State", "first"),
+            Devices=("Site_Code", "size"),
+            Labor_Hours=("Labor_Hours", "sum"),
+            Risk_Score=("Risk_Score", "sum"),
+        )
+        .reset_index()
+    )
+
+
+class WaveSchedule:
+    """Per-state risk-ordered site queues scheduled against quarterly crew hours."""
+
+    def __init__(self, version: str, packages: pd.DataFrame):
+        """
+        Args:
+            version (str): Dataset version the queues were built for.
+            packages (pd.DataFrame): Output of ``site_packages``.
+        """
+        self.version = version
+        queue = packages.sort_values(
+            ["State", "Risk_Score", "Site_Code"], ascending=[True, False, True], kind="stable"
+        ).reset_index(drop=True)
+        self.sites = queue
+        self.hours = queue["Labor_Hours"].to_numpy(dtype=float)
+        self.cum_end = queue.groupby("State", sort=False)["Labor_Hours"].cumsum().to_numpy(dtype=float)
+        states = queue["State"].astype(str).to_numpy()
+        bounds = np.flatnonzero(np.r_[True, states[1:] != states[:-1], True])
+        self._slices: Dict[str, slice] = {
+            states[a]: slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])
+        }
+        self.start_wave = np.full(len(queue), UNSCHEDULED, dtype=np.int64)
+        self.end_wave = np.full(len(queue), UNSCHEDULED, dtype=np.int64)
+        self.capacity: Dict[str, float] = {state: 0.0 for state in self._slices}
+
+    @property
+    def states(self) -> List[str]:
+        return list(self._slices)
+
+    def set_capacity(self, state: str, hours_per_quarter: float) -> bool:
+        """Re-wave one state's queue. Returns False when nothing changed."""
+        hours_per_quarter = max(float(hours_per_quarter), 0.0)
+        if state not in self._slices or self.capacity[state] == hours_per_quarter:
+            return False
+        self.capacity[state] = hours_per_quarter
+        part = self._slices[state]
+        if hours_per_quarter <= 0:
+            self.start_wave[part] = UNSCHEDULED
+            self.end_wave[part] = UNSCHEDULED
+            return True
+        end = self.cum_end[part]
+        start = end - self.hours[part]
+        # The small tolerance keeps a site that exactly fills a quarter in that quarter.
+        self.start_wave[part] = np.floor(start / hours_per_quarter + 1e-9).astype(np.int64)
+        self.end_wave[part] = np.maximum(
+            self.start_wave[part], np.ceil(end / hours_per_quarter - 1e-9).astype(np.int64) - 1
+        )
+        return True
+
+    def sync(self, capacity: Dict[str, float]) -> List[str]:
+        """Apply a full capacity table, re-waving only the states that changed."""
+        return [state for state in self.states if self.set_capacity(state, capacity.get(state, 0.0))]
+
+    def schedule(self) -> pd.DataFrame:
+        """Site packages with Wave_Start / Wave_End indices and the start quarter's label."""
+        out = self.sites.copy()
+        out["Wave_Start"] = self.start_wave
+        out["Wave_End"] = self.end_wave
+        out["Wave"] = [wave_label(w) for w in self.start_wave]
+        return out
+
+    def wave_load(self, horizon: int) -> pd.DataFrame:
+        """
+        Crew hours used per state and wave over the first ``horizon`` waves.
+
+        Returns:
+            pd.DataFrame: State, Wave (index), Quarter, Hours_Used and Capacity.
+        """
+        rows = []
+        for state, part in self._slices.items():
+            cap = self.capacity[state]
+            total = float(self.cum_end[part.stop - 1]) if part.stop > part.start else 0.0
+            waves = np.arange(horizon)
+            used = np.clip(total - waves * cap, 0.0, cap) if cap > 0 else np.zeros(horizon)
+            rows.append(pd.DataFrame({
+                "State": state, "Wave": waves, "Hours_Used": used, "Capacity": cap,
+            }))
+        load = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(
+            columns=["State", "Wave", "Hours_Used", "Capacity"]
+        )
+        load["Quarter"] = [wave_label(int(w)) for w in load["Wave"]]
+        return load
+
+    def backlog_waves(self) -> Tuple[int, int]:
+        """(waves needed to finish every scheduled site, number of unscheduled sites)."""
+        scheduled = self.end_wave >= 0
+        needed = int(self.end_wave[scheduled].max()) + 1 if scheduled.any() else 0
+        return needed, int((~scheduled).sum())